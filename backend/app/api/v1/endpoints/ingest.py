@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from app.utils.ingest import worker
+
+router = APIRouter()
+
+# =======================================================================#
+# Scheduled ingestion status
+# =======================================================================#
+@router.get("/status")
+def get_ingest_status():
+    """State, timing and per-source counts of the last ingestion run, as recorded by the worker."""
+    return worker.get_status()
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metrics import render_metrics
+
+router = APIRouter()
+
+# =======================================================================#
+# Prometheus metrics
+# =======================================================================#
+@router.get("", response_class=PlainTextResponse)
+def get_metrics():
+    """Search stage latency histograms and cache hit ratios in Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Query
+import asyncio
+import time
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import StreamingResponse
 from app.lib.logger import logger
 from app.utils.search import main as search_main
 from app.utils.search import enrich
+from app.utils.search import result_cache
+from app.utils import init as app_init
+from app.utils import metrics
+from app.utils import arxiv_mirror
 from app.database.items import get_num_items
-from app.utils.stream import ysm
+from app.utils.stream import ysm, stream_until_disconnect
 
 router = APIRouter()
 
@@ -13,6 +19,7 @@ router = APIRouter()
 
 @router.get("")
 async def conduct_full_search(
+    request: Request,
     query: str = Query(..., description="Search query string"),
     valid_sources: str = Query(..., description="Comma-separated list of valid sources to search"),
     recency: int = Query(..., description="Time window for recent items"),
@@ -20,68 +27,230 @@ async def conduct_full_search(
     arxiv_categories: str | None = Query(None, description="Comma-separated list of arXiv categories"),
     reddit_categories: str | None = Query(None, description="Comma-separated list of Reddit categories"),
     product_hunt_categories: str | None = Query(None, description="Comma-separated list of Product Hunt categories"),
-    ycombinator_categories: str | None = Query(None, description="Comma-separated list of Y Combinator categories")
+    ycombinator_categories: str | None = Query(None, description="Comma-separated list of Y Combinator categories"),
+    search_mode: str = Query("vector", description="'vector' for embedding search, 'hybrid' to fuse in keyword (BM25) results"),
+    stream: bool = Query(False, description="Send each source's hits as partial_results events as soon as they arrive"),
+    collapse_duplicates: bool = Query(False, description="Fold near-duplicate results from different sources into one, listing the copies under 'duplicates'")
 ):
     """
     Conduct a full search across specified sources with AI-enhanced query analysis.
 
-    Returns a streaming response with search progress and results.
+    Returns a streaming response with search progress and results. With
+    stream=true, partial_results events carrying one source's hits are sent
+    as sources answer, before the final merged results event; their
+    scored_against field says whether the hits were ranked against the raw
+    or the enriched query. A timings
+    event with the per-stage breakdown of the request follows the results.
     """
     logger.info(f"Search request - Query: {query}, Sources: {valid_sources}, Recency: {recency}, Results: {num_results}")
-    logger.debug(f"Current DB size: {CURR_DB_SIZE}")
+    logger.debug(f"Current DB size: {app_init.CURR_DB_SIZE}")
 
     arxiv_category_list = arxiv_categories.split(',') if arxiv_categories else []
     reddit_category_list = reddit_categories.split(',') if reddit_categories else []
     product_hunt_category_list = product_hunt_categories.split(',') if product_hunt_categories else []
     y_combinator_category_list = ycombinator_categories.split(',') if ycombinator_categories else []
 
-    async def event_generator():
+    sources = valid_sources.split(",")
+    category_lists = {
+        'arxiv': arxiv_category_list,
+        'reddit': reddit_category_list,
+        'product_hunt': product_hunt_category_list,
+        'y_combinator': y_combinator_category_list,
+    }
+    cache_key = result_cache.make_key(query, sources, recency, num_results, category_lists, search_mode, collapse_duplicates)
+
+    async def run_search():
+        """Run the full pipeline, yielding (type, message) pairs as it goes.
+
+        A ("degraded", reason) pair means part of the search failed or timed
+        out; it is not sent to the client, but keeps the result out of the cache.
+        """
+        yield "status", "Analyzing your search query..."
+
+        # When streaming, retrieve on the raw query while the model analyzes
+        # it, for early partial results and as the fallback if the analysis
+        # fails. It is cancelled once the analysis succeeds: the enriched
+        # search supersedes it. Without streaming nothing would show it
+        # early, so a failed analysis just searches with the raw query.
+        # arXiv is left out here and searched once, with the final query.
+        speculative_sources = [source for source in sources if source != "arxiv"] if stream else []
+        speculative_task = None
+        if speculative_sources:
+            speculative_task = asyncio.create_task(search_main.get_search_results(
+                speculative_sources,
+                query,
+                query,
+                num_results,
+                recency,
+                reddit_category_list,
+                product_hunt_category_list,
+                y_combinator_category_list,
+                search_mode=search_mode
+            ))
+
+        def partials(found, scored_against):
+            """Per-source partial result events for hits that arrived early.
+
+            scored_against ("query" or "enriched_query") tells the client which
+            query vector the similarities come from; hits scored against
+            different ones replace each other rather than being compared.
+            """
+            for source, source_items in search_main.group_by_source(found).items():
+                yield "partial_results", {
+                    "source": source,
+                    "scored_against": scored_against,
+                    "items": search_main.filter_results(source_items, num_results, collapse_duplicates),
+                }
+
+        enrich_task = asyncio.create_task(enrich.analyze_query(query))
         try:
-            yield ysm("status", "Analyzing your search query...")
+            speculative_streamed = False
+            if speculative_task is not None:
+                # Show raw-query hits right away if they beat the analysis
+                await asyncio.wait({enrich_task, speculative_task}, return_when=asyncio.FIRST_COMPLETED)
+                if speculative_task.done() and not speculative_task.exception():
+                    for event in partials(speculative_task.result(), "query"):
+                        yield event
+                    speculative_streamed = True
 
             # Get AI analysis of query
-            ai_analysis = enrich.analyze_query(query)
+            ai_analysis = await enrich_task
             logger.debug(f"AI Analysis results - Problem Statement: {ai_analysis.get('problem_statement')}, Target Users: {ai_analysis.get('target_users')}")
 
-            yield ysm("status", f"Problem Statement: {str(ai_analysis.get('problem_statement', ''))}")
-            yield ysm("status", f"Target Users: {str(ai_analysis.get('target_users', ''))}")
+            if ai_analysis.get('error'):
+                yield "degraded", "query analysis failed"
+                yield "status", "Query analysis unavailable, searching with your query as written"
+            else:
+                yield "status", f"Problem Statement: {str(ai_analysis.get('problem_statement', ''))}"
+                yield "status", f"Target Users: {str(ai_analysis.get('target_users', ''))}"
 
             if ai_analysis.get('terms'):
-                yield ysm("status", f"Applying Filters: {', '.join(str(t) for t in ai_analysis['terms'])}")
+                yield "status", f"Applying Filters: {', '.join(str(t) for t in ai_analysis['terms'])}"
 
-            sources = valid_sources.split(",")
+            mirror = arxiv_mirror.get_mirror_index()
+            arxiv_size = len(mirror.sources[arxiv_mirror.ARXIV_SOURCE]) if mirror is not None else "100000+"
+            if "arxiv" in sources and len(sources) == 1:
+                yield "status", f"Searching in a database of {arxiv_size} arXiv articles"
+            else:
+                yield "status", f"Searching in a database of {app_init.CURR_DB_SIZE} items{f' and {arxiv_size} arXiv articles' if 'arxiv' in sources else ''}"
 
-            # Enrich query with AI analysis
-            enriched_query = f"{query} {ai_analysis.get('problem_statement', '')} {ai_analysis.get('target_users', '')} {', '.join(str(t) for t in ai_analysis.get('terms', []))}"
+            speculative_results = []
+            if speculative_task is not None and not ai_analysis.get('error'):
+                speculative_task.cancel()
+            elif speculative_task is not None:
+                try:
+                    speculative_results = await speculative_task
+                except Exception as e:
+                    logger.error(f"Raw-query retrieval failed: {e}")
+                    yield "degraded", "raw-query retrieval failed"
+                if not speculative_streamed:
+                    for event in partials(speculative_results, "query"):
+                        yield event
 
-            if "arxiv" in sources and len(sources) == 1:
-                yield ysm("status", "Searching in a database of 100000+ arXiv articles")
+            if ai_analysis.get('error'):
+                # Nothing to enrich with, so the raw-query results stand and
+                # only the sources left out of speculation still need a search
+                search_sources = [source for source in sources if source not in speculative_sources]
+                enriched_query, scored_against = query, "query"
             else:
-                yield ysm("status", f"Searching in a database of {CURR_DB_SIZE} items{' and 100000+ arXiv articles' if 'arxiv' in sources else ''}")
+                search_sources, scored_against = sources, "enriched_query"
+                # Enrich query with AI analysis
+                enriched_query = f"{query} {ai_analysis.get('problem_statement', '')} {ai_analysis.get('target_users', '')} {', '.join(str(t) for t in ai_analysis.get('terms', []))}"
 
-            # Get search results using the helper function
-            search_results = await search_main.get_search_results(
-                sources,
-                query,
-                enriched_query,
-                num_results,
-                recency,
-                reddit_category_list,
-                product_hunt_category_list,
-                y_combinator_category_list,
-                arxiv_category_list
-            )
+            search_results = []
+            if search_sources:
+                # Get search results, streaming each source's hits as they arrive
+                async for type, payload in search_main.iter_search_results(
+                    search_sources,
+                    query,
+                    enriched_query,
+                    num_results,
+                    recency,
+                    reddit_category_list,
+                    product_hunt_category_list,
+                    y_combinator_category_list,
+                    arxiv_category_list,
+                    search_mode=search_mode,
+                    terms=[str(t) for t in ai_analysis.get('terms', [])]
+                ):
+                    if type == "results":
+                        search_results = payload
+                    elif type == "note":
+                        yield "degraded", payload
+                        yield "status", payload
+                    elif stream:
+                        for event in partials(payload["items"], scored_against):
+                            yield event
+            # Only set when streaming and the analysis failed, and then for
+            # other sources, all scored against the same raw-query vector
+            search_results = speculative_results + search_results
+        finally:
+            for task in (enrich_task, speculative_task):
+                if task is not None and not task.done():
+                    task.cancel()
 
-            yield ysm("status", f"Found {len(search_results)} matching results")
-            logger.info(f"Search completed - Found {len(search_results)} total results")
+        yield "status", f"Found {len(search_results)} matching results"
+        logger.info(f"Search completed - Found {len(search_results)} total results")
 
-            # Filter and clean results using the helper function
-            cleaned_results = search_main.filter_results(search_results, num_results)
+        # Filter and clean results using the helper function
+        cleaned_results = search_main.filter_results(search_results, num_results, collapse_duplicates)
 
-            yield ysm("status", f"Filtered to {len(cleaned_results)} best results")
-            yield ysm("results", cleaned_results)
+        yield "status", f"Filtered to {len(cleaned_results)} best results"
+        yield "results", cleaned_results
+
+    async def compute_cache_entry():
+        """The cacheable outcome of a search, or None if it was degraded."""
+        statuses, results, degraded = [], [], False
+        async for type, message in run_search():
+            if type == "results":
+                results = message
+            elif type == "status":
+                statuses.append(message)
+            elif type == "degraded":
+                degraded = True
+        return None if degraded else {"statuses": statuses, "results": results}
+
+    # Stage timings of this request, sent after the results
+    timings = metrics.start_request_timings()
+
+    async def event_generator():
+        started = time.perf_counter()
+
+        def record_total(stage_source: str):
+            elapsed = time.perf_counter() - started
+            metrics.search_stage_seconds.observe(elapsed, stage="total", source=stage_source)
+            timings["total"] = round(elapsed, 4)
+
+        try:
+            cached, is_stale = result_cache.search_result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Serving {'stale ' if is_stale else ''}cached results for: {query}")
+                if is_stale:
+                    result_cache.search_result_cache.refresh(cache_key, compute_cache_entry, sources)
+                for status in cached["statuses"]:
+                    yield ysm("status", status)
+                yield ysm("results", cached["results"])
+                record_total("cache")
+                yield ysm("timings", timings)
+                return
 
-            logger.info(f"Successfully processed {len(cleaned_results)} results")
+            # Read before searching, so an ingest landing meanwhile outdates the entry
+            versions = dict(result_cache.read_source_versions())
+            statuses, degraded = [], False
+            async for type, message in run_search():
+                if type == "degraded":
+                    logger.info(f"Not caching degraded results ({message}) for: {query}")
+                    degraded = True
+                    continue
+                if type == "results":
+                    if not degraded:
+                        result_cache.search_result_cache.set(cache_key, {"statuses": statuses, "results": message}, sources, versions)
+                    logger.info(f"Successfully processed {len(message)} results")
+                elif type == "status":
+                    statuses.append(message)
+                yield ysm(type, message)
+            record_total("")
+            yield ysm("timings", timings)
 
         except Exception as e:
             error_msg = f"Search error: {str(e)}"
@@ -89,6 +258,6 @@ async def conduct_full_search(
             yield ysm("error", str(e))
 
     return StreamingResponse(
-        event_generator(),
+        stream_until_disconnect(request, event_generator()),
         media_type="text/event-stream"
     )
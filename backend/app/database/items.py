@@ -1,11 +1,23 @@
 from supabase import acreate_client, create_client
 import os
-from typing import List, Any
+from typing import List, Any, Iterable
 import logging
 from dotenv import load_dotenv
 import asyncio
 import numpy as np
 from .init import asupabase
+from app.utils.vector_index import get_vector_index
+from app.utils import index_log
+from app.utils.search.lexical import get_lexical_index
+from app.utils.search.result_cache import mark_sources_updated
+from app.utils.metrics import timed
+from datetime import datetime, timedelta, timezone
+import heapq
+import time
+import math
+from collections import Counter
+from itertools import islice
+from urllib.parse import quote
 
 
 
@@ -31,43 +43,134 @@ async def get_num_items() -> int:
 #========================================
 # Item Insertions
 #========================================
-async def add_items(items: List[dict[str, Any]], embeddings: np.ndarray, table: str) -> None:
+# Rows per upsert request, requests in flight, and retries per chunk
+UPSERT_CHUNK_SIZE = int(os.getenv("UPSERT_CHUNK_SIZE", "500"))
+UPSERT_MAX_CONCURRENCY = int(os.getenv("UPSERT_MAX_CONCURRENCY", "4"))
+UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "3"))
+UPSERT_BACKOFF_SECONDS = 1.0
+# Query-string budget of one existing-title lookup, well under common proxy URL limits
+UPSERT_LOOKUP_MAX_CHARS = 4000
+
+def item_row(item: dict[str, Any], embedding: np.ndarray) -> dict[str, Any]:
+    """Build the table row for an item and its embedding."""
+    return {
+        'title': item['title'],
+        'description': item['description'],
+        'link': item['link'],
+        'source_link': item['source_link'],
+        'embedding': embedding.tolist(),
+        'image_url': item['image_url'],
+        'created_at': item['created_at'],
+        'author_name': item.get('author_name', ''),
+        'author_profile_url': item.get('author_profile_url', ''),
+        'categories': item.get('categories', []),
+    }
+
+def batch_titles(titles: List[str], max_chars: int) -> List[List[str]]:
+    """Split titles into lookups whose URL-encoded in.() filter stays under max_chars."""
+    batches, current, size = [], [], 0
+    for title in titles:
+        cost = len(quote(title, safe='')) + 3  # quoted and comma-separated
+        if current and size + cost > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(title)
+        size += cost
+    if current:
+        batches.append(current)
+    return batches
+
+async def count_existing(table: str, titles: List[str]) -> int:
+    """How many of titles already have a row, in lookups small enough for a query string."""
+    existing = 0
+    for batch in batch_titles(titles, UPSERT_LOOKUP_MAX_CHARS):
+        response = await asupabase.table(table).select('title').in_('title', batch).execute()
+        existing += len(response.data or [])
+    return existing
+
+async def upsert_chunk(table: str, rows: List[dict[str, Any]]) -> tuple[List[dict[str, Any]], int]:
+    """Upsert one chunk of rows in a single request, retrying with exponential backoff.
+
+    Returns:
+        Tuple of (upserted rows as returned by the table, number of rows that already existed)
+    """
+    existed = None
+    for attempt in range(UPSERT_MAX_RETRIES + 1):
+        try:
+            # Counted once, before the first write, so a retry after a
+            # partially applied attempt doesn't count its rows as updates
+            if existed is None:
+                existed = await count_existing(table, [row['title'] for row in rows])
+            result = await asupabase.table(table).upsert(rows, on_conflict='title').execute()
+            if hasattr(result, 'error') and result.error:
+                raise Exception(result.error)
+            return result.data or [], existed
+        except Exception as e:
+            if attempt == UPSERT_MAX_RETRIES:
+                raise
+            delay = UPSERT_BACKOFF_SECONDS * 2 ** attempt
+            logging.warning(f"Upsert of {len(rows)} rows into {table} failed ({str(e)}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+async def add_items(items: List[dict[str, Any]], embeddings: np.ndarray, table: str, chunk_size: int = UPSERT_CHUNK_SIZE, max_concurrency: int = UPSERT_MAX_CONCURRENCY) -> dict[str, Any]:
     """Add or update items in the specified table with their embeddings.
 
+    Rows are upserted in chunks of chunk_size per request with at most
+    max_concurrency requests in flight. A chunk that keeps failing after
+    UPSERT_MAX_RETRIES is counted as failed and the rest carry on. Items with
+    the same title are written once (the last one wins), since the table is
+    keyed on title.
+
     Args:
         items: List of item dictionaries containing metadata
         embeddings: Numpy array of embeddings corresponding to items
         table: Name of the table to insert into
+        chunk_size: Rows per upsert request
+        max_concurrency: Maximum number of upsert requests in flight
+
+    Returns:
+        Summary dict with 'inserted', 'updated' and 'failed' row counts and 'seconds' taken
     """
     try:
         if len(items) != len(embeddings):
             raise ValueError("Number of items must match number of embeddings")
 
-        tasks = [
-            asupabase.table(table).upsert({
-                'title': item['title'],
-                'description': item['description'],
-                'link': item['link'],
-                'source_link': item['source_link'],
-                'embedding': embeddings[i].tolist(),
-                'image_url': item['image_url'],
-                'created_at': item['created_at'],
-                'author_name': item.get('author_name', ''),
-                'author_profile_url': item.get('author_profile_url', ''),
-                'categories': item.get('categories', []),
-            },
-            on_conflict='title',
-            count='exact'
-            ).execute()
-            for i, item in enumerate(items)
-        ]
-
-        results = await asyncio.gather(*tasks)
-
-        # Check results
-        for result in results:
-            if hasattr(result, 'error') and result.error:
-                raise Exception(f"Error inserting item: {result.error}")
+        started = time.perf_counter()
+        rows_by_title = {item['title']: item_row(item, embeddings[i]) for i, item in enumerate(items)}
+        embeddings_by_title = {item['title']: embeddings[i] for i, item in enumerate(items)}
+        rows = list(rows_by_title.values())
+        chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(chunk: List[dict[str, Any]]):
+            async with semaphore:
+                return await upsert_chunk(table, chunk)
+
+        results = await asyncio.gather(*(run(chunk) for chunk in chunks), return_exceptions=True)
+
+        summary = {'inserted': 0, 'updated': 0, 'failed': 0, 'seconds': 0.0}
+        upserted = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, BaseException):
+                logging.error(f"Giving up on {len(chunk)} rows for {table}: {str(result)}")
+                summary['failed'] += len(chunk)
+                continue
+            data, existed = result
+            upserted.extend(data)
+            summary['updated'] += existed
+            summary['inserted'] += len(chunk) - existed
+        summary['seconds'] = round(time.perf_counter() - started, 3)
+
+        # Let running API processes pick up the new vectors without a reload
+        published_rows = [row for row in upserted if 'id' in row and row.get('title') in rows_by_title]
+        published_embeddings = [embeddings_by_title[row['title']] for row in published_rows]
+        index_log.publish_items(table, published_rows, published_embeddings)
+
+        # Cached search results for this source are now out of date
+        if upserted and table in index_log.TABLE_SOURCES:
+            mark_sources_updated([index_log.TABLE_SOURCES[table]])
+
+        return summary
 
     except Exception as e:
         logging.error(f"Error adding items to Supabase: {str(e)}")
@@ -99,7 +202,8 @@ async def fetch_items_from_source(source: str, embedding: np.ndarray, num_result
             'num_results': num_results,
             'recency': recency
         }
-        response = await asupabase.rpc('get_items_by_source', payload).execute()
+        with timed("db_rpc", source):
+            response = await asupabase.rpc('get_items_by_source', payload).execute()
         return response.data
     except Exception as e:
         logging.error(f"Error fetching from {source}: {str(e)}")
@@ -107,9 +211,95 @@ async def fetch_items_from_source(source: str, embedding: np.ndarray, num_result
 
 
 #========================================
-# Primary function for fetching with embeddings
+# Item Fetching from several sources in one RPC
 #========================================
+# One get_items_multi_source call instead of a get_items_by_source call per
+# source (see sql/get_items_multi_source.sql). Off until the function is deployed.
+SEARCH_MULTI_SOURCE_RPC = os.getenv("SEARCH_MULTI_SOURCE_RPC", "0") == "1"
+
+def format_vector(embedding: np.ndarray) -> str:
+    """Serialize a vector as a pgvector literal, with float32 precision only."""
+    return '[' + ','.join(f'{x:.7g}' for x in np.asarray(embedding, dtype=np.float32)) + ']'
 
+async def fetch_items_multi_source(embedding: np.ndarray, requests: dict[str, tuple[List[str] | None, int]], recency: int, client: Any = None) -> dict[str, List[dict[str, Any]]]:
+    """Fetch ranked items for several sources with a single RPC.
+
+    The query vector is sent once, alongside a category list and row limit
+    for each source. The RPC tags every row with its source.
+
+    Args:
+        embedding: Query embedding vector
+        requests: Map of source -> (category list or None, max rows)
+        recency: Time window for recent items
+        client: Object exposing .rpc(); defaults to the Supabase client
+
+    Returns:
+        Map of source -> items sorted by descending similarity
+    """
+    payload = {
+        'embedding_param': format_vector(embedding),
+        'source_params': [
+            {'source': source, 'categories': categories or [], 'num_results': limit}
+            for source, (categories, limit) in requests.items()
+        ],
+        'recency': recency
+    }
+    with timed("db_rpc", "multi_source"):
+        response = await (client or asupabase).rpc('get_items_multi_source', payload).execute()
+
+    ranked: dict[str, List[dict[str, Any]]] = {source: [] for source in requests}
+    for row in response.data or []:
+        item = {**row['item'], 'source': row['source'], 'similarity': row['similarity']}
+        ranked.setdefault(row['source'], []).append(item)
+    for rows in ranked.values():
+        rows.sort(key=lambda item: item['similarity'], reverse=True)
+    return ranked
+
+
+#========================================
+# Keyword search
+#========================================
+KEYWORD_TABLES = {
+    'y_combinator': 'yc_items',
+    'hacker_news': 'hn_items',
+    'reddit': 're_items',
+    'product_hunt': 'ph_items'
+}
+
+async def fetch_keyword_items_from_source(source: str, keywords: List[str], num_results: int, recency: int, category_list: List[str], match_all: bool = True) -> List[dict[str, Any]]:
+    """Fallback keyword lookup against Supabase when no local keyword index is loaded.
+
+    Keywords are matched case-insensitively against the title and description;
+    with match_all every keyword must appear, otherwise any one is enough.
+    """
+    try:
+        query = asupabase.table(KEYWORD_TABLES[source]).select(
+            'id, title, description, link, source_link, image_url, created_at, author_name, author_profile_url, categories'
+        )
+        # PostgREST or-filters use commas and parentheses as syntax
+        patterns = [keyword.replace(',', ' ').replace('(', ' ').replace(')', ' ').strip() for keyword in keywords]
+        filters = [f"title.ilike.%{pattern}%,description.ilike.%{pattern}%" for pattern in patterns if pattern]
+        if match_all:
+            for condition in filters:
+                query = query.or_(condition)
+        elif filters:
+            query = query.or_(','.join(filters))
+        if recency:
+            query = query.gte('created_at', (datetime.now(timezone.utc) - timedelta(days=recency)).isoformat())
+        if category_list:
+            query = query.overlaps('categories', category_list)
+        response = await query.limit(num_results).execute()
+        rows = response.data or []
+    except Exception as e:
+        logging.error(f"Error keyword searching {source}: {str(e)}")
+        return []
+
+    # Rank by how often the keywords occur, a rough stand-in for BM25
+    for row in rows:
+        text = f"{row.get('title', '')} {row.get('description', '')}".lower()
+        row['source'] = source
+        row['lexical_score'] = float(sum(text.count(keyword.lower()) for keyword in keywords))
+    return rows
 
 
 async def keyword_search(
@@ -119,16 +309,109 @@ async def keyword_search(
     recency: int,
     reddit_category_list: List[str],
     product_hunt_category_list: List[str],
-    y_combinator_category_list: List[str]
+    y_combinator_category_list: List[str],
+    match_all: bool = True
 ) -> List[dict[str, Any]]:
-    """Collect num_results items with all of the given keywords present in the string 'f{item.name} {item.description} {' '.join(item.categories)}'"""
+    """Collect num_results items with all of the given keywords present in the string 'f{item.name} {item.description} {' '.join(item.categories)}'
+
+    Items are ranked by BM25 from the in-memory keyword index when it is
+    loaded, falling back to ilike filters on Supabase otherwise. Each result
+    carries its raw 'lexical_score' and no 'similarity', which is reserved
+    for embedding scores.
+
+    Args:
+        sources: List of source identifiers to query
+        keywords: Keywords or phrases to look for
+        num_results: Maximum total results to return
+        recency: Time window for recent items
+        reddit_category_list: Categories to filter Reddit items
+        product_hunt_category_list: Categories to filter Product Hunt items
+        y_combinator_category_list: Categories to filter Y Combinator items
+        match_all: Require every keyword to be present (otherwise any keyword matches)
+
+    Returns:
+        Combined list of matching items across all sources, best first
+    """
+    keywords = [keyword for keyword in keywords if keyword and keyword.strip()]
+    if not keywords:
+        return []
 
+    category_map = {
+        'y_combinator': y_combinator_category_list,
+        'hacker_news': None,
+        'reddit': reddit_category_list,
+        'product_hunt': product_hunt_category_list
+    }
 
+    index = get_lexical_index()
+
+    async def search_source(source: str) -> List[dict[str, Any]]:
+        with timed("keyword", source):
+            if index is not None and index.has_source(source):
+                return index.search(source, keywords, num_results, recency, category_map.get(source), match_all)
+            return await fetch_keyword_items_from_source(source, keywords, num_results, recency, category_map.get(source), match_all)
+
+    results = await asyncio.gather(*(search_source(source) for source in sources if source in category_map))
+    return heapq.nlargest(num_results, (item for result in results for item in result), key=lambda item: item['lexical_score'])
 
 
 #========================================
 # Primary function for fetching items
 #========================================
+# Per-source rows fetched in the first round, relative to an even split of num_results
+SEARCH_OVERFETCH_FACTOR = float(os.getenv("SEARCH_OVERFETCH_FACTOR", "1.5"))
+
+def merge_ranked(ranked_lists: Iterable[List[dict[str, Any]]], num_results: int) -> List[dict[str, Any]]:
+    """k-way heap merge of per-source lists already sorted by descending similarity."""
+    merged = heapq.merge(*ranked_lists, key=lambda item: item['similarity'], reverse=True)
+    return list(islice(merged, num_results))
+
+async def _fetch_per_source(sources: List[str], limits: dict[str, int], embedding: np.ndarray, recency: int, category_map: dict[str, Any]) -> dict[str, List[dict[str, Any]]]:
+    """One get_items_by_source RPC per source, concurrently."""
+    ranked = {}
+    results = await asyncio.gather(*(
+        fetch_items_from_source(
+            source=source,
+            embedding=embedding,
+            num_results=limits[source],
+            recency=recency,
+            category_list=category_map.get(source)
+        )
+        for source in sources
+    ), return_exceptions=True)
+    for source, result in zip(sources, results):
+        if isinstance(result, list):  # Check if result is valid data
+            for item in result:
+                item.setdefault('source', source)
+            ranked[source] = sorted(result, key=lambda item: item['similarity'], reverse=True)
+        else:
+            logging.warning(f"Task returned an error: {result}")
+    return ranked
+
+async def _gather_ranked(sources: List[str], limits: dict[str, int], embedding: np.ndarray, recency: int, category_map: dict[str, Any], index: Any) -> dict[str, List[dict[str, Any]]]:
+    """Fetch each source's ranked list from the local index or Supabase."""
+    ranked = {}
+    local = [source for source in sources if index is not None and index.has_source(source)]
+    remote = [source for source in sources if source not in local]
+
+    for source in local:
+        with timed("local_index", source):
+            ranked[source] = index.search(source, embedding, limits[source], recency, category_map.get(source))
+
+    if remote and SEARCH_MULTI_SOURCE_RPC:
+        try:
+            ranked.update(await fetch_items_multi_source(
+                embedding,
+                {source: (category_map.get(source), limits[source]) for source in remote},
+                recency
+            ))
+            return ranked
+        except Exception as e:
+            logging.warning(f"Multi-source RPC failed, falling back to per-source RPCs: {str(e)}")
+    if remote:
+        ranked.update(await _fetch_per_source(remote, limits, embedding, recency, category_map))
+    return ranked
+
 async def embedding_search(
     sources: List[str],
     embedding: np.ndarray,
@@ -150,7 +433,7 @@ async def embedding_search(
         y_combinator_category_list: Categories to filter Y Combinator items
 
     Returns:
-        Combined list of matching items across all sources
+        The num_results most similar items across all sources, best first
     """
     try:
         if embedding is None or len(embedding) == 0:
@@ -164,30 +447,37 @@ async def embedding_search(
             'product_hunt': product_hunt_category_list
         }
 
-        # Create a list of async tasks for each source
-        tasks = [
-            fetch_items_from_source(
-                source=source,
-                embedding=embedding,
-                num_results=num_results,
-                recency=recency,
-                category_list=category_map.get(source)
-            )
-            for source in sources if source in category_map
+        # Serve from the in-process index when it mirrors the source,
+        # otherwise fall back to the Supabase RPC
+        index = get_vector_index()
+
+        active_sources = [source for source in sources if source in category_map]
+        if not active_sources:
+            return []
+
+        # First round: each source only returns its share of the global top-k,
+        # padded by the over-fetch factor. The in-process index is cheap enough
+        # to always ask for the full k.
+        share = min(num_results, math.ceil(num_results * SEARCH_OVERFETCH_FACTOR / len(active_sources)))
+        limits = {
+            source: num_results if index is not None and index.has_source(source) else share
+            for source in active_sources
+        }
+        ranked = await _gather_ranked(active_sources, limits, embedding, recency, category_map, index)
+        merged = merge_ranked(ranked.values(), num_results)
+
+        # A source that returned a full page and had every row make the cut may
+        # still hold better rows than the current tail, so fetch its full k
+        taken = Counter(item['source'] for item in merged if 'source' in item)
+        short = [
+            source for source, rows in ranked.items()
+            if limits[source] < num_results and len(rows) == limits[source] and taken[source] == len(rows)
         ]
+        if short:
+            ranked.update(await _gather_ranked(short, {source: num_results for source in short}, embedding, recency, category_map, index))
+            merged = merge_ranked(ranked.values(), num_results)
 
-        # Run all tasks concurrently and gather results
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Flatten the results into a single list
-        combined_results = []
-        for result in results:
-            if isinstance(result, list):  # Check if result is valid data
-                combined_results.extend(result)
-            else:
-                logging.warning(f"Task returned an error: {result}")
-
-        return combined_results[:num_results]
+        return merged
 
     except Exception as e:
         logging.error(f"Error performing vector search: {str(e)}")
@@ -9,12 +9,13 @@ from typing import List, Dict
 
 logger = setup_logger("ai")
 gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+GEMINI_MODEL = 'gemini-1.5-flash'
 
 #========================================
 # Query Analysis Functions
 #========================================
-def get_chat_response(system_prompt: str, user_prompt: str, response_schema: BaseModel | None = None) -> str | Dict[str, str]:
-    prompt = f"""
+def build_prompt(system_prompt: str, user_prompt: str) -> str:
+    return f"""
         SYSTEM PROMPT:
         {system_prompt}
 
@@ -22,21 +23,50 @@ def get_chat_response(system_prompt: str, user_prompt: str, response_schema: Bas
         {user_prompt}
         """
 
-    try:
+def build_config(response_schema: BaseModel | None = None) -> Dict:
+    return {
+        'response_mime_type': 'application/json',
+        **({'response_schema': response_schema} if response_schema else {})
+    }
+
+def parse_response(response, response_schema: BaseModel | None = None) -> str | Dict[str, str]:
+    return response.parsed.model_dump() if response_schema else response.text
 
-        # Initialize Gemini client
+def get_chat_response(system_prompt: str, user_prompt: str, response_schema: BaseModel | None = None) -> str | Dict[str, str]:
+    prompt = build_prompt(system_prompt, user_prompt)
+
+    try:
 
         # Generate content with JSON schema
         response = gemini_client.models.generate_content(
-            model='gemini-1.5-flash',
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=build_config(response_schema)
+        )
+
+        return parse_response(response, response_schema)
+
+    except Exception as e:
+        error_msg = f"Failed to analyze query: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return {
+            "error": error_msg,
+            "original_query": prompt,
+            "terms": []
+        }
+
+async def get_chat_response_async(system_prompt: str, user_prompt: str, response_schema: BaseModel | None = None) -> str | Dict[str, str]:
+    """Same as get_chat_response, but awaits the model without blocking the event loop."""
+    prompt = build_prompt(system_prompt, user_prompt)
+
+    try:
+        response = await gemini_client.aio.models.generate_content(
+            model=GEMINI_MODEL,
             contents=prompt,
-            config = {
-                'response_mime_type': 'application/json',
-                **({'response_schema': response_schema} if response_schema else {})
-            }
+            config=build_config(response_schema)
         )
 
-        return response.parsed.model_dump() if response_schema else response.text
+        return parse_response(response, response_schema)
 
     except Exception as e:
         error_msg = f"Failed to analyze query: {str(e)}"
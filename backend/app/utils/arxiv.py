@@ -1,41 +1,115 @@
 #========================================
 # Imports and Initialization
 #========================================
+import asyncio
+import os
+import threading
 from typing import List, Dict, Any
-import spacy
-from utils import embedding as emb
-from utils.scraper import arxiv_scraper
+import numpy as np
+from app.lib.logger import setup_logger
+from app.utils import embedding as emb
+from app.utils.scraper import arxiv_scraper
+from app.utils.metrics import timed
+from app.utils import arxiv_mirror
 
-# Load English language model
-nlp = spacy.load("en_core_web_sm")
+logger = setup_logger("arxiv")
+
+# How keywords for the live arXiv query are picked:
+#   "spacy" - NOUN/PROPN tokens of the raw query (tagger-only pipeline)
+#   "terms" - the key terms query enrichment already extracted, falling back
+#             to spaCy when there are none; skips loading spaCy entirely
+ARXIV_KEYWORD_EXTRACTOR = os.getenv("ARXIV_KEYWORD_EXTRACTOR", "spacy")
+
+# Components the noun extraction doesn't need; POS tags only take
+# tok2vec + tagger + attribute_ruler
+SPACY_EXCLUDE = ["parser", "ner", "lemmatizer", "senter"]
+
+#========================================
+# Keyword Extraction
+#========================================
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """Load the English model on first use, with only the tagging components.
+
+    Loading takes seconds, so call this from a worker thread, never on the
+    event loop. Concurrent first calls share one load.
+    """
+    global _nlp
+    with _nlp_lock:
+        if _nlp is None:
+            import spacy
+            _nlp = spacy.load("en_core_web_sm", exclude=SPACY_EXCLUDE)
+    return _nlp
+
+async def warm_up_nlp() -> None:
+    """Load the model in the background so the first live arXiv query doesn't pay for it."""
+    try:
+        await asyncio.to_thread(get_nlp)
+        logger.info("Loaded spaCy model for arXiv keyword extraction")
+    except Exception as e:
+        logger.error(f"Failed to load spaCy model: {e}")
+
+def extract_nouns(query: str) -> List[str]:
+    """Lowercased NOUN and PROPN tokens of the query."""
+    return [token.text.lower() for token in get_nlp()(query)
+            if token.pos_ in ['NOUN', 'PROPN']]
+
+def extract_keywords(query: str, terms: List[str] = None) -> List[str]:
+    """Pick the keywords to search arXiv abstracts for, per ARXIV_KEYWORD_EXTRACTOR."""
+    if ARXIV_KEYWORD_EXTRACTOR == "terms" and terms:
+        return [term.lower() for term in terms if term and term.strip()]
+    return extract_nouns(query)
 
 #========================================
 # arXiv Search Functions
 #========================================
-async def get_arxiv_items(query: str, query_embedding: List[float], arxiv_category_list: List[str], num_results: int, recency: int) -> List[Dict[str, Any]]:
+async def get_arxiv_items(query: str, query_embedding: List[float], arxiv_category_list: List[str], num_results: int, recency: int, terms: List[str] = None) -> List[Dict[str, Any]]:
     """Search for relevant arXiv papers based on query and filters.
 
+    Papers come from the local mirror when one is loaded. The live arXiv API
+    is only queried without a mirror, or when the mirror has nothing that
+    matches the filters (e.g. papers newer than its last daily update).
+
     Args:
         query: The search query text
         query_embedding: The embedding vector for the query
         arxiv_category_list: List of arXiv categories to filter by
         num_results: Maximum number of results to return
         recency: Time window for recent papers
+        terms: Key terms from query enrichment, used as keywords in "terms" mode
 
     Returns:
         List of matching arXiv papers with similarity scores
     """
-    # Extract nouns from query for keyword search
-    nouns = [token.text.lower() for token in nlp(query)
-             if token.pos_ in ['NOUN', 'PROPN']]
+    mirror = arxiv_mirror.get_mirror_index()
+    if mirror is not None:
+        with timed("arxiv_mirror"):
+            papers = mirror.search(
+                arxiv_mirror.ARXIV_SOURCE,
+                np.asarray(query_embedding, dtype=np.float32),
+                num_results,
+                recency,
+                arxiv_category_list or None
+            )
+        if papers:
+            return papers
+
+    # Extract keywords from query for keyword search
+    with timed("arxiv_nlp"):
+        # spaCy is CPU-bound (and slow on first use), keep it off the event loop
+        nouns = await asyncio.to_thread(extract_keywords, query, terms)
 
     # Search arXiv using extracted keywords
-    arxiv_items = await arxiv_scraper.search_papers(nouns, arxiv_category_list, num_results, recency)
+    with timed("arxiv_api"):
+        arxiv_items = await arxiv_scraper.search_papers(nouns, arxiv_category_list, num_results, recency)
     if (len(arxiv_items) == 0):
         return []
 
     # Calculate similarity scores
-    embeddings = await emb.get_item_embeddings(arxiv_items)
+    with timed("arxiv_embed"):
+        embeddings = await emb.get_item_embeddings(arxiv_items)
     try:
         similarities = emb.compute_cosine_similarity(query_embedding, embeddings)
     except Exception:
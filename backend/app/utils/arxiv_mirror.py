@@ -0,0 +1,277 @@
+#========================================
+# Imports and Initialization
+#========================================
+import asyncio
+import gzip
+import json
+import os
+import shutil
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils import embedding, snapshot
+from app.utils.scraper import arxiv_scraper
+from app.utils.vector_index import SourceIndex, VectorIndex
+
+load_dotenv()
+
+logger = setup_logger("arxiv_mirror")
+
+ARXIV_SOURCE = "arxiv"
+ARXIV_IMAGE_URL = "https://library.stlawu.edu/sites/default/files/2020-07/arxiv-logo.png"
+# Snapshot directory holding the local arXiv corpus; unset means arXiv is only searched live
+ARXIV_MIRROR_DIR = os.getenv("ARXIV_MIRROR_DIR")
+ARXIV_MIRROR_RELOAD_SECONDS = float(os.getenv("ARXIV_MIRROR_RELOAD_SECONDS", "300"))
+ARXIV_EMBED_CHUNK = 5000  # papers embedded and checkpointed per step during a bulk build
+ARXIV_BUILD_DIR = "build"  # in-progress bulk build, next to the snapshot versions
+ARXIV_PAGE_SIZE = 1000     # papers per live API page
+
+# The mirror is stored in the same snapshot layout as the item index, with a
+# single "arxiv" source, so it is memory-mapped and searched the same way.
+
+#========================================
+# Converting papers to items
+#========================================
+def is_cs_paper(categories: List[str]) -> bool:
+    return any(category.startswith("cs.") for category in categories)
+
+def author_profile_url(last_name: str, first_name: str) -> str:
+    initial = first_name[:1]
+    return f"https://arxiv.org/search/cs?searchtype=author&query={last_name},+{initial}"
+
+def record_to_item(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convert one entry of the arXiv metadata dump (one JSON object per line) to an item.
+
+    Returns:
+        Item dict, or None if the paper has no cs.* category
+    """
+    categories = (record.get("categories") or "").split()
+    if not is_cs_paper(categories):
+        return None
+
+    paper_id = record["id"]
+    versions = record.get("versions") or []
+    try:
+        created_at = parsedate_to_datetime(versions[0]["created"]).isoformat()
+    except (IndexError, KeyError, TypeError, ValueError):
+        created_at = f"{record.get('update_date')}T00:00:00+00:00"
+
+    authors = record.get("authors_parsed") or []
+    last_name, first_name = (authors[0][0], authors[0][1]) if authors else ("", "")
+    return {
+        "id": paper_id,
+        "title": " ".join((record.get("title") or "").split()),
+        "description": " ".join((record.get("abstract") or "").split()),
+        "link": f"https://arxiv.org/pdf/{paper_id}",
+        "source": ARXIV_SOURCE,
+        "source_link": f"https://arxiv.org/abs/{paper_id}",
+        "image_url": ARXIV_IMAGE_URL,
+        "author_name": f"{first_name} {last_name}".strip(),
+        "author_profile_url": author_profile_url(last_name, first_name) if last_name else "",
+        "created_at": created_at,
+        "categories": categories,
+    }
+
+def iter_dump(path: str, since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """Yield cs.* items from a metadata dump (plain or gzipped JSON lines).
+
+    Args:
+        path: Dump file
+        since: Only keep papers first submitted at or after this time
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                item = record_to_item(json.loads(line))
+            except (ValueError, KeyError) as e:
+                logger.error(f"Skipping malformed dump record: {e}")
+                continue
+            if item is None:
+                continue
+            if since is not None and datetime.fromisoformat(item["created_at"]) < since:
+                continue
+            yield item
+
+#========================================
+# Building and updating the mirror
+#========================================
+def _write_progress(path: str, progress: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _read_progress(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _append_build_chunk(build_dir: str, items_bytes: int, items: List[Dict[str, Any]], vectors: np.ndarray) -> int:
+    """Append one embedded chunk to the build files; returns the new size of items.jsonl."""
+    offsets = []
+    with open(os.path.join(build_dir, "items.jsonl"), "ab") as f:
+        for item in items:
+            line = json.dumps(item, default=str).encode("utf-8") + b"\n"
+            f.write(line)
+            items_bytes += len(line)
+            offsets.append(items_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    for name, data in (("offsets.i64", np.asarray(offsets, dtype=np.int64)), ("vectors.f32", vectors)):
+        with open(os.path.join(build_dir, name), "ab") as f:
+            f.write(np.ascontiguousarray(data).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+    return items_bytes
+
+def _truncate_build(build_dir: str, progress: Dict[str, Any]) -> None:
+    """Cut the build files back to the last checkpoint, dropping a half-written chunk."""
+    sizes = {
+        "items.jsonl": progress["items_bytes"],
+        "offsets.i64": (progress["done"] + 1) * 8,
+        "vectors.f32": progress["done"] * (progress["dim"] or 0) * 4,
+    }
+    for name, size in sizes.items():
+        with open(os.path.join(build_dir, name), "r+b") as f:
+            f.truncate(size)
+
+async def build_mirror(dump_path: str, directory: str, since: Optional[datetime] = None) -> Dict[str, Any]:
+    """Embed every cs.* paper in a metadata dump and write the mirror snapshot.
+
+    The dump is streamed ARXIV_EMBED_CHUNK papers at a time: each chunk's
+    items and vectors are appended to files under <directory>/build and
+    checkpointed, so neither the papers nor their vectors are ever all in
+    memory. Re-running an interrupted build with the same dump and since
+    resumes after the last finished chunk.
+
+    Returns:
+        The snapshot manifest
+    """
+    build_dir = os.path.join(directory, ARXIV_BUILD_DIR)
+    os.makedirs(build_dir, exist_ok=True)
+    progress_path = os.path.join(build_dir, "progress.json")
+    build = {
+        "dump": os.path.abspath(dump_path),
+        "dump_bytes": os.path.getsize(dump_path),
+        "since": since.isoformat() if since else None,
+    }
+
+    progress = _read_progress(progress_path)
+    files = [os.path.join(build_dir, name) for name in ("items.jsonl", "offsets.i64", "vectors.f32")]
+    if progress and all(progress.get(key) == value for key, value in build.items()) and all(map(os.path.exists, files)):
+        logger.info(f"Resuming arXiv mirror build after {progress['done']} papers")
+    else:
+        progress = {**build, "dim": None, "done": 0, "items_bytes": 0}
+        for path in files:
+            open(path, "wb").close()
+        with open(os.path.join(build_dir, "offsets.i64"), "wb") as f:
+            f.write(np.zeros(1, dtype=np.int64).tobytes())
+    _truncate_build(build_dir, progress)
+
+    papers = iter_dump(dump_path, since)
+    # Papers already embedded are parsed again, but not kept
+    await asyncio.to_thread(lambda: deque(islice(papers, progress["done"]), maxlen=0))
+    while True:
+        chunk = await asyncio.to_thread(lambda: list(islice(papers, ARXIV_EMBED_CHUNK)))
+        if not chunk:
+            break
+        embedded = np.asarray(await embedding.get_item_embeddings(chunk), dtype=np.float32)
+        items_bytes = await asyncio.to_thread(_append_build_chunk, build_dir, progress["items_bytes"], chunk, embedded)
+        progress = {**progress, "dim": int(embedded.shape[1]), "done": progress["done"] + len(chunk), "items_bytes": items_bytes}
+        _write_progress(progress_path, progress)
+        logger.info(f"Embedded {progress['done']} arXiv papers")
+
+    if not progress["done"]:
+        raise ValueError(f"No cs.* papers found in {dump_path}")
+
+    vectors = np.memmap(files[2], dtype=np.float32, mode="r", shape=(progress["done"], progress["dim"]))
+    items = snapshot.ItemStore(files[0], np.memmap(files[1], dtype=np.int64, mode="r"))
+    index = await asyncio.to_thread(lambda: VectorIndex({ARXIV_SOURCE: SourceIndex(ARXIV_SOURCE, vectors, items)}))
+    manifest = await asyncio.to_thread(snapshot.write_snapshot, index, directory)
+    del index, items, vectors
+    shutil.rmtree(build_dir, ignore_errors=True)
+    return manifest
+
+async def fetch_recent_papers(days: int = 2, page_size: int = ARXIV_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """List cs.* papers submitted in the last few days from the live API, every page of them."""
+    now = datetime.now(timezone.utc)
+    window = f"submittedDate:[{arxiv_scraper.format_arxiv_date(now - timedelta(days=days))} TO {arxiv_scraper.format_arxiv_date(now)}]"
+    papers: List[Dict[str, Any]] = []
+    while True:
+        page = await arxiv_scraper.fetch_papers(f"cat:cs.* AND {window}", page_size, start=len(papers))
+        papers.extend(page)
+        if len(page) < page_size:
+            return papers
+
+async def update_mirror(directory: Optional[str] = ARXIV_MIRROR_DIR, days: int = 2) -> int:
+    """Add recently submitted papers to the mirror snapshot (run by the daily job).
+
+    The new papers are appended as a new snapshot version; the IVF centroids
+    of the last full build are kept, so nothing is retrained.
+
+    Returns:
+        Number of papers added
+    """
+    if not snapshot.snapshot_exists(directory):
+        logger.warning("No arXiv mirror to update; build one with scripts/build_arxiv_mirror.py")
+        return 0
+
+    current = await asyncio.to_thread(snapshot.load_snapshot, directory, [ARXIV_SOURCE])
+    known = current.sources[ARXIV_SOURCE].id_rows
+    papers = list({item["id"]: item for item in await fetch_recent_papers(days) if item["id"] not in known}.values())
+    if not papers:
+        logger.info("arXiv mirror is up to date")
+        return 0
+
+    vectors = await embedding.get_item_embeddings(papers)
+    await asyncio.to_thread(snapshot.append_to_snapshot, directory, ARXIV_SOURCE, papers, vectors)
+    await asyncio.to_thread(load_mirror, directory)
+    logger.info(f"Added {len(papers)} papers to the arXiv mirror")
+    return len(papers)
+
+#========================================
+# Process-wide mirror
+#========================================
+mirror_index: Optional[VectorIndex] = None
+_mirror_version: Optional[str] = None
+
+def get_mirror_index() -> Optional[VectorIndex]:
+    """Return the loaded arXiv mirror, or None if arXiv should be searched live."""
+    return mirror_index
+
+def set_mirror_index(index: Optional[VectorIndex]) -> None:
+    global mirror_index
+    mirror_index = index
+
+def load_mirror(directory: Optional[str] = ARXIV_MIRROR_DIR) -> bool:
+    """Memory-map the mirror snapshot if there is one. Returns whether it was loaded."""
+    global _mirror_version
+    if not snapshot.snapshot_exists(directory):
+        return False
+    version_dir = snapshot.resolve_snapshot(directory)
+    set_mirror_index(snapshot.load_snapshot(version_dir, [ARXIV_SOURCE]))
+    _mirror_version = version_dir
+    logger.info(f"Loaded arXiv mirror: {mirror_index.get_stats()}")
+    return True
+
+async def watch_mirror(directory: Optional[str] = ARXIV_MIRROR_DIR) -> None:
+    """Reload the mirror whenever another process writes a new snapshot version."""
+    while True:
+        await asyncio.sleep(ARXIV_MIRROR_RELOAD_SECONDS)
+        try:
+            if snapshot.snapshot_exists(directory) and snapshot.resolve_snapshot(directory) != _mirror_version:
+                await asyncio.to_thread(load_mirror, directory)
+        except Exception as e:
+            logger.error(f"Failed to reload arXiv mirror: {e}")
@@ -0,0 +1,258 @@
+#========================================
+# Imports and Initialization
+#========================================
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils.ingest.state import item_key
+
+load_dotenv()
+
+logger = setup_logger("dedup")
+
+DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", ".cache/dedup.sqlite3")
+# Estimated Jaccard similarity of the text shingles above which two items are the same launch
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6"))
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16          # 16 bands of 4 rows: pairs around 0.5 similarity start colliding
+DEDUP_SHINGLE_CHARS = 5
+
+# Fixed seed: stored signatures are only comparable if every process
+# uses the same permutations
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20250301)
+_PERM_A = _rng.integers(1, _PRIME, DEDUP_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _PRIME, DEDUP_NUM_PERM, dtype=np.uint64)
+
+#========================================
+# MinHash signatures
+#========================================
+def normalize_item_text(item: Dict[str, Any]) -> str:
+    """Title and description, lowercased with launch prefixes and punctuation stripped."""
+    text = f"{item.get('title') or ''} {item.get('description') or ''}"
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"^\s*(show hn|launch hn)\s*[:\-]\s*", "", text)
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+def shingles(text: str) -> set:
+    """Overlapping character n-grams; short texts are one shingle."""
+    if len(text) <= DEDUP_SHINGLE_CHARS:
+        return {text} if text else set()
+    return {text[i:i + DEDUP_SHINGLE_CHARS] for i in range(len(text) - DEDUP_SHINGLE_CHARS + 1)}
+
+def signature(item: Dict[str, Any]) -> Optional[np.ndarray]:
+    """MinHash signature of an item's text, or None if it has no text."""
+    grams = shingles(normalize_item_text(item))
+    if not grams:
+        return None
+    hashes = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+    # a*x + b stays below 2^64 since a, b < 2^31 and x < 2^32
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.mean(a == b))
+
+def band_buckets(sig: np.ndarray) -> List[str]:
+    """LSH bucket ids; items sharing any bucket are candidate duplicates."""
+    rows = DEDUP_NUM_PERM // DEDUP_BANDS
+    return [
+        f"{band}:{hashlib.blake2b(sig[band * rows:(band + 1) * rows].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(DEDUP_BANDS)
+    ]
+
+#========================================
+# In-memory index
+#========================================
+class MinHashLSH:
+    """Banded MinHash index over keyed signatures, for one run or one result list."""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: Dict[str, List[str]] = defaultdict(list)
+
+    def add(self, key: str, sig: Optional[np.ndarray]) -> None:
+        if key in self.signatures or sig is None:
+            return
+        self.signatures[key] = sig
+        for bucket in band_buckets(sig):
+            self.buckets[bucket].append(key)
+
+    def query(self, key: str, sig: Optional[np.ndarray]) -> Optional[str]:
+        """Key of an indexed near-duplicate: the same canonical link, or similar enough text."""
+        if key in self.signatures:
+            return key
+        if sig is None:
+            return None
+        best, best_similarity = None, self.threshold
+        for candidate in {other for bucket in band_buckets(sig) for other in self.buckets.get(bucket, [])}:
+            score = similarity(sig, self.signatures[candidate])
+            if score >= best_similarity:
+                best, best_similarity = candidate, score
+        return best
+
+
+def collapse_duplicates(items: List[Dict[str, Any]], threshold: float = DEDUP_THRESHOLD) -> List[Dict[str, Any]]:
+    """Fold near-duplicate items into the first (best ranked) copy.
+
+    The kept item gets a 'duplicates' list with the source and links of the
+    copies folded into it. Input order is preserved.
+    """
+    index = MinHashLSH(threshold)
+    kept: Dict[str, Dict[str, Any]] = {}
+    collapsed = []
+    for item in items:
+        key, sig = item_key(item), signature(item)
+        match = index.query(key, sig)
+        if match is not None:
+            kept[match].setdefault('duplicates', []).append({
+                'source': item.get('source'),
+                'title': item.get('title'),
+                'link': item.get('link'),
+                'source_link': item.get('source_link'),
+            })
+            continue
+        item = dict(item)
+        index.add(key, sig)
+        kept[key] = item
+        collapsed.append(item)
+    return collapsed
+
+#========================================
+# Persistent index of stored items
+#========================================
+class DuplicateIndex:
+    """SQLite store of MinHash signatures for stored items, and of the duplicates linked to them.
+
+    Keys are the seen-set keys (canonical links) from app.utils.ingest.state.
+    """
+
+    def __init__(self, path: str, threshold: float = DEDUP_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                "key TEXT PRIMARY KEY, source TEXT NOT NULL, signature BLOB NOT NULL, added_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS bands (bucket TEXT NOT NULL, key TEXT NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_bucket ON bands(bucket)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS duplicates ("
+                "key TEXT PRIMARY KEY, canonical_key TEXT NOT NULL, source TEXT NOT NULL, "
+                "link TEXT, linked_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def find_many(self, source: str, items: List[Dict[str, Any]], signatures: Optional[List[Optional[np.ndarray]]] = None) -> Dict[int, str]:
+        """Match items against stored ones.
+
+        An item matches a stored item from another source with the same
+        canonical link, or any other stored item with similar enough text.
+        Re-scrapes of an item's own key are updates, not duplicates.
+
+        Args:
+            source: Source the items were scraped from
+            items: Items to match
+            signatures: The items' signatures, if the caller already computed them
+
+        Returns:
+            Map of item position to the key of the stored item it duplicates
+        """
+        matches: Dict[int, str] = {}
+        with self._lock:
+            conn = self._connect()
+            for position, item in enumerate(items):
+                key = item_key(item)
+                row = conn.execute("SELECT source FROM signatures WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if row[0] != source:
+                        matches[position] = key
+                    continue
+                sig = signatures[position] if signatures is not None else signature(item)
+                if sig is None:
+                    continue
+                buckets = band_buckets(sig)
+                placeholders = ",".join("?" * len(buckets))
+                candidates = conn.execute(
+                    f"SELECT DISTINCT s.key, s.signature FROM bands b JOIN signatures s ON s.key = b.key "
+                    f"WHERE b.bucket IN ({placeholders})", buckets
+                ).fetchall()
+                best, best_similarity = None, self.threshold
+                for candidate, blob in candidates:
+                    score = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+                    if score >= best_similarity:
+                        best, best_similarity = candidate, score
+                if best is not None:
+                    matches[position] = best
+        return matches
+
+    def has(self, key: str) -> bool:
+        with self._lock:
+            return self._connect().execute("SELECT 1 FROM signatures WHERE key = ?", (key,)).fetchone() is not None
+
+    def add(self, source: str, items: Iterable[Dict[str, Any]]) -> None:
+        """Index stored items so later copies of them are caught."""
+        now = time.time()
+        signature_rows: List[Tuple[str, str, bytes, float]] = []
+        band_rows: List[Tuple[str, str]] = []
+        with self._lock:
+            conn = self._connect()
+            for item in items:
+                key, sig = item_key(item), signature(item)
+                if sig is None:
+                    continue
+                signature_rows.append((key, source, sig.tobytes(), now))
+                band_rows.extend((bucket, key) for bucket in band_buckets(sig))
+                # Content may have changed since the key was last indexed
+                conn.execute("DELETE FROM bands WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO signatures (key, source, signature, added_at) VALUES (?, ?, ?, ?)",
+                signature_rows
+            )
+            conn.executemany("INSERT INTO bands (bucket, key) VALUES (?, ?)", band_rows)
+            conn.commit()
+
+    def link(self, source: str, item: Dict[str, Any], canonical_key: str) -> None:
+        """Record that item is a copy of the stored item canonical_key."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO duplicates (key, canonical_key, source, link, linked_at) VALUES (?, ?, ?, ?, ?)",
+                (item_key(item), canonical_key, source, item.get("link"), time.time())
+            )
+            conn.commit()
+
+    def duplicates_of(self, canonical_key: str) -> List[Dict[str, Any]]:
+        """Copies linked to a stored item."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, source, link FROM duplicates WHERE canonical_key = ?", (canonical_key,)
+            ).fetchall()
+        return [{'key': key, 'source': source, 'link': link} for key, source, link in rows]
+
+
+duplicate_index = DuplicateIndex(DEDUP_INDEX_PATH)
@@ -6,10 +6,16 @@ from typing import List, Dict, Any
 import numpy as np
 from dotenv import load_dotenv
 import asyncio
+from app.utils.embedding_cache import embedding_cache, cache_key
+from app.utils.metrics import timed
 load_dotenv()
 
 client = AsyncOpenAI()
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 256      # inputs per embeddings.create request
+EMBEDDING_MAX_CONCURRENCY = 4   # embeddings.create requests in flight at once
+
 #========================================
 # Embedding Generation Functions
 #========================================
@@ -25,15 +31,90 @@ async def create_embedding(text: str) -> np.ndarray:
     Raises:
         Exception: If there is an error creating the embedding
     """
+    key = cache_key(EMBEDDING_MODEL, text)
+    if embedding_cache is not None:
+        cached = await asyncio.to_thread(embedding_cache.get_many, [key])
+        if key in cached:
+            return cached[key]
+
     try:
-        response = await client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return np.array(response.data[0].embedding)
+        with timed("embed"):
+            response = await client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=text
+            )
+        embedding = np.array(response.data[0].embedding)
     except Exception as e:
         raise Exception(f"Error creating embedding: {str(e)}")
 
+    if embedding_cache is not None:
+        await asyncio.to_thread(embedding_cache.put_many, {key: embedding})
+    return embedding
+
+async def create_embeddings(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE, max_concurrency: int = EMBEDDING_MAX_CONCURRENCY) -> np.ndarray:
+    """Create embedding vectors for many texts using batched OpenAI requests.
+
+    Identical texts are embedded once and vectors already in the embedding
+    cache are reused. The remaining texts are packed into requests of up to
+    batch_size inputs, with at most max_concurrency requests running at once.
+    Output rows follow input order.
+
+    Args:
+        texts: The texts to create embeddings for
+        batch_size: Maximum number of inputs per request
+        max_concurrency: Maximum number of requests in flight
+
+    Returns:
+        Numpy array of shape (len(texts), dim) containing the embedding vectors
+
+    Raises:
+        Exception: If there is an error creating any batch of embeddings
+    """
+    if not texts:
+        return np.array([])
+
+    keys = [cache_key(EMBEDDING_MODEL, text) for text in texts]
+    unique = dict(zip(keys, texts))
+
+    vectors = {}
+    if embedding_cache is not None:
+        vectors = await asyncio.to_thread(embedding_cache.get_many, list(unique))
+
+    missing = [key for key in unique if key not in vectors]
+    if missing:
+        embedded = await _request_embeddings([unique[key] for key in missing], batch_size, max_concurrency)
+        fresh = dict(zip(missing, embedded))
+        if embedding_cache is not None:
+            await asyncio.to_thread(embedding_cache.put_many, fresh)
+        vectors.update(fresh)
+
+    return np.array([vectors[key] for key in keys])
+
+async def _request_embeddings(texts: List[str], batch_size: int, max_concurrency: int) -> np.ndarray:
+    """Embed texts through batched embeddings.create calls, keeping input order."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def embed_batch(batch: List[str]) -> List[List[float]]:
+        async with semaphore:
+            try:
+                response = await client.embeddings.create(
+                    model=EMBEDDING_MODEL,
+                    input=batch
+                )
+            except Exception as e:
+                raise Exception(f"Error creating embeddings batch: {str(e)}")
+        # The API tags each vector with the position of its input
+        ordered = sorted(response.data, key=lambda d: d.index)
+        return [d.embedding for d in ordered]
+
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+    return np.array([embedding for batch in results for embedding in batch])
+
+def get_item_text(item: Dict[str, Any]) -> str:
+    """Build the text that represents an item for embedding."""
+    return f"{item['title']} {item['description']} {', '.join(item.get('categories', []) or [])}"
+
 async def get_item_embeddings(items: List[Dict[str, Any]]) -> np.ndarray:
     """Create embeddings for a list of items by combining their metadata.
 
@@ -43,13 +124,7 @@ async def get_item_embeddings(items: List[Dict[str, Any]]) -> np.ndarray:
     Returns:
         Numpy array containing embedding vectors for all items
     """
-    tasks = []
-    for item in items:
-        text = f"{item['title']} {item['description']} {', '.join(item.get('categories', []))}"
-        tasks.append(create_embedding(text))
-
-    embeddings = await asyncio.gather(*tasks)
-    return np.array(embeddings)
+    return await create_embeddings([get_item_text(item) for item in items])
 
 #========================================
 # Similarity Computation
@@ -0,0 +1,157 @@
+#========================================
+# Imports and Initialization
+#========================================
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils import metrics
+
+load_dotenv()
+
+logger = setup_logger("embedding_cache")
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+#========================================
+# Key Helpers
+#========================================
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies share one cache entry."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+def cache_key(model: str, text: str) -> str:
+    """Build the content-addressed key for a (model, text) pair."""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+#========================================
+# Disk-backed Cache
+#========================================
+class EmbeddingCache:
+    """SQLite-backed store of embedding vectors keyed by (model, text hash).
+
+    Vectors are stored as raw float32 bytes. When the stored payload grows past
+    max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                "nbytes INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)")
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up several keys at once, refreshing their recency on hit."""
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: Dict[str, np.ndarray]) -> None:
+        """Store vectors and evict old entries if the size budget is exceeded."""
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in entries.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob), now))
+        with self._lock:
+            conn = self._connect()
+            placeholders = ",".join("?" * len(rows))
+            replaced = conn.execute(
+                f"SELECT COALESCE(SUM(nbytes), 0) FROM embeddings WHERE key IN ({placeholders})",
+                [row[0] for row in rows]
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, nbytes, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._total_bytes += sum(row[2] for row in rows) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Trim to 90% of the budget so we don't evict on every insert
+        target = int(self.max_bytes * 0.9)
+        cursor = conn.execute("SELECT key, nbytes FROM embeddings ORDER BY last_access ASC")
+        doomed = []
+        for key, nbytes in cursor:
+            if self._total_bytes <= target:
+                break
+            doomed.append((key,))
+            self._total_bytes -= nbytes
+        conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+        logger.info(f"Evicted {len(doomed)} cached embeddings")
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current cache size."""
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_BYTES) if EMBEDDING_CACHE_ENABLED else None
+if embedding_cache is not None:
+    metrics.register_cache("embeddings", embedding_cache.get_stats)
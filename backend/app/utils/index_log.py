@@ -0,0 +1,197 @@
+#========================================
+# Imports and Initialization
+#========================================
+import asyncio
+import base64
+import fcntl
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils import vector_index
+from app.utils.search import lexical
+
+load_dotenv()
+
+logger = setup_logger("index_log")
+
+INDEX_LOG_PATH = os.getenv("INDEX_LOG_PATH", ".cache/index_log.jsonl")
+INDEX_LOG_POLL_SECONDS = float(os.getenv("INDEX_LOG_POLL_SECONDS", "10"))
+# Once a source's delta segment grows past this, rebuild it in the background
+INDEX_DELTA_REBUILD_ROWS = int(os.getenv("INDEX_DELTA_REBUILD_ROWS", "2000"))
+
+TABLE_SOURCES = {table: source for source, table in vector_index.SOURCE_TABLES.items()}
+
+#========================================
+# Append log
+#========================================
+# One JSON record per line:
+#   {"source": ..., "item": {id, title, ...}, "embedding": <base64 float32>, "ts": ...}
+# Writers take an exclusive flock per append so lines from concurrent
+# ingestion processes never interleave. Readers remember a byte offset.
+
+def publish_items(table: str, rows: List[Dict[str, Any]], embeddings: np.ndarray, path: str = INDEX_LOG_PATH) -> None:
+    """Append upserted rows and their vectors to the index log.
+
+    Args:
+        table: Item table the rows were written to
+        rows: Rows as returned by the upsert, including their ids
+        embeddings: Embedding vectors, one per row
+    """
+    source = TABLE_SOURCES.get(table)
+    if source is None or not rows:
+        return
+
+    now = time.time()
+    lines = []
+    for row, embedding in zip(rows, embeddings):
+        item = {k: v for k, v in row.items() if k != 'embedding'}
+        encoded = base64.b64encode(np.asarray(embedding, dtype=np.float32).tobytes()).decode('ascii')
+        lines.append(json.dumps({'source': source, 'item': item, 'embedding': encoded, 'ts': now}, default=str))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def log_size(path: str = INDEX_LOG_PATH) -> int:
+    """Current end offset of the log; 0 if it doesn't exist yet."""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+def read_records(offset: int, path: str = INDEX_LOG_PATH) -> Tuple[List[Dict[str, Any]], int]:
+    """Read complete records appended after offset.
+
+    Returns:
+        Tuple of (records, new offset). A trailing partial line is left for the next read.
+    """
+    size = log_size(path)
+    if size < offset:
+        logger.warning("Index log shrank, re-reading from the start")
+        offset = 0
+    if size == offset:
+        return [], offset
+
+    records = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+    end = data.rfind(b'\n') + 1
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            record['embedding'] = np.frombuffer(base64.b64decode(record['embedding']), dtype=np.float32)
+            records.append(record)
+        except (ValueError, KeyError) as e:
+            logger.error(f"Skipping malformed index log record: {e}")
+    return records, offset + end
+
+#========================================
+# Applying the log to the live index
+#========================================
+class IndexUpdater:
+    """Tails the index log and applies new rows to the in-process search indexes.
+
+    The keyword index is updated in place. For vectors, each batch produces a
+    new VectorIndex that is swapped in atomically, so queries always see a
+    consistent index. When a source's delta segment gets
+    large it is compacted on a worker thread, and updates that land meanwhile
+    are re-applied on top of the rebuilt segment before it is swapped in.
+    """
+
+    def __init__(self, offset: int, path: str = INDEX_LOG_PATH):
+        self.path = path
+        self.offset = offset
+        self.applied = 0
+        self.rebuilds = 0
+        self._rebuilding: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+
+    def apply(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        keyword_index = lexical.get_lexical_index()
+        if keyword_index is not None:
+            for record in records:
+                keyword_index.add(record['source'], [record['item']])
+
+        index = vector_index.get_vector_index()
+        if index is None:
+            self.applied += len(records)
+            return
+
+        by_source: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_source.setdefault(record['source'], []).append(record)
+
+        for source, source_records in by_source.items():
+            index = index.with_updates(
+                source,
+                [record['item'] for record in source_records],
+                np.vstack([record['embedding'] for record in source_records])
+            )
+            if source in self._rebuilding:
+                self._pending[source].extend(source_records)
+        vector_index.set_vector_index(index)
+        self.applied += len(records)
+
+        for source, source_index in index.sources.items():
+            if source_index.delta_size >= INDEX_DELTA_REBUILD_ROWS and source not in self._rebuilding:
+                self._pending[source] = []
+                self._rebuilding[source] = asyncio.create_task(self._rebuild(source, source_index))
+
+    async def _rebuild(self, source: str, source_index: vector_index.SourceIndex) -> None:
+        try:
+            started = time.perf_counter()
+            rebuilt = await asyncio.to_thread(source_index.compact)
+            pending = self._pending.get(source, [])
+            if pending:
+                rebuilt = rebuilt.with_updates(
+                    [record['item'] for record in pending],
+                    np.vstack([record['embedding'] for record in pending])
+                )
+            current = vector_index.get_vector_index()
+            if current is not None:
+                sources = dict(current.sources)
+                sources[source] = rebuilt
+                vector_index.set_vector_index(vector_index.VectorIndex(sources))
+            self.rebuilds += 1
+            logger.info(f"Rebuilt {source} index ({len(rebuilt)} rows) in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"Failed to rebuild {source} index: {e}")
+        finally:
+            self._rebuilding.pop(source, None)
+            self._pending.pop(source, None)
+
+    async def run(self) -> None:
+        """Poll the log forever, applying whatever has been appended."""
+        while True:
+            try:
+                records, self.offset = await asyncio.to_thread(read_records, self.offset, self.path)
+                if records:
+                    self.apply(records)
+                    logger.info(f"Applied {len(records)} index updates")
+            except Exception as e:
+                logger.error(f"Error applying index log: {e}")
+            await asyncio.sleep(INDEX_LOG_POLL_SECONDS)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'offset': self.offset,
+            'applied': self.applied,
+            'rebuilds': self.rebuilds,
+            'rebuilding': list(self._rebuilding),
+        }
@@ -0,0 +1,204 @@
+#========================================
+# Imports and Initialization
+#========================================
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Set
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils.ingest import pipeline
+from app.utils.ingest.pipeline import SourceJob
+from app.utils.scraper import hackernews_scraper, product_hunt_scraper
+from app.utils.scraper.browser_pool import browser_pool
+from app.utils.scraper.rate_limit import RateLimiter
+
+load_dotenv()
+
+logger = setup_logger("backfill")
+
+BACKFILL_CHECKPOINT_PATH = os.getenv("BACKFILL_CHECKPOINT_PATH", ".cache/backfill_checkpoint.jsonl")
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "2"))
+# Politeness budget: minimum seconds between two units of the same source
+BACKFILL_SOURCE_INTERVAL_SECONDS = float(os.getenv("BACKFILL_SOURCE_INTERVAL_SECONDS", "10"))
+
+#========================================
+# Sources
+#========================================
+@dataclass
+class BackfillSource:
+    """A source that can be scraped one calendar day at a time."""
+    name: str
+    table: str
+    scrape_day: Callable[[date], Awaitable[List[Dict[str, Any]]]]
+
+
+async def scrape_product_hunt_day(day: date) -> List[Dict[str, Any]]:
+    products = await product_hunt_scraper.scrape_product_hunt_daily(day.year, day.month, day.day, num_scrolls=5)
+    # The scraper logs page failures and returns nothing; a real leaderboard
+    # is never empty, so fail the unit rather than checkpoint a lost day
+    if not products:
+        raise RuntimeError(f"No Product Hunt products found for {day.isoformat()}")
+    return products
+
+async def scrape_hacker_news_day(day: date) -> List[Dict[str, Any]]:
+    start = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+    # The HN scraper is blocking, keep it off the event loop
+    return await asyncio.to_thread(hackernews_scraper.get_all_hacker_news_posts, start, start + 24 * 60 * 60)
+
+# Reddit and YC listings can't be queried by date, so the daily job is
+# the only way they are ingested
+BACKFILL_SOURCES: Dict[str, BackfillSource] = {
+    "product_hunt": BackfillSource("product_hunt", "ph_items", scrape_product_hunt_day),
+    "hacker_news": BackfillSource("hacker_news", "hn_items", scrape_hacker_news_day),
+}
+
+#========================================
+# Units and checkpointing
+#========================================
+@dataclass(frozen=True)
+class BackfillUnit:
+    """One source for one day: the granularity progress is recorded at."""
+    source: str
+    day: date
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}:{self.day.isoformat()}"
+
+
+def plan_units(start: date, end: date, sources: List[str]) -> List[BackfillUnit]:
+    """Every (source, day) in [start, end], day by day so sources interleave."""
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    return [BackfillUnit(source, day) for day in days for source in sources]
+
+
+class Checkpoint:
+    """Append-only JSON-lines record of completed units.
+
+    Each line is written and fsynced as soon as its unit finishes, so an
+    interrupted backfill loses at most the units that were in flight.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.done.add(json.loads(line)["unit"])
+                    except (ValueError, KeyError):
+                        # A line cut short by a crash; that unit simply runs again
+                        continue
+
+    def is_done(self, unit: BackfillUnit) -> bool:
+        return unit.key in self.done
+
+    def mark_done(self, unit: BackfillUnit, result: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        record = {"unit": unit.key, "finished_at": datetime.now(timezone.utc).isoformat(), **result}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.add(unit.key)
+
+#========================================
+# Running a backfill
+#========================================
+async def run_backfill(
+    start: date,
+    end: date,
+    sources: List[str],
+    concurrency: int = BACKFILL_CONCURRENCY,
+    interval: float = BACKFILL_SOURCE_INTERVAL_SECONDS,
+    checkpoint_path: str = BACKFILL_CHECKPOINT_PATH
+) -> Dict[str, Any]:
+    """Scrape, embed and upsert every source for every day in [start, end].
+
+    Units already in the checkpoint are skipped, so re-running the same
+    command after a crash resumes where it stopped. A unit is only
+    checkpointed once its scrape and all its upserts succeeded; failed units
+    are retried on the next run.
+
+    Args:
+        start: First day to backfill
+        end: Last day to backfill (inclusive)
+        sources: Names from BACKFILL_SOURCES
+        concurrency: Units processed at once
+        interval: Minimum seconds between starting two units of the same source
+        checkpoint_path: JSON-lines file of completed units
+
+    Returns:
+        Counts of completed, previously completed and failed units, and the failed unit keys
+
+    Raises:
+        ValueError: If a source can't be backfilled or the range is empty
+    """
+    unknown = [source for source in sources if source not in BACKFILL_SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown backfill sources {unknown}; choose from {sorted(BACKFILL_SOURCES)}")
+    if end < start:
+        raise ValueError(f"Backfill range is empty: {start} to {end}")
+
+    checkpoint = Checkpoint(checkpoint_path)
+    units = plan_units(start, end, sources)
+    pending = [unit for unit in units if not checkpoint.is_done(unit)]
+    logger.info(f"Backfilling {len(pending)} of {len(units)} units ({len(units) - len(pending)} already done)")
+
+    limiters = {source: RateLimiter(interval) for source in sources}
+    semaphore = asyncio.Semaphore(concurrency)
+    completed: List[str] = []
+    failed: List[str] = []
+    started = time.perf_counter()
+
+    async def run_unit(unit: BackfillUnit) -> None:
+        source = BACKFILL_SOURCES[unit.source]
+
+        async def scrape(since: float) -> List[Dict[str, Any]]:
+            return await source.scrape_day(unit.day)
+
+        async with semaphore:
+            await limiters[unit.source].wait()
+            # Past days never move the daily job's watermarks, but already
+            # stored items are still skipped before embedding
+            try:
+                stats = await pipeline.run_pipeline(
+                    [SourceJob(unit.key, source.table, scrape, windowed=False)],
+                    advance_watermarks=False,
+                    resume_staged=False
+                )
+            except Exception as e:
+                logger.error(f"{unit.key}: failed ({e!r})")
+                failed.append(unit.key)
+                return
+        result = stats['sources'][unit.key]
+        if result['error'] or result['failed']:
+            logger.error(f"{unit.key}: failed ({result['error'] or str(result['failed']) + ' rows not stored'})")
+            failed.append(unit.key)
+            return
+        if not result['scraped']:
+            logger.warning(f"{unit.key}: no items found")
+        checkpoint.mark_done(unit, {key: result[key] for key in ('scraped', 'skipped', 'duplicates', 'inserted', 'updated')})
+        completed.append(unit.key)
+        logger.info(f"{unit.key}: {result['scraped']} scraped, {result['inserted']} inserted ({len(completed)}/{len(pending)})")
+
+    try:
+        # Every day shares the pooled browser, so it starts once per backfill
+        await asyncio.gather(*(run_unit(unit) for unit in pending))
+    finally:
+        await browser_pool.close()
+
+    logger.info(f"Backfill finished in {time.perf_counter() - started:.1f}s: {len(completed)} done, {len(failed)} failed")
+    return {
+        'completed': len(completed),
+        'already_done': len(units) - len(pending),
+        'failed': len(failed),
+        'failed_units': sorted(failed),
+    }
@@ -0,0 +1,383 @@
+#========================================
+# Imports and Initialization
+#========================================
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.lib.logger import setup_logger
+from app.utils import dedup, embedding
+from app.utils.dedup import DuplicateIndex
+from app.database import items as db_items
+from app.utils.ingest import staging as staging_queue
+from app.utils.ingest import state as ingest_state
+from app.utils.ingest.staging import StagedItem, StagingQueue
+from app.utils.ingest.state import IngestState, item_key
+
+logger = setup_logger("ingest")
+
+INGEST_EMBED_BATCH_SIZE = embedding.EMBEDDING_BATCH_SIZE
+INGEST_QUEUE_BATCHES = 4         # batches buffered between stages before producers wait
+INGEST_FLUSH_SECONDS = 2.0       # embed a partial batch once scraping goes quiet this long
+INGEST_UPSERT_WORKERS = 2
+INGEST_EMBED_RETRIES = 2         # in-run retries of a failed embedding batch
+INGEST_RETRY_BACKOFF_SECONDS = 2.0
+
+#========================================
+# Jobs and stats
+#========================================
+@dataclass
+class SourceJob:
+    """One scrape to run.
+
+    The name doubles as the key of the source's watermark, so keep it stable
+    between runs. scrape is called with the epoch seconds to scrape from and
+    returns items. Sources whose created_at is not a post time (e.g. a YC
+    batch date) set windowed=False and rely on the seen-set alone.
+    """
+    name: str
+    table: str
+    scrape: Callable[[float], Awaitable[List[Dict[str, Any]]]]
+    windowed: bool = True
+
+
+@dataclass
+class StageStats:
+    items: int = 0
+    batches: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        wall = (self.finished or time.perf_counter()) - self.started if self.started else 0.0
+        return {
+            'items': self.items,
+            'batches': self.batches,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 2),
+            'wall_seconds': round(wall, 2),
+            'items_per_second': round(self.items / wall, 1) if wall else 0.0,
+        }
+
+
+@dataclass
+class PipelineStats:
+    scrape: StageStats = field(default_factory=StageStats)
+    embed: StageStats = field(default_factory=StageStats)
+    upsert: StageStats = field(default_factory=StageStats)
+    sources: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'scrape': self.scrape.as_dict(),
+            'embed': self.embed.as_dict(),
+            'upsert': self.upsert.as_dict(),
+            'sources': self.sources,
+        }
+
+#========================================
+# Pipeline
+#========================================
+async def run_pipeline(
+    jobs: List[SourceJob],
+    embed_batch_size: int = INGEST_EMBED_BATCH_SIZE,
+    queue_batches: int = INGEST_QUEUE_BATCHES,
+    upsert_workers: int = INGEST_UPSERT_WORKERS,
+    state: Optional[IngestState] = None,
+    advance_watermarks: bool = True,
+    duplicates: Optional[DuplicateIndex] = None,
+    staging: Optional[StagingQueue] = None,
+    resume_staged: bool = True
+) -> Dict[str, Any]:
+    """Scrape, embed and upsert items from several sources as one streaming pipeline.
+
+    Every job scrapes concurrently and feeds a single embed stage, which packs
+    items from all sources into batches of embed_batch_size. Embedded batches
+    are split back per table and handed to upsert workers. The queues between
+    stages are bounded, so a slow stage holds back the ones before it instead
+    of buffering everything in memory.
+
+    Each source is scraped from just before its watermark. Items outside
+    that window, and items already stored with the same content, are dropped
+    before embedding. A source's watermark only advances when its scrape and
+    every upsert succeeded, so a failed run is picked up again next time.
+
+    Near-duplicates of stored items, or of items another source produced
+    earlier in the run (e.g. one launch on HN, Product Hunt and Reddit), are
+    not embedded either. They are linked to the stored copy instead, once
+    that copy is known to be in the database.
+
+    Scraped items are committed to a durable staging queue first, and their
+    vectors once embedded. Items a failed run left behind are picked up by
+    the next run at the stage they reached, so a failed embed or upsert never
+    forces a re-scrape; items that keep failing are dead-lettered. Staged
+    items are leased to the run that holds them, so overlapping runs never
+    process the same item.
+
+    Args:
+        jobs: Sources to scrape
+        embed_batch_size: Items per embedding batch
+        queue_batches: Batches buffered between stages
+        upsert_workers: Concurrent add_items calls
+        state: Watermark and seen-set store, defaults to the shared one
+        advance_watermarks: Off for backfills of past dates, which still use the seen-set
+        duplicates: Near-duplicate index, defaults to the shared one
+        staging: Durable queue between the stages, defaults to the shared one
+        resume_staged: Claim items earlier runs left behind; off for backfills,
+            which leave them to the daily job
+
+    Returns:
+        Per-stage throughput, per-source counts and what is left in the staging queue
+
+    Raises:
+        ExceptionGroup: If a stage itself fails (rather than one batch of it);
+            the other stages are cancelled and staged items wait for the next run
+    """
+    state = state or ingest_state.ingest_state
+    duplicates = duplicates or dedup.duplicate_index
+    staging = staging or staging_queue.staging_queue
+    stats = PipelineStats()
+    newest: Dict[str, Optional[float]] = {}
+    # Items kept so far this run, and copies waiting to be linked to them
+    run_index = dedup.MinHashLSH(duplicates.threshold)
+    pending_links: List[Tuple[SourceJob, Dict[str, Any], str]] = []
+
+    def source_stats(name: str, table: str) -> Dict[str, Any]:
+        # Items resumed from an earlier run may belong to a job not in this one
+        return stats.sources.setdefault(name, {
+            'table': table, 'scraped': 0, 'skipped': 0, 'duplicates': 0, 'resumed': 0,
+            'inserted': 0, 'updated': 0, 'failed': 0, 'dead_lettered': 0, 'error': None
+        })
+
+    for job in jobs:
+        source_stats(job.name, job.table)
+    scraped: asyncio.Queue = asyncio.Queue(maxsize=embed_batch_size * queue_batches)
+    embedded: asyncio.Queue = asyncio.Queue(maxsize=queue_batches)
+
+    # Whatever an earlier run committed but didn't finish restarts from its last stage
+    owner = staging.new_owner()
+    resumed = await asyncio.to_thread(staging.claim, owner) if resume_staged else []
+    for staged in resumed:
+        source_stats(staged.job, staged.table)['resumed'] += 1
+    if resumed:
+        logger.info(f"Resuming {len(resumed)} staged items from an earlier run")
+
+    async def scrape(job: SourceJob) -> None:
+        started = time.perf_counter()
+        since = await asyncio.to_thread(state.window_start, job.name)
+        try:
+            found = await job.scrape(since)
+            if job.windowed:
+                found = [item for item in found if ingest_state.in_window(item, since)]
+            newest[job.name] = ingest_state.newest_timestamp(found)
+            fresh = await asyncio.to_thread(state.filter_unseen, found)
+            # Computed once, off the event loop, for both the stored and the in-run lookup
+            signatures = await asyncio.to_thread(lambda: [dedup.signature(item) for item in fresh])
+            matches = await asyncio.to_thread(duplicates.find_many, job.table, fresh, signatures)
+        except Exception as e:
+            logger.error(f"Scraping {job.name} failed: {e}")
+            stats.scrape.errors += 1
+            stats.sources[job.name]['error'] = str(e)
+            return
+        finally:
+            stats.scrape.busy_seconds += time.perf_counter() - started
+        stats.sources[job.name]['scraped'] = len(found)
+        stats.sources[job.name]['skipped'] = len(found) - len(fresh)
+
+        unique = []
+        for position, (item, sig) in enumerate(zip(fresh, signatures)):
+            key = item_key(item)
+            canonical = matches.get(position) or run_index.query(key, sig)
+            if canonical is not None:
+                pending_links.append((job, item, canonical))
+                continue
+            run_index.add(key, sig)
+            unique.append(item)
+        stats.sources[job.name]['duplicates'] = len(fresh) - len(unique)
+
+        # Committed before any further work, so a later failure never costs a re-scrape
+        try:
+            staged_items = await asyncio.to_thread(staging.add, owner, job.name, job.table, unique)
+        except Exception as e:
+            logger.error(f"Staging {job.name} items failed: {e}")
+            stats.scrape.errors += 1
+            stats.sources[job.name]['error'] = str(e)
+            return
+        logger.info(f"Scraped {len(found)} {job.name} items, {len(fresh)} new or changed, {len(staged_items)} staged")
+        for staged in staged_items:
+            await scraped.put(staged)
+            stats.scrape.items += 1
+
+    async def scrape_all() -> None:
+        stats.scrape.started = time.perf_counter()
+        cancelled = False
+        try:
+            for staged in resumed:
+                if staged.stage == staging_queue.SCRAPED:
+                    await scraped.put(staged)
+            async with asyncio.TaskGroup() as scrapes:
+                for job in jobs:
+                    scrapes.create_task(scrape(job))
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            stats.scrape.finished = time.perf_counter()
+            # Stop the embed stage however scraping ended. If this task was
+            # cancelled, the stages around it are being torn down as well
+            if not cancelled:
+                await scraped.put(None)
+
+    async def record_failure(batch: List[StagedItem], error: Exception) -> None:
+        # Failed items stay staged for the next run until they run out of attempts
+        by_job: Dict[str, List[int]] = {}
+        for staged in batch:
+            by_job.setdefault(staged.job, []).append(staged.id)
+        for name, ids in by_job.items():
+            stats.sources[name]['failed'] += len(ids)
+            stats.sources[name]['dead_lettered'] += await asyncio.to_thread(staging.fail, owner, ids, str(error))
+
+    async def embed_batch(batch: List[StagedItem]) -> None:
+        started = time.perf_counter()
+        try:
+            for attempt in range(INGEST_EMBED_RETRIES + 1):
+                try:
+                    vectors = np.asarray(await embedding.get_item_embeddings([staged.item for staged in batch]))
+                    break
+                except Exception as e:
+                    if attempt == INGEST_EMBED_RETRIES:
+                        raise
+                    logger.warning(f"Embedding {len(batch)} items failed, retrying: {e}")
+                    await asyncio.sleep(INGEST_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            await asyncio.to_thread(staging.mark_embedded, owner, [staged.id for staged in batch], vectors)
+        except Exception as e:
+            logger.error(f"Embedding {len(batch)} items failed: {e}")
+            stats.embed.errors += 1
+            await record_failure(batch, e)
+            return
+        finally:
+            stats.embed.busy_seconds += time.perf_counter() - started
+        stats.embed.items += len(batch)
+        stats.embed.batches += 1
+
+        for row, staged in enumerate(batch):
+            staged.embedding = vectors[row]
+        await put_embedded(batch)
+
+    async def put_embedded(batch: List[StagedItem]) -> None:
+        # Embed batches mix sources; upserts go one job (and table) at a time
+        by_job: Dict[Tuple[str, str], List[StagedItem]] = {}
+        for staged in batch:
+            by_job.setdefault((staged.job, staged.table), []).append(staged)
+        for job_batch in by_job.values():
+            await embedded.put(job_batch)
+
+    async def embed_stage() -> None:
+        stats.embed.started = time.perf_counter()
+        cancelled = False
+        try:
+            already_embedded = [staged for staged in resumed if staged.stage == staging_queue.EMBEDDED]
+            for start in range(0, len(already_embedded), embed_batch_size):
+                await put_embedded(already_embedded[start:start + embed_batch_size])
+
+            batch: List[StagedItem] = []
+            while True:
+                try:
+                    entry = await asyncio.wait_for(scraped.get(), INGEST_FLUSH_SECONDS)
+                except asyncio.TimeoutError:
+                    # Sources are still scraping; don't sit on a partial batch meanwhile
+                    if batch:
+                        await embed_batch(batch)
+                        batch = []
+                    continue
+                if entry is None:
+                    break
+                batch.append(entry)
+                if len(batch) >= embed_batch_size:
+                    await embed_batch(batch)
+                    batch = []
+            if batch:
+                await embed_batch(batch)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            stats.embed.finished = time.perf_counter()
+            if not cancelled:
+                for _ in range(upsert_workers):
+                    await embedded.put(None)
+
+    async def upsert_worker() -> None:
+        while True:
+            batch = await embedded.get()
+            if batch is None:
+                return
+            name, table = batch[0].job, batch[0].table
+            batch_items = [staged.item for staged in batch]
+            started = time.perf_counter()
+            try:
+                summary = await db_items.add_items(batch_items, np.vstack([staged.embedding for staged in batch]), table)
+                if summary['failed']:
+                    # Upserts are idempotent, so the rows that did land are simply rewritten on retry
+                    raise RuntimeError(f"{summary['failed']} rows not stored")
+            except Exception as e:
+                logger.error(f"Upserting {len(batch)} {name} items failed: {e}")
+                stats.upsert.errors += 1
+                await record_failure(batch, e)
+                continue
+            finally:
+                stats.upsert.busy_seconds += time.perf_counter() - started
+            stats.upsert.items += len(batch)
+            stats.upsert.batches += 1
+            for key in ('inserted', 'updated'):
+                stats.sources[name][key] += summary[key]
+            await asyncio.to_thread(state.mark_seen, name, batch_items)
+            await asyncio.to_thread(duplicates.add, table, batch_items)
+            await asyncio.to_thread(staging.complete, [staged.id for staged in batch])
+
+    async def upsert_stage() -> None:
+        stats.upsert.started = time.perf_counter()
+        try:
+            async with asyncio.TaskGroup() as workers:
+                for _ in range(upsert_workers):
+                    workers.create_task(upsert_worker())
+        finally:
+            stats.upsert.finished = time.perf_counter()
+
+    # A stage that raises cancels the others instead of leaving them waiting
+    # on a queue nobody feeds; whatever was staged is resumed next run
+    try:
+        async with asyncio.TaskGroup() as stages:
+            stages.create_task(scrape_all())
+            stages.create_task(embed_stage())
+            stages.create_task(upsert_stage())
+    finally:
+        # Leftovers go to the next run now rather than when the lease lapses
+        await asyncio.to_thread(staging.release, owner)
+
+    def link_duplicates() -> None:
+        for job, item, canonical in pending_links:
+            if duplicates.has(canonical):
+                duplicates.link(job.table, item, canonical)
+                state.mark_seen(job.name, [item])
+            else:
+                # The original failed to store, so the copy is left unseen and
+                # its own source's watermark held back for the next run to retry it
+                stats.sources[job.name]['failed'] += 1
+
+    await asyncio.to_thread(link_duplicates)
+
+    for job in jobs if advance_watermarks else []:
+        source = stats.sources[job.name]
+        if source['error'] or source['failed'] or newest.get(job.name) is None:
+            continue
+        await asyncio.to_thread(state.set_watermark, job.name, newest[job.name])
+
+    result = stats.as_dict()
+    result['staging'] = await asyncio.to_thread(staging.get_stats)
+    for stage in ('scrape', 'embed', 'upsert'):
+        logger.info(f"{stage}: {result[stage]}")
+    return result
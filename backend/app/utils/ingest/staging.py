@@ -0,0 +1,230 @@
+#========================================
+# Imports and Initialization
+#========================================
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils.ingest.state import item_key
+
+load_dotenv()
+
+logger = setup_logger("ingest_staging")
+
+INGEST_STAGING_PATH = os.getenv("INGEST_STAGING_PATH", ".cache/ingest_staging.sqlite3")
+# Failed embed/upsert attempts (across runs) before an item is dead-lettered
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+# How long a run owns the rows it staged or claimed; a crashed run's rows are
+# free to claim once it lapses. Well beyond the longest expected run.
+INGEST_STAGING_LEASE_SECONDS = float(os.getenv("INGEST_STAGING_LEASE_SECONDS", str(12 * 60 * 60)))
+
+SCRAPED = "scraped"
+EMBEDDED = "embedded"
+
+#========================================
+# Staged rows
+#========================================
+@dataclass
+class StagedItem:
+    id: int
+    job: str
+    table: str
+    item: Dict[str, Any]
+    stage: str
+    embedding: Optional[np.ndarray] = None
+
+#========================================
+# Disk-backed queue
+#========================================
+class StagingQueue:
+    """SQLite queue of items between the scrape, embed and upsert stages.
+
+    Scraped items are committed here before anything else happens to them.
+    An item moves from "scraped" to "embedded" (with its vector) to deleted
+    once upserted, so after a crash the next run picks every item up at the
+    last stage it finished. Items failing INGEST_MAX_ATTEMPTS times move to
+    the dead_letter table instead of being retried forever.
+
+    Runs may overlap (a backfill next to the daily job), so every row is
+    leased to the run that staged or claimed it, and only that run moves it
+    on. Rows whose lease lapsed or was released can be claimed by the next run.
+    """
+
+    def __init__(self, path: str, max_attempts: int = INGEST_MAX_ATTEMPTS, lease_seconds: float = INGEST_STAGING_LEASE_SECONDS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS staged ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, job TEXT NOT NULL, tbl TEXT NOT NULL, "
+                "key TEXT NOT NULL, item TEXT NOT NULL, stage TEXT NOT NULL, embedding BLOB, "
+                "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, updated_at REAL NOT NULL, "
+                "owner TEXT, lease_until REAL, UNIQUE (tbl, key))"
+            )
+            # Queues created before leases existed
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(staged)")}
+            for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE staged ADD COLUMN {column} {kind}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dead_letter ("
+                "id INTEGER PRIMARY KEY, job TEXT NOT NULL, tbl TEXT NOT NULL, key TEXT NOT NULL, "
+                "item TEXT NOT NULL, stage TEXT NOT NULL, attempts INTEGER NOT NULL, "
+                "error TEXT, failed_at REAL NOT NULL, UNIQUE (tbl, key))"
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def new_owner() -> str:
+        """A fresh id for one run's lease on its rows."""
+        return f"{os.getpid()}-{uuid.uuid4().hex}"
+
+    def add(self, owner: str, job: str, table: str, items: List[Dict[str, Any]]) -> List[StagedItem]:
+        """Commit scraped items, leased to owner.
+
+        Items already staged (e.g. left over from a failed run, or staged by
+        a run still in progress) or dead-lettered are not added again.
+
+        Returns:
+            The newly staged items
+        """
+        now = time.time()
+        staged = []
+        with self._lock:
+            conn = self._connect()
+            for item in items:
+                key = item_key(item)
+                if conn.execute("SELECT 1 FROM dead_letter WHERE tbl = ? AND key = ?", (table, key)).fetchone():
+                    continue
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO staged (job, tbl, key, item, stage, updated_at, owner, lease_until) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job, table, key, json.dumps(item, default=str), SCRAPED, now, owner, now + self.lease_seconds)
+                )
+                if cursor.rowcount:
+                    staged.append(StagedItem(cursor.lastrowid, job, table, item, SCRAPED))
+            conn.commit()
+        return staged
+
+    def claim(self, owner: str) -> List[StagedItem]:
+        """Lease every row no live run owns to owner, and return them oldest first.
+
+        The lease is taken in one UPDATE, so two runs claiming at once never
+        both get a row.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE staged SET owner = ?, lease_until = ? WHERE lease_until IS NULL OR lease_until < ?",
+                (owner, now + self.lease_seconds, now)
+            )
+            conn.commit()
+            rows = conn.execute(
+                "SELECT id, job, tbl, item, stage, embedding FROM staged WHERE owner = ? ORDER BY id", (owner,)
+            ).fetchall()
+        return [
+            StagedItem(row_id, job, table, json.loads(item), stage,
+                       np.frombuffer(blob, dtype=np.float32) if blob is not None else None)
+            for row_id, job, table, item, stage, blob in rows
+        ]
+
+    def release(self, owner: str) -> None:
+        """End owner's lease on the rows it leaves behind, so the next run can claim them."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE staged SET owner = NULL, lease_until = NULL WHERE owner = ?", (owner,))
+            conn.commit()
+
+    def mark_embedded(self, owner: str, ids: List[int], vectors: np.ndarray) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "UPDATE staged SET stage = ?, embedding = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                [(EMBEDDED, np.asarray(vector, dtype=np.float32).tobytes(), now, row_id, owner)
+                 for row_id, vector in zip(ids, vectors)]
+            )
+            conn.commit()
+
+    def complete(self, ids: List[int]) -> None:
+        """Drop upserted items from the queue."""
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("DELETE FROM staged WHERE id = ?", [(row_id,) for row_id in ids])
+            conn.commit()
+
+    def fail(self, owner: str, ids: List[int], error: str) -> int:
+        """Count a failed attempt for owner's items, dead-lettering the ones out of attempts.
+
+        Rows owner no longer holds (its lease lapsed and another run claimed
+        them) are left to that run, so one failure is never counted twice.
+
+        Returns:
+            Number of items moved to the dead-letter table
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "UPDATE staged SET attempts = attempts + 1, last_error = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                [(error, now, row_id, owner) for row_id in ids]
+            )
+            placeholders = ",".join("?" * len(ids))
+            doomed = conn.execute(
+                f"SELECT id, job, tbl, key, item, stage, attempts, last_error FROM staged "
+                f"WHERE id IN ({placeholders}) AND owner = ? AND attempts >= ?", [*ids, owner, self.max_attempts]
+            ).fetchall()
+            conn.executemany(
+                "INSERT OR REPLACE INTO dead_letter (id, job, tbl, key, item, stage, attempts, error, failed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*row, now) for row in doomed]
+            )
+            conn.executemany("DELETE FROM staged WHERE id = ?", [(row[0],) for row in doomed])
+            conn.commit()
+        if doomed:
+            logger.error(f"Dead-lettered {len(doomed)} items after {self.max_attempts} attempts: {error}")
+        return len(doomed)
+
+    def requeue_dead_letters(self) -> int:
+        """Move every dead-lettered item back to the start of the queue for another try."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT id, job, tbl, key, item FROM dead_letter").fetchall()
+            conn.executemany(
+                "INSERT OR IGNORE INTO staged (job, tbl, key, item, stage, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(job, table, key, item, SCRAPED, now) for _, job, table, key, item in rows]
+            )
+            conn.executemany("DELETE FROM dead_letter WHERE id = ?", [(row[0],) for row in rows])
+            conn.commit()
+        return len(rows)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connect()
+            counts = dict(conn.execute("SELECT stage, COUNT(*) FROM staged GROUP BY stage").fetchall())
+            dead = conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+        return {SCRAPED: counts.get(SCRAPED, 0), EMBEDDED: counts.get(EMBEDDED, 0), 'dead_letter': dead}
+
+
+staging_queue = StagingQueue(INGEST_STAGING_PATH)
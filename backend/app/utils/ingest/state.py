@@ -0,0 +1,172 @@
+#========================================
+# Imports and Initialization
+#========================================
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils.embedding_cache import normalize_text
+from app.utils.vector_index import parse_timestamp
+
+load_dotenv()
+
+logger = setup_logger("ingest_state")
+
+INGEST_STATE_PATH = os.getenv("INGEST_STATE_PATH", ".cache/ingest_state.sqlite3")
+# Window a source with no watermark yet (first run) starts from
+INGEST_DEFAULT_LOOKBACK_SECONDS = float(os.getenv("INGEST_DEFAULT_LOOKBACK_SECONDS", str(24 * 60 * 60)))
+# Re-read this much before the watermark so posts that show up late in a
+# listing are not missed; the seen-set drops the ones already stored
+INGEST_WATERMARK_OVERLAP_SECONDS = float(os.getenv("INGEST_WATERMARK_OVERLAP_SECONDS", str(60 * 60)))
+
+TRACKING_PARAMS = {"ref", "ref_src", "source", "fbclid", "gclid", "mc_cid", "mc_eid"}
+
+#========================================
+# Item Identity
+#========================================
+def canonical_link(url: str) -> str:
+    """Normalize a URL so the same page scraped twice maps to one key.
+
+    Lowercases scheme and host, drops "www.", fragments, tracking parameters
+    and trailing slashes, and sorts the remaining query parameters.
+    """
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower() or "https", host, path, urlencode(query), ""))
+
+def item_key(item: Dict[str, Any]) -> str:
+    """Seen-set key of an item: its canonical link, or its title if it has none."""
+    link = canonical_link(item.get("link") or "")
+    return link if urlsplit(link).netloc else f"title:{normalize_text(item.get('title') or '').lower()}"
+
+def content_hash(item: Dict[str, Any]) -> str:
+    """Hash of the fields that go into the item's embedding."""
+    fields = [
+        normalize_text(item.get("title") or ""),
+        normalize_text(item.get("description") or ""),
+        ",".join(sorted(item.get("categories") or [])),
+    ]
+    return hashlib.sha256("\x1f".join(fields).encode("utf-8")).hexdigest()
+
+#========================================
+# Disk-backed State
+#========================================
+class IngestState:
+    """SQLite store of per-source watermarks and the set of items already stored.
+
+    A watermark is the newest created_at (epoch seconds) of a source as of its
+    last successful run. The seen-set maps each item's canonical link to the
+    hash of its content when it was last upserted.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                "source TEXT PRIMARY KEY, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                "key TEXT PRIMARY KEY, content_hash TEXT NOT NULL, "
+                "source TEXT NOT NULL, seen_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get_watermark(self, source: str) -> Optional[float]:
+        """Newest created_at stored for a source, or None before its first successful run."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT created_at FROM watermarks WHERE source = ?", (source,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, source: str, created_at: float) -> None:
+        """Advance a source's watermark; it never moves backwards."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO watermarks (source, created_at, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET "
+                "created_at = MAX(created_at, excluded.created_at), updated_at = excluded.updated_at",
+                (source, created_at, time.time())
+            )
+            conn.commit()
+
+    def window_start(self, source: str, now: Optional[float] = None) -> float:
+        """Epoch seconds a run should scrape the source from."""
+        watermark = self.get_watermark(source)
+        if watermark is None:
+            return (now or time.time()) - INGEST_DEFAULT_LOOKBACK_SECONDS
+        return watermark - INGEST_WATERMARK_OVERLAP_SECONDS
+
+    def filter_unseen(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop items already stored with the same content, and repeats within the list."""
+        keyed: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for item in items:
+            keyed.setdefault(item_key(item), (content_hash(item), item))
+        if not keyed:
+            return []
+        stored: Dict[str, str] = {}
+        keys = list(keyed)
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                stored.update(conn.execute(
+                    f"SELECT key, content_hash FROM seen WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+        return [item for key, (digest, item) in keyed.items() if stored.get(key) != digest]
+
+    def mark_seen(self, source: str, items: Iterable[Dict[str, Any]]) -> None:
+        """Record items as stored; call only once they are in the database."""
+        now = time.time()
+        rows = [(item_key(item), content_hash(item), source, now) for item in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO seen (key, content_hash, source, seen_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+
+#========================================
+# Windowing
+#========================================
+def in_window(item: Dict[str, Any], start: float) -> bool:
+    """Whether an item was created at or after start. Items without a date are kept."""
+    created = parse_timestamp(item.get("created_at"))
+    return created == float("-inf") or created >= start
+
+def newest_timestamp(items: Iterable[Dict[str, Any]]) -> Optional[float]:
+    """Newest created_at among items, or None if none of them has one."""
+    newest = max((parse_timestamp(item.get("created_at")) for item in items), default=float("-inf"))
+    return None if newest == float("-inf") else newest
+
+ingest_state = IngestState(INGEST_STATE_PATH)
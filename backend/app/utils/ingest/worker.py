@@ -0,0 +1,201 @@
+#========================================
+# Imports and Initialization
+#========================================
+import asyncio
+import fcntl
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+import schedule
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+
+load_dotenv()
+
+logger = setup_logger("ingest_worker")
+
+# Where scheduled ingestion runs:
+#   "subprocess" - each API process starts a worker process next to it
+#   "external"   - the worker is deployed on its own (scripts/daily_update.py)
+#   "off"        - no scheduled ingestion
+INGEST_WORKER_MODE = os.getenv("INGEST_WORKER_MODE", "subprocess")
+INGEST_SCHEDULE_AT = os.getenv("INGEST_SCHEDULE_AT", "23:50")
+INGEST_LOCK_PATH = os.getenv("INGEST_LOCK_PATH", ".cache/ingest.lock")
+INGEST_STATUS_PATH = os.getenv("INGEST_STATUS_PATH", ".cache/ingest_status.json")
+WORKER_SCRIPT = Path(__file__).resolve().parents[3] / "scripts" / "daily_update.py"
+WORKER_STOP_TIMEOUT_SECONDS = 10.0
+# How often a worker that found the lock held checks whether it was released
+INGEST_LOCK_POLL_SECONDS = float(os.getenv("INGEST_LOCK_POLL_SECONDS", "30"))
+
+#========================================
+# Single-run lock
+#========================================
+@contextmanager
+def run_lock(path: str = INGEST_LOCK_PATH) -> Iterator[bool]:
+    """Try to take the process-wide ingestion lock without waiting.
+
+    Yields whether the lock was acquired. The lock is an flock, so it is
+    released if the holder dies mid-run. The holder also locks a marker file
+    next to it, which is what is_running probes, so a status check never
+    makes a worker find the run lock taken.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            with open(f"{path}.running", "a") as marker:
+                # Only probes share this lock, and only for an instant
+                fcntl.flock(marker, fcntl.LOCK_EX)
+                yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def is_running(path: str = INGEST_LOCK_PATH) -> bool:
+    """Whether some process currently holds the ingestion lock."""
+    marker_path = f"{path}.running"
+    if not os.path.exists(marker_path):
+        return False
+    with open(marker_path, "a") as marker:
+        try:
+            fcntl.flock(marker, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(marker, fcntl.LOCK_UN)
+        return False
+
+#========================================
+# Status reporting
+#========================================
+def read_status(path: str = INGEST_STATUS_PATH) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_status(fields: Dict[str, Any], path: str = INGEST_STATUS_PATH) -> Dict[str, Any]:
+    """Merge fields into the status file. Only the lock holder writes it."""
+    status = {**read_status(path), **fields, "updated_at": datetime.now(timezone.utc).isoformat()}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f, default=str)
+    os.replace(tmp_path, path)
+    return status
+
+def get_status() -> Dict[str, Any]:
+    """Status of the last ingestion run, as the API reports it."""
+    status = read_status()
+    running = is_running()
+    if status.get("state") == "running" and not running:
+        # The worker died without recording an outcome
+        status["state"] = "interrupted"
+    return {**status, "running": running, "mode": INGEST_WORKER_MODE, "schedule_at": INGEST_SCHEDULE_AT}
+
+#========================================
+# Running ingestion
+#========================================
+async def run_once(task: Callable[[], Awaitable[Dict[str, Any]]], run_id: str, force: bool = False) -> Optional[Dict[str, Any]]:
+    """Run task under the ingestion lock, at most once successfully per run_id.
+
+    Every worker's scheduler fires at the same time; the first to take the
+    lock runs. The others wait for it to be released and then check the
+    status again: they skip if the run succeeded, and retry it otherwise.
+
+    Args:
+        task: Coroutine function doing the ingestion, returning a summary
+        run_id: Identifies the scheduled slot, e.g. the date
+        force: Run even if run_id already succeeded
+
+    Returns:
+        The task's summary, or None if the run was skipped or failed
+    """
+    waiting = False
+    while True:
+        with run_lock() as acquired:
+            if acquired:
+                return await _run_locked(task, run_id, force)
+        if not waiting:
+            logger.info(f"Ingestion {run_id} is already running in another worker; checking again once it finishes")
+            waiting = True
+        await asyncio.sleep(INGEST_LOCK_POLL_SECONDS)
+
+async def _run_locked(task: Callable[[], Awaitable[Dict[str, Any]]], run_id: str, force: bool) -> Optional[Dict[str, Any]]:
+    # The caller holds the ingestion lock
+    status = read_status()
+    if not force and status.get("run_id") == run_id and status.get("state") == "succeeded":
+        logger.info(f"Ingestion {run_id} already succeeded")
+        return None
+
+    started = time.perf_counter()
+    write_status({
+        "state": "running",
+        "run_id": run_id,
+        "pid": os.getpid(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "finished_at": None,
+        "error": None,
+    })
+    try:
+        result = await task()
+    except Exception as e:
+        logger.error(f"Ingestion {run_id} failed: {e}")
+        write_status({
+            "state": "failed",
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "seconds": round(time.perf_counter() - started, 1),
+            "error": str(e),
+        })
+        return None
+    write_status({
+        "state": "succeeded",
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "seconds": round(time.perf_counter() - started, 1),
+        "last_succeeded_at": datetime.now(timezone.utc).isoformat(),
+        "result": result,
+    })
+    return result
+
+def run_worker(task: Callable[[], Awaitable[Dict[str, Any]]], at: str = INGEST_SCHEDULE_AT) -> None:
+    """Run task every day at the given time, in this process, forever."""
+    schedule.every().day.at(at).do(lambda: asyncio.run(run_once(task, date.today().isoformat())))
+    logger.info(f"Ingestion worker {os.getpid()} started, runs daily at {at}")
+    while True:
+        schedule.run_pending()
+        time.sleep(60)
+
+#========================================
+# Starting the worker from the API
+#========================================
+async def start_worker_process() -> Optional[asyncio.subprocess.Process]:
+    """Start the ingestion worker next to this API process, per INGEST_WORKER_MODE."""
+    if INGEST_WORKER_MODE != "subprocess":
+        logger.info(f"Ingestion worker mode is {INGEST_WORKER_MODE}; not starting one")
+        return None
+    process = await asyncio.create_subprocess_exec(sys.executable, str(WORKER_SCRIPT), cwd=str(WORKER_SCRIPT.parents[1]))
+    logger.info(f"Started ingestion worker process {process.pid}")
+    return process
+
+async def stop_worker_process(process: Optional[asyncio.subprocess.Process]) -> None:
+    if process is None or process.returncode is not None:
+        return
+    process.terminate()
+    try:
+        await asyncio.wait_for(process.wait(), WORKER_STOP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+    logger.info(f"Stopped ingestion worker process {process.pid}")
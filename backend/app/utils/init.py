@@ -8,10 +8,11 @@ import logging
 from dotenv import load_dotenv
 import asyncio
 from fastapi import FastAPI
-import schedule
 from app.lib.logger import logger
-from scripts.daily_update import update_task
 from app.database.items import get_num_items
+from app.utils import vector_index, snapshot, index_log, arxiv_mirror, arxiv
+from app.utils.search import lexical
+from app.utils.ingest import worker
 
 #========================================
 # Initializations
@@ -22,7 +23,12 @@ load_dotenv()
 asupabase = None
 supabase = None
 CURR_DB_SIZE = 0
-scheduler_task = None
+worker_process = None
+index_task = None
+mirror_task = None
+nlp_task = None
+index_updater = None
+updater_task = None
 
 # Get configuration
 supabase_url = os.getenv("SUPABASE_URL")
@@ -49,33 +55,98 @@ async def init_supabase() -> Tuple[Any, Any]:
     return asupabase, supabase
 
 
+def start_index_updater(offset: int) -> None:
+    """Start tailing the index log from offset so ingested rows become searchable."""
+    global index_updater, updater_task
+    index_updater = index_log.IndexUpdater(offset)
+    updater_task = asyncio.create_task(index_updater.run())
+
+
+async def load_vector_index() -> None:
+    """Build the in-process vector index. Searches use the RPC until it is ready."""
+    try:
+        offset = index_log.log_size()
+        client, _ = await init_supabase()
+        vector_index.set_vector_index(await vector_index.build_from_supabase(client))
+        logger.info(f"Local vector index ready: {vector_index.get_vector_index().get_stats()}")
+        if lexical.LOCAL_LEXICAL_INDEX:
+            lexical.set_lexical_index(lexical.build_from_vector_index(vector_index.get_vector_index()))
+        start_index_updater(offset)
+    except Exception as e:
+        logger.error(f"Failed to build local vector index, using Supabase RPC: {e}")
+
+
+async def load_lexical_index() -> None:
+    """Build the keyword index on its own when there is no vector index to copy it from."""
+    try:
+        offset = index_log.log_size()
+        client, _ = await init_supabase()
+        lexical.set_lexical_index(await lexical.build_from_supabase(client))
+        logger.info(f"Local keyword index ready: {lexical.get_lexical_index().get_stats()}")
+        start_index_updater(offset)
+    except Exception as e:
+        logger.error(f"Failed to build local keyword index, using Supabase filters: {e}")
+
+
+def load_index_snapshot() -> bool:
+    """Memory-map the vector index snapshot, if there is one. Returns whether it was loaded."""
+    if not snapshot.snapshot_exists(snapshot.EMBEDDING_SNAPSHOT_DIR):
+        return False
+    try:
+        # One version for both reads, even if a new snapshot is swapped in meanwhile
+        version_dir = snapshot.resolve_snapshot(snapshot.EMBEDDING_SNAPSHOT_DIR)
+        # Memory-mapped, so this is fast and shared with the other workers
+        index = snapshot.load_snapshot(version_dir)
+        offset = snapshot.read_manifest(version_dir).get("index_log_offset", 0)
+    except Exception as e:
+        logger.error(f"Failed to load vector index snapshot, falling back: {e}")
+        return False
+    vector_index.set_vector_index(index)
+    logger.info(f"Loaded vector index snapshot: {index.get_stats()}")
+    if lexical.LOCAL_LEXICAL_INDEX:
+        lexical.set_lexical_index(lexical.build_from_vector_index(index))
+    start_index_updater(offset)
+    return True
+
+
 async def lifespan(app: FastAPI):
     """FastAPI lifespan event handler for initialization and cleanup."""
-    global CURR_DB_SIZE, scheduler_task
+    global CURR_DB_SIZE, worker_process, index_task, mirror_task, nlp_task
     await init_supabase()
     CURR_DB_SIZE = await get_num_items()
     logger.info(f"Initialized DB size: {CURR_DB_SIZE}")
 
-    # Start the scheduler in a background task
-    async def run_scheduler():
-        while True:
-            schedule.run_pending()
-            await asyncio.sleep(60)
+    # A snapshot covers both indexes; without a usable one they are built from Supabase
+    if not load_index_snapshot():
+        if vector_index.LOCAL_VECTOR_INDEX:
+            index_task = asyncio.create_task(load_vector_index())
+        elif lexical.LOCAL_LEXICAL_INDEX:
+            index_task = asyncio.create_task(load_lexical_index())
 
-    schedule.every().day.at("23:50").do(lambda: asyncio.create_task(update_task()))
-    scheduler_task = asyncio.create_task(run_scheduler())
-    logger.info("Started daily update scheduler")
+    # arXiv searches use the local mirror when one has been built
+    try:
+        mirror_loaded = arxiv_mirror.load_mirror()
+    except Exception as e:
+        logger.error(f"Failed to load arXiv mirror, searching arXiv live: {e}")
+        mirror_loaded = False
+    if mirror_loaded:
+        mirror_task = asyncio.create_task(arxiv_mirror.watch_mirror())
+    elif arxiv.ARXIV_KEYWORD_EXTRACTOR == "spacy":
+        # Every arXiv search goes live and needs spaCy; load it before the first one
+        nlp_task = asyncio.create_task(arxiv.warm_up_nlp())
+
+    # Scheduled ingestion runs in its own process so scraping and embedding
+    # never block this event loop; the worker's lock makes sure only one of
+    # the API processes' workers runs it
+    worker_process = await worker.start_worker_process()
 
     yield
 
     # Cleanup
-    if scheduler_task:
-        scheduler_task.cancel()
-        try:
-            await scheduler_task
-        except asyncio.CancelledError:
-            pass
-    logger.info("Stopped daily update scheduler")
+    for task in (index_task, updater_task, mirror_task):
+        if task and not task.done():
+            task.cancel()
+    await worker.stop_worker_process(worker_process)
 
 # Initialize Supabase on module load
 asyncio.create_task(init_supabase())
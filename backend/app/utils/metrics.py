@@ -0,0 +1,119 @@
+#========================================
+# Imports and Initialization
+#========================================
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, from in-process index lookups to slow upstream APIs
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+#========================================
+# Histograms
+#========================================
+class Histogram:
+    """Prometheus-style cumulative histogram with label sets.
+
+    Only what the metrics endpoint needs: observe() and Prometheus text output.
+    """
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], Dict[str, object]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = [f'{name}="{value}"' for name, value in zip(self.label_names, key)]
+                cumulative = 0
+                for bound, count in zip(list(self.buckets) + ["+Inf"], series["counts"]):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == "+Inf" else f'le="{bound}"'
+                    lines.append(f'{self.name}_bucket{{{",".join(labels + [le])}}} {cumulative}')
+                label_str = f'{{{",".join(labels)}}}' if labels else ""
+                lines.append(f"{self.name}_sum{label_str} {series['sum']}")
+                lines.append(f"{self.name}_count{label_str} {series['count']}")
+        return lines
+
+
+search_stage_seconds = Histogram(
+    "search_stage_seconds",
+    "Time spent in each stage of the search pipeline",
+    ("stage", "source")
+)
+
+#========================================
+# Per-request timing summary
+#========================================
+# A request that wants a breakdown of its own time calls start_request_timings();
+# every timed() stage that runs in that request's context (including tasks it
+# spawns) adds its duration to the returned dict.
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_timings", default=None)
+
+def start_request_timings() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+@contextmanager
+def timed(stage: str, source: str = "") -> Iterator[None]:
+    """Time a block, recording it in the stage histogram and the request summary."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        search_stage_seconds.observe(elapsed, stage=stage, source=source)
+        timings = _request_timings.get()
+        if timings is not None:
+            name = f"{stage}:{source}" if source else stage
+            timings[name] = round(timings.get(name, 0.0) + elapsed, 4)
+
+#========================================
+# Cache statistics
+#========================================
+# Caches register a get_stats callable; hits, misses and hit ratio are
+# exported as gauges labelled with the cache name.
+_cache_stats: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+def register_cache(name: str, get_stats: Callable[[], Dict[str, float]]) -> None:
+    _cache_stats[name] = get_stats
+
+def render_cache_stats() -> List[str]:
+    lines = []
+    for metric, key, help in (
+        ("cache_hits", "hits", "Cache lookups served from the cache"),
+        ("cache_misses", "misses", "Cache lookups that had to compute the value"),
+        ("cache_hit_ratio", "hit_ratio", "Fraction of cache lookups served from the cache"),
+    ):
+        lines += [f"# HELP {metric} {help}", f"# TYPE {metric} gauge"]
+        for name, get_stats in sorted(_cache_stats.items()):
+            try:
+                value = get_stats().get(key)
+            except Exception:
+                continue
+            if value is not None:
+                lines.append(f'{metric}{{cache="{name}"}} {value}')
+    return lines
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(search_stage_seconds.render() + render_cache_stats()) + "\n"
@@ -1,75 +1,172 @@
-import arxiv
-from typing import List, Dict
-import asyncio
-from functools import lru_cache
-from datetime import datetime, timedelta
-from lib.logger import setup_logger
+import os
+import xml.etree.ElementTree as ET
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import httpx
+from app.lib.logger import setup_logger
+from app.utils import metrics
+from app.utils.cache import TTLCache
+from app.utils.scraper.rate_limit import RateLimiter
 
 logger = setup_logger("arxiv_scraper")
 ARXIV_IMAGE_URL = "https://library.stlawu.edu/sites/default/files/2020-07/arxiv-logo.png"
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
 
-@lru_cache(maxsize=1)
-def get_arxiv_client():
-    logger.debug("Creating new arXiv client")
-    return arxiv.Client(
-        page_size=100,
-        delay_seconds=3,
-        num_retries=3
-    )
+# arXiv asks clients to leave 3 seconds between API calls
+ARXIV_REQUEST_INTERVAL_SECONDS = 3.0
+ARXIV_NUM_RETRIES = 3
+ARXIV_REQUEST_TIMEOUT_SECONDS = 30.0
+
+# Same keywords, categories and window within the hour -> same papers
+ARXIV_CACHE_SIZE = 512
+ARXIV_CACHE_TTL_SECONDS = float(os.getenv("ARXIV_CACHE_TTL_SECONDS", str(60 * 60)))
+arxiv_cache = TTLCache(ARXIV_CACHE_SIZE, ARXIV_CACHE_TTL_SECONDS)
+metrics.register_cache("arxiv_api", arxiv_cache.get_stats)
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV_NS = "{http://arxiv.org/schemas/atom}"
+
+#========================================
+# Shared HTTP client and rate limiter
+#========================================
+rate_limiter = RateLimiter(ARXIV_REQUEST_INTERVAL_SECONDS)
+http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """One pooled client for every arXiv request, created on first use."""
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            timeout=ARXIV_REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+        )
+    return http_client
+
+#========================================
+# Query construction and parsing
+#========================================
+def format_arxiv_date(value: datetime) -> str:
+    return value.strftime('%Y%m%d%H%M')
+
+def build_query(nouns: List[str], arxiv_category_list: List[str], recency: Optional[int]) -> str:
+    """Build an arXiv search_query with the keyword, category and submission date filters.
+
+    Returns:
+        The query string, or "" if there are no usable keywords
+    """
+    # Deduplicated and sorted, so the same keywords in any order give the same query (and cache key)
+    keywords = sorted({noun.strip().lower() for noun in nouns if len(noun.strip()) > 2})
+    noun_query = ' AND '.join(f'abs:"{keyword}"' for keyword in keywords)
+    if not noun_query:
+        return ""
+
+    parts = ['cat:cs.*', f'({noun_query})']
+    if arxiv_category_list:
+        parts.append(f'({" OR ".join(f"cat:{category}" for category in sorted(arxiv_category_list))})')
+    if recency:
+        # Whole days, so the query (and its cache key) stays the same all day
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=recency)
+        parts.append(f'submittedDate:[{format_arxiv_date(start)} TO {format_arxiv_date(today + timedelta(days=1))}]')
+    return ' AND '.join(parts)
+
+def author_profile_url(author_name: str) -> str:
+    first_name, _, last_name = author_name.rpartition(' ')
+    if not last_name or not first_name:
+        return ""
+    return f"https://arxiv.org/search/cs?searchtype=author&query={last_name},+{first_name[0]}"
+
+def parse_feed(xml_text: str) -> List[Dict[str, str]]:
+    """Convert an arXiv Atom feed into item dicts."""
+    papers = []
+    for entry in ET.fromstring(xml_text).findall(f'{ATOM}entry'):
+        entry_id = entry.findtext(f'{ATOM}id', '').strip()
+        if not entry_id:
+            continue
+        pdf_url = next(
+            (link.get('href') for link in entry.findall(f'{ATOM}link') if link.get('title') == 'pdf'),
+            entry_id.replace('/abs/', '/pdf/')
+        )
+        authors = [author.findtext(f'{ATOM}name', '').strip() for author in entry.findall(f'{ATOM}author')]
+        author_name = authors[0] if authors else ''
+        published = entry.findtext(f'{ATOM}published', '').strip()
+        papers.append({
+            'id': entry_id.rsplit('/abs/', 1)[-1].rsplit('v', 1)[0],
+            'title': ' '.join(entry.findtext(f'{ATOM}title', '').split()),
+            'description': ' '.join(entry.findtext(f'{ATOM}summary', '').split()),
+            'link': pdf_url,
+            'source': 'arxiv',
+            'source_link': entry_id,
+            'image_url': ARXIV_IMAGE_URL,
+            'author_name': author_name,
+            'author_profile_url': author_profile_url(author_name),
+            'created_at': datetime.fromisoformat(published.replace('Z', '+00:00')).isoformat() if published else '',
+            'categories': [category.get('term') for category in entry.findall(f'{ATOM}category') if category.get('term')],
+        })
+    return papers
+
+#========================================
+# Fetching
+#========================================
+async def fetch_papers(search_query: str, max_results: int, start: int = 0) -> List[Dict[str, str]]:
+    """Run one arXiv API query, newest submissions first, from result offset start.
+
+    Requests go through the shared rate limiter and are retried on 429/5xx,
+    connection errors and timeouts.
+
+    Raises:
+        httpx.HTTPError: If the request still fails after the retries
+    """
+    params = {
+        'search_query': search_query,
+        'start': start,
+        'max_results': max_results,
+        'sortBy': 'submittedDate',
+        'sortOrder': 'descending',
+    }
+    client = get_http_client()
+    for attempt in range(ARXIV_NUM_RETRIES + 1):
+        await rate_limiter.wait()
+        try:
+            response = await client.get(ARXIV_API_URL, params=params)
+        except httpx.TransportError as e:
+            # Timeouts are transport errors too
+            if attempt < ARXIV_NUM_RETRIES:
+                logger.warning(f"arXiv API request failed ({type(e).__name__}: {e}), retrying")
+                continue
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            if attempt < ARXIV_NUM_RETRIES:
+                logger.warning(f"arXiv API returned {response.status_code}, retrying")
+                continue
+        response.raise_for_status()
+        return parse_feed(response.text)
+    return []
 
 async def search_papers(nouns: List[str],  arxiv_category_list: List[str],num_results: int, recency: int) -> List[Dict[str, str]]:
     """
     Search for papers on arXiv that contain all the given nouns in their abstract
     Returns a list of papers with title, description (abstract), and link
+
+    The recency window is part of the query, so arXiv only returns papers
+    inside it. Parsed results are cached by query string for
+    ARXIV_CACHE_TTL_SECONDS.
     """
     try:
-        # Optimize query construction
-        noun_query = ' AND '.join(f'abs:"{noun.lower()}"' for noun in nouns if len(noun) > 2)
-        if not noun_query:
+        search_query = build_query(nouns, arxiv_category_list, recency)
+        if not search_query:
             logger.debug("No valid nouns provided for arXiv search")
             return []
 
-        search_query = f'cat:cs.* AND ({noun_query})'
-
-        if arxiv_category_list:
-            search_query = f'cat:cs.* AND ({noun_query}) AND cat:{" OR ".join(arxiv_category_list)}'
-            logger.debug(f"Searching arXiv with categories: {arxiv_category_list}")
-
         logger.info(f"Executing arXiv search with query: {search_query}")
-        client = get_arxiv_client()
-        search = arxiv.Search(
-            query=search_query,
-            max_results=num_results,
-            sort_by=arxiv.SortCriterion.SubmittedDate,
-            sort_order=arxiv.SortOrder.Descending
+        papers = await arxiv_cache.get_or_create(
+            (search_query, num_results),
+            lambda: fetch_papers(search_query, num_results)
         )
 
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(None, lambda: list(client.results(search)))
-        logger.debug(f"Retrieved {len(results)} initial results from arXiv")
-
-        # Filter results by recency - convert to naive datetime for comparison
-        cutoff_date = datetime.now() - timedelta(days=recency)
-        results = [paper for paper in results if paper.published.replace(tzinfo=None) >= cutoff_date]
-        logger.debug(f"Filtered to {len(results)} results within {recency} days")
-
-        papers = [
-            {
-                'title': paper.title,
-                'description': paper.summary,
-                'link': paper.pdf_url,
-                'source': 'arxiv',
-                'source_link': paper.entry_id,
-                'image_url': ARXIV_IMAGE_URL,
-                'author_name': paper.authors[0].name,
-                'author_profile_url': f"https://arxiv.org/search/cs?searchtype=author&query={paper.authors[0].name.split(' ')[1]},+{paper.authors[0].name.split(' ')[0][0]}",
-                'created_at': paper.published.isoformat()
-            }
-            for paper in results
-        ]
-
         logger.info(f"Successfully processed {len(papers)} arXiv papers")
-        return papers
+        # Callers annotate the dicts (e.g. with similarity), so hand out copies
+        return [dict(paper) for paper in papers]
 
     except Exception as e:
         logger.error(f"Error searching arXiv: {str(e)}", exc_info=True)
@@ -0,0 +1,246 @@
+#========================================
+# Imports and Initialization
+#========================================
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+from playwright.async_api import async_playwright
+from app.lib.logger import setup_logger
+
+load_dotenv()
+
+logger = setup_logger("browser_pool")
+
+# Pages open at once against one host, unless overridden per host as
+# "www.producthunt.com=5,www.ycombinator.com=3"
+BROWSER_POOL_PAGES_PER_DOMAIN = int(os.getenv("BROWSER_POOL_PAGES_PER_DOMAIN", "5"))
+BROWSER_POOL_DOMAIN_LIMITS = os.getenv("BROWSER_POOL_DOMAIN_LIMITS", "")
+BROWSER_POOL_MAX_IDLE_PAGES = int(os.getenv("BROWSER_POOL_MAX_IDLE_PAGES", "10"))
+BROWSER_POOL_PAGE_MAX_USES = 50          # recycle a page after this many checkouts to bound its memory
+BROWSER_POOL_HEALTH_CHECK_SECONDS = 60.0
+BROWSER_POOL_HEALTH_CHECK_TIMEOUT_SECONDS = 10.0
+# How long a relaunch waits for pages still checked out of an unhealthy but connected browser
+BROWSER_POOL_DRAIN_TIMEOUT_SECONDS = 60.0
+
+def parse_domain_limits(value: str) -> Dict[str, int]:
+    limits = {}
+    for entry in value.split(","):
+        host, _, limit = entry.partition("=")
+        if host.strip() and limit.strip():
+            limits[host.strip().lower()] = int(limit)
+    return limits
+
+#========================================
+# Browser pool
+#========================================
+class BrowserPool:
+    """One warm headless Chromium shared by every scraper in the process.
+
+    Pages are checked out with page(url) and go back to an idle list
+    afterwards instead of being closed, so neither the browser nor a tab is
+    started per product. Concurrency is limited per host. The browser is
+    health-checked periodically and relaunched if it crashed or stopped
+    responding. A browser that is still connected is only closed once the
+    pages checked out of it are back (or after a timeout); pages of a
+    replaced browser are closed when released, never pooled.
+
+    Playwright objects belong to the event loop that created them; callers
+    that run their own loop (the daily job, a backfill) close the pool when
+    they are done.
+    """
+
+    def __init__(self, pages_per_domain: int, domain_limits: Dict[str, int], max_idle_pages: int, page_max_uses: int):
+        self.pages_per_domain = pages_per_domain
+        self.domain_limits = domain_limits
+        self.max_idle_pages = max_idle_pages
+        self.page_max_uses = page_max_uses
+        self.launches = 0
+        self.pages_created = 0
+        self.pages_reused = 0
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._idle: List[Any] = []
+        # Uses of every page of the current browser; a page missing here
+        # belongs to a browser that has since been replaced
+        self._uses: Dict[Any, int] = {}
+        self._checked_out = 0
+        self._drained: Optional[asyncio.Event] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._last_health_check = 0.0
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A previous loop's browser can't be driven from this one
+            if self._browser is not None:
+                logger.warning("Browser pool used from a new event loop without close(); starting a new browser")
+            self._playwright = self._browser = self._context = None
+            self._idle, self._uses, self._semaphores = [], {}, {}
+            self._checked_out = 0
+            self._start_lock = asyncio.Lock()
+            self._drained = asyncio.Event()
+            self._drained.set()
+            self._loop = loop
+
+    def _domain_semaphore(self, url: Optional[str]) -> asyncio.Semaphore:
+        host = urlsplit(url or "").netloc.lower()
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.domain_limits.get(host, self.pages_per_domain))
+        return self._semaphores[host]
+
+    async def _launch(self) -> None:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._context = await self._browser.new_context()
+        self._idle, self._uses = [], {}
+        self._checked_out = 0
+        self._drained.set()
+        self.launches += 1
+        self._last_health_check = time.monotonic()
+        logger.info("Launched pooled Chromium")
+
+    async def _is_healthy(self) -> bool:
+        if self._browser is None or not self._browser.is_connected():
+            return False
+        try:
+            page = await self._context.new_page()
+            try:
+                await asyncio.wait_for(page.evaluate("1 + 1"), BROWSER_POOL_HEALTH_CHECK_TIMEOUT_SECONDS)
+            finally:
+                await page.close()
+            return True
+        except Exception as e:
+            logger.error(f"Browser health check failed: {e}")
+            return False
+
+    async def _ensure_browser(self) -> None:
+        self._bind_loop()
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                if time.monotonic() - self._last_health_check < BROWSER_POOL_HEALTH_CHECK_SECONDS:
+                    return
+                self._last_health_check = time.monotonic()
+                if await self._is_healthy():
+                    return
+            if self._browser is not None:
+                logger.warning("Relaunching unhealthy browser")
+                if self._browser.is_connected() and self._checked_out:
+                    # Let in-flight work finish; no new pages are handed out meanwhile
+                    try:
+                        await asyncio.wait_for(self._drained.wait(), BROWSER_POOL_DRAIN_TIMEOUT_SECONDS)
+                    except asyncio.TimeoutError:
+                        logger.warning(f"Closing browser with {self._checked_out} pages still checked out")
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+            await self._launch()
+
+    async def _acquire(self) -> Any:
+        await self._ensure_browser()
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                self.pages_reused += 1
+                self._check_out()
+                return page
+            self._uses.pop(page, None)
+        page = await self._context.new_page()
+        self._uses[page] = 0
+        self.pages_created += 1
+        self._check_out()
+        return page
+
+    def _check_out(self) -> None:
+        self._checked_out += 1
+        self._drained.clear()
+
+    async def _release(self, page: Any, reusable: bool) -> None:
+        if page not in self._uses:
+            # Its browser was replaced while the page was checked out
+            try:
+                await page.close()
+            except Exception:
+                pass
+            return
+        self._checked_out -= 1
+        if not self._checked_out:
+            self._drained.set()
+        self._uses[page] += 1
+        if reusable and not page.is_closed() and self._uses[page] < self.page_max_uses and len(self._idle) < self.max_idle_pages:
+            try:
+                # Drop the previous site's scripts and memory before the page is reused
+                await page.goto("about:blank")
+                self._idle.append(page)
+                return
+            except Exception:
+                pass
+        self._uses.pop(page, None)
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def page(self, url: Optional[str] = None) -> AsyncIterator[Any]:
+        """Check out a page, waiting for a free slot on url's host.
+
+        A page whose work raised is closed rather than reused.
+        """
+        self._bind_loop()
+        async with self._domain_semaphore(url):
+            page = await self._acquire()
+            reusable = False
+            try:
+                yield page
+                reusable = True
+            finally:
+                await self._release(page, reusable)
+
+    async def close(self) -> None:
+        """Close every page, the browser and Playwright itself."""
+        if self._loop is not asyncio.get_running_loop():
+            self._playwright = self._browser = self._context = None
+            return
+        for page in self._idle:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self._idle, self._uses = [], {}
+        self._checked_out = 0
+        self._drained.set()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.error(f"Error closing browser: {e}")
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._playwright = self._browser = self._context = None
+        logger.info(f"Closed browser pool: {self.get_stats()}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'launches': self.launches,
+            'pages_created': self.pages_created,
+            'pages_reused': self.pages_reused,
+            'idle_pages': len(self._idle),
+            'connected': bool(self._browser is not None and self._browser.is_connected()),
+        }
+
+
+browser_pool = BrowserPool(
+    BROWSER_POOL_PAGES_PER_DOMAIN,
+    parse_domain_limits(BROWSER_POOL_DOMAIN_LIMITS),
+    BROWSER_POOL_MAX_IDLE_PAGES,
+    BROWSER_POOL_PAGE_MAX_USES
+)
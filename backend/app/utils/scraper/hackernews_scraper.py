@@ -1,5 +1,5 @@
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import html
 import re
 from datetime import datetime
@@ -15,59 +15,90 @@ def clean_html_text(text: str) -> str:
     text = re.sub(r'<[^>]+>', '', text)
     return text.strip()
 
-def get_hacker_news_posts(limit: int = 200) -> List[Dict[str, Any]]:
+HACKER_NEWS_API_URL = "https://hn.algolia.com/api/v1"
+HACKER_NEWS_MAX_PAGE_SIZE = 1000  # Algolia's hitsPerPage cap
 
-    base_url = "https://hn.algolia.com/api/v1"
+def fetch_hits(limit: int, created_after: Optional[int] = None, created_before: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Raw Algolia hits for the newest "Show HN" stories created in [created_after, created_before)."""
+    numeric_filters = ['points>=0']  # Include all posts regardless of points
+    if created_after is not None:
+        numeric_filters.append(f'created_at_i>={created_after}')
+    if created_before is not None:
+        numeric_filters.append(f'created_at_i<{created_before}')
 
-    try:
-        # Query for "Show HN" posts using search_by_date endpoint
-        query_params = {
-            'query': '"Show HN"',
-            'tags': 'story',
-            'numericFilters': 'points>=0',  # Include all posts regardless of points
-            'hitsPerPage': limit
-        }
+    # Query for "Show HN" posts using search_by_date endpoint
+    query_params = {
+        'query': '"Show HN"',
+        'tags': 'story',
+        'numericFilters': ','.join(numeric_filters),
+        'hitsPerPage': limit
+    }
 
-        response = requests.get(
-            f"{base_url}/search_by_date",  # Changed endpoint to search_by_date
-            params=query_params
-        )
-        response.raise_for_status()
+    response = requests.get(
+        f"{HACKER_NEWS_API_URL}/search_by_date",  # Changed endpoint to search_by_date
+        params=query_params
+    )
+    response.raise_for_status()
+    return response.json().get('hits', [])
 
-        data = response.json()
-        posts = data.get('hits', [])
+def process_hits(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    processed_posts = []
+    for post in posts:
+        # Skip posts without titles or URLs
+        if not post.get('title') or not post.get('url'):
+            continue
 
-        processed_posts = []
-        for post in posts:
-            # Skip posts without titles or URLs
-            if not post.get('title') or not post.get('url'):
-                continue
+        title = post['title']
+        # Remove "Show HN:" from the title
+        clean_title = title.replace('Show HN:', '').replace('Show HN -', '').strip()
 
-            title = post['title']
-            # Remove "Show HN:" from the title
-            clean_title = title.replace('Show HN:', '').replace('Show HN -', '').strip()
+        description = post.get('story_text', '')
+        clean_description = clean_html_text(description)
 
-            description = post.get('story_text', '')
-            clean_description = clean_html_text(description)
+        # Convert Unix timestamp to ISO8601
+        created_at = datetime.fromtimestamp(post['created_at_i']).isoformat()
 
-            # Convert Unix timestamp to ISO8601
-            created_at = datetime.fromtimestamp(post['created_at_i']).isoformat()
+        processed_post = {
+            'title': clean_title,
+            'description': clean_description,  # Use cleaned description if available, otherwise use title
+            'link': post['url'],
+            'source': 'hacker_news',
+            'source_link': f'https://news.ycombinator.com/item?id={post["objectID"]}',
+            'image_url': HACKER_NEWS_IMAGE_URL,
+            'author_name': post.get('author', ''),
+            'author_profile_url': f"https://news.ycombinator.com/user?id={post['author']}",
+            'created_at': created_at,  # Add created_at field
+        }
+        processed_posts.append(processed_post)
+    return processed_posts
 
-            processed_post = {
-                'title': clean_title,
-                'description': clean_description,  # Use cleaned description if available, otherwise use title
-                'link': post['url'],
-                'source': 'hacker_news',
-                'source_link': f'https://news.ycombinator.com/item?id={post["objectID"]}',
-                'image_url': HACKER_NEWS_IMAGE_URL,
-                'author_name': post.get('author', ''),
-                'author_profile_url': f"https://news.ycombinator.com/user?id={post['author']}",
-                'created_at': created_at,  # Add created_at field
-            }
-            processed_posts.append(processed_post)
+def get_hacker_news_posts(limit: int = 200, created_after: Optional[int] = None, created_before: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Newest "Show HN" stories, optionally only those created in [created_after, created_before) (epoch seconds)."""
+    try:
+        return process_hits(fetch_hits(limit, created_after, created_before))
+    except requests.RequestException as e:
+        raise Exception(f"Failed to fetch HackerNews posts: {str(e)}")
+    except (KeyError, ValueError) as e:
+        raise Exception(f"Failed to process HackerNews posts: {str(e)}")
 
-        return processed_posts
+def get_all_hacker_news_posts(created_after: int, created_before: Optional[int] = None, page_size: int = HACKER_NEWS_MAX_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """Every "Show HN" story created in [created_after, created_before), however many there are.
 
+    Pages back from the newest story, each page ending just after the oldest
+    one of the page before, so a busy window is never cut off at page_size.
+    """
+    try:
+        hits: Dict[str, Dict[str, Any]] = {}
+        before = created_before
+        while True:
+            page = fetch_hits(page_size, created_after, before)
+            new = [hit for hit in page if hit['objectID'] not in hits]
+            hits.update((hit['objectID'], hit) for hit in new)
+            if len(page) < page_size or not new:
+                break
+            # Stories posted in the same second as the page's oldest are fetched again and deduplicated
+            before = min(hit['created_at_i'] for hit in page) + 1
+        return process_hits(list(hits.values()))
     except requests.RequestException as e:
         raise Exception(f"Failed to fetch HackerNews posts: {str(e)}")
     except (KeyError, ValueError) as e:
@@ -1,10 +1,9 @@
 from bs4 import BeautifulSoup
 from typing import List, Dict
 import logging
-from playwright.async_api import async_playwright
 import asyncio
-from asyncio import Semaphore
 from datetime import datetime
+from app.utils.scraper.browser_pool import browser_pool
 
 PRODUCT_HUNT_IMAGE_URL = "https://cdn.freebiesupply.com/logos/large/2x/product-hunt-logo-png-transparent.png"
 
@@ -61,16 +60,9 @@ async def scrape_product_hunt_monthly(year: int, month: int, num_scrolls: int =
     try:
         url = f"https://www.producthunt.com/leaderboard/monthly/{year}/{month}"
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-
-            # Create a semaphore to limit concurrent page operations
-            semaphore = Semaphore(5)  # Limit to 5 concurrent requests
-
-            # Create a context that will be shared among pages
-            context = await browser.new_context()
-            main_page = await context.new_page()
-
+        # Pages come from the shared browser pool, which also caps how many
+        # are open against Product Hunt at once
+        async with browser_pool.page(url) as main_page:
             # Fetch main page content
             await main_page.goto(url)
             for _ in range(num_scrolls):
@@ -78,66 +70,63 @@ async def scrape_product_hunt_monthly(year: int, month: int, num_scrolls: int =
                 await main_page.wait_for_timeout(2000)
 
             html = await main_page.content()
-            # Add debug logging
-            logging.debug(f"Page HTML: {html[:1000]}")  # Print first 1000 chars for debugging
-            soup = BeautifulSoup(html, 'html.parser')
-            products = []
-
-            # Try both old and new selectors
-            product_sections = soup.find_all('section', attrs={'data-test': lambda x: x and x.startswith('post-item-')})
-            if not product_sections:
-                # Try alternative selector for product items
-                product_sections = soup.find_all('div', {'class': lambda x: x and 'cursor-pointer' in x and 'rounded-xl' in x})
-                logging.info(f"Found {len(product_sections)} products using alternative selector")
-
-            async def process_product(section):
-                try:
-                    title_link = section.find('a', attrs={'data-test': lambda x: x and x.startswith('post-name-')})
-                    title = title_link.get_text(strip=True).rstrip()
-                    logging.info(f"Processing {title}")
-                    link = 'https://www.producthunt.com' + title_link['href']
-
-                    img_tag = section.find('img')
-                    image_url = img_tag['src'] if img_tag else None
-
-                    # Fetch additional details with semaphore
-                    async with semaphore:
-                        product_page = await context.new_page()
-                        additional_details = await fetch_additional_details(product_page, link)
-                        await product_page.close()
-
-                    # Find the post date
-                    date_element = section.find('span', attrs={'data-test': lambda x: x and x.startswith('post-date-')})
-
-                    # Get short description as fallback if long description is not available
-                    short_description = section.find('a', {'class': 'text-secondary'}).get_text(strip=True)
-
-                    product = {
-                        "title": title,
-                        "description": additional_details['description'] or short_description,  # Use long description if available, otherwise use short
-                        "link": link,
-                        "source": "product_hunt",
-                        "source_link": url,
-                        "image_url": image_url or PRODUCT_HUNT_IMAGE_URL,
-                        "author_name": additional_details['author_name'],
-                        "author_profile_url": additional_details['author_profile_url'],
-                        "categories": additional_details['categories'],
-                        "created_at": None,
-                    }
-                    return product
-                except Exception as e:
-                    logging.error(f"Error processing product section: {e}")
-                    return None
-
-            # Process all products in parallel
-            tasks = [process_product(section) for section in product_sections]
-            results = await asyncio.gather(*tasks)
-
-            # Filter out None results from errors
-            products = [p for p in results if p is not None]
-
-            await browser.close()
-            return products
+
+        # Add debug logging
+        logging.debug(f"Page HTML: {html[:1000]}")  # Print first 1000 chars for debugging
+        soup = BeautifulSoup(html, 'html.parser')
+        products = []
+
+        # Try both old and new selectors
+        product_sections = soup.find_all('section', attrs={'data-test': lambda x: x and x.startswith('post-item-')})
+        if not product_sections:
+            # Try alternative selector for product items
+            product_sections = soup.find_all('div', {'class': lambda x: x and 'cursor-pointer' in x and 'rounded-xl' in x})
+            logging.info(f"Found {len(product_sections)} products using alternative selector")
+
+        async def process_product(section):
+            try:
+                title_link = section.find('a', attrs={'data-test': lambda x: x and x.startswith('post-name-')})
+                title = title_link.get_text(strip=True).rstrip()
+                logging.info(f"Processing {title}")
+                link = 'https://www.producthunt.com' + title_link['href']
+
+                img_tag = section.find('img')
+                image_url = img_tag['src'] if img_tag else None
+
+                async with browser_pool.page(link) as product_page:
+                    additional_details = await fetch_additional_details(product_page, link)
+
+                # Find the post date
+                date_element = section.find('span', attrs={'data-test': lambda x: x and x.startswith('post-date-')})
+
+                # Get short description as fallback if long description is not available
+                short_description = section.find('a', {'class': 'text-secondary'}).get_text(strip=True)
+
+                product = {
+                    "title": title,
+                    "description": additional_details['description'] or short_description,  # Use long description if available, otherwise use short
+                    "link": link,
+                    "source": "product_hunt",
+                    "source_link": url,
+                    "image_url": image_url or PRODUCT_HUNT_IMAGE_URL,
+                    "author_name": additional_details['author_name'],
+                    "author_profile_url": additional_details['author_profile_url'],
+                    "categories": additional_details['categories'],
+                    "created_at": None,
+                }
+                return product
+            except Exception as e:
+                logging.error(f"Error processing product section: {e}")
+                return None
+
+        # Process all products in parallel
+        tasks = [process_product(section) for section in product_sections]
+        results = await asyncio.gather(*tasks)
+
+        # Filter out None results from errors
+        products = [p for p in results if p is not None]
+
+        return products
 
     except Exception as e:
         logging.error(f"Error scraping Product Hunt monthly page: {e}")
@@ -147,16 +136,9 @@ async def scrape_product_hunt_daily(year: int, month: int, day: int, num_scrolls
     try:
         url = f"https://www.producthunt.com/leaderboard/daily/{year}/{month}/{day}/all"
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-
-            # Create a semaphore to limit concurrent page operations
-            semaphore = Semaphore(5)  # Limit to 5 concurrent requests
-
-            # Create a context that will be shared among pages
-            context = await browser.new_context()
-            main_page = await context.new_page()
-
+        # Pages come from the shared browser pool, which also caps how many
+        # are open against Product Hunt at once
+        async with browser_pool.page(url) as main_page:
             # Fetch main page content
             await main_page.goto(url)
             for _ in range(num_scrolls):
@@ -164,59 +146,56 @@ async def scrape_product_hunt_daily(year: int, month: int, day: int, num_scrolls
                 await main_page.wait_for_timeout(2000)
 
             html = await main_page.content()
-            soup = BeautifulSoup(html, 'html.parser')
-            products = []
-
-            product_sections = soup.find_all('section', attrs={'data-test': lambda x: x and x.startswith('post-item-')})
-
-            async def process_product(section):
-                try:
-                    title_link = section.find('a', attrs={'data-test': lambda x: x and x.startswith('post-name-')})
-                    title = title_link.get_text(strip=True).rstrip()
-                    logging.info(f"Processing {title}")
-                    link = 'https://www.producthunt.com' + title_link['href']
-
-                    img_tag = section.find('img')
-                    image_url = img_tag['src'] if img_tag else None
-
-                    # Fetch additional details with semaphore
-                    async with semaphore:
-                        product_page = await context.new_page()
-                        additional_details = await fetch_additional_details(product_page, link)
-                        await product_page.close()
-
-                    # Create datetime object for the specific day
-                    created_at = datetime(year, month, day).isoformat()
-
-                    # Get short description as fallback if long description is not available
-                    short_description = section.find('a', {'class': 'text-secondary'}).get_text(strip=True)
-
-                    product = {
-                        "title": title,
-                        "description": additional_details['description'] or short_description,
-                        "link": link,
-                        "source": "product_hunt",
-                        "source_link": url,
-                        "image_url": image_url or PRODUCT_HUNT_IMAGE_URL,
-                        "author_name": additional_details['author_name'],
-                        "author_profile_url": additional_details['author_profile_url'],
-                        "categories": additional_details['categories'],
-                        "created_at": created_at,
-                    }
-                    return product
-                except Exception as e:
-                    logging.error(f"Error processing product section: {e}")
-                    return None
-
-            # Process all products in parallel
-            tasks = [process_product(section) for section in product_sections]
-            results = await asyncio.gather(*tasks)
-
-            # Filter out None results from errors
-            products = [p for p in results if p is not None]
-
-            await browser.close()
-            return products
+
+        soup = BeautifulSoup(html, 'html.parser')
+        products = []
+
+        product_sections = soup.find_all('section', attrs={'data-test': lambda x: x and x.startswith('post-item-')})
+
+        async def process_product(section):
+            try:
+                title_link = section.find('a', attrs={'data-test': lambda x: x and x.startswith('post-name-')})
+                title = title_link.get_text(strip=True).rstrip()
+                logging.info(f"Processing {title}")
+                link = 'https://www.producthunt.com' + title_link['href']
+
+                img_tag = section.find('img')
+                image_url = img_tag['src'] if img_tag else None
+
+                async with browser_pool.page(link) as product_page:
+                    additional_details = await fetch_additional_details(product_page, link)
+
+                # Create datetime object for the specific day
+                created_at = datetime(year, month, day).isoformat()
+
+                # Get short description as fallback if long description is not available
+                short_description = section.find('a', {'class': 'text-secondary'}).get_text(strip=True)
+
+                product = {
+                    "title": title,
+                    "description": additional_details['description'] or short_description,
+                    "link": link,
+                    "source": "product_hunt",
+                    "source_link": url,
+                    "image_url": image_url or PRODUCT_HUNT_IMAGE_URL,
+                    "author_name": additional_details['author_name'],
+                    "author_profile_url": additional_details['author_profile_url'],
+                    "categories": additional_details['categories'],
+                    "created_at": created_at,
+                }
+                return product
+            except Exception as e:
+                logging.error(f"Error processing product section: {e}")
+                return None
+
+        # Process all products in parallel
+        tasks = [process_product(section) for section in product_sections]
+        results = await asyncio.gather(*tasks)
+
+        # Filter out None results from errors
+        products = [p for p in results if p is not None]
+
+        return products
 
     except Exception as e:
         logging.error(f"Error scraping Product Hunt daily page: {e}")
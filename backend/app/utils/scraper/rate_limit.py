@@ -0,0 +1,23 @@
+#========================================
+# Imports and Initialization
+#========================================
+import asyncio
+import time
+
+#========================================
+# Rate limiting
+#========================================
+class RateLimiter:
+    """Space calls at least min_interval seconds apart across all callers in the process."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._last_call = 0.0
+
+    async def wait(self) -> None:
+        async with self._lock:
+            delay = self._last_call + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_call = time.monotonic()
@@ -99,7 +99,7 @@
 #     return len(posts)
 
 import asyncpraw
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 from dotenv import load_dotenv
 import asyncio
@@ -110,9 +110,13 @@ REDDIT_IMAGE_URL = "https://static-00.iconduck.com/assets.00/reddit-icon-512x512
 
 
 
-async def get_reddit_posts(subreddit: str, limit: int = 200) -> List[Dict]:
+async def get_reddit_posts(subreddit: str, limit: int = 200, created_after: Optional[float] = None) -> List[Dict]:
     """
     Fetch the 200 most recent posts from r/sideproject subreddit
+
+    With created_after (epoch seconds), limit is ignored and listing pages are
+    followed until a post older than created_after appears, so every newer post
+    is returned (up to the ~1000 posts Reddit lists).
     """
     reddit = asyncpraw.Reddit(
         client_id=os.getenv('REDDIT_CLIENT_ID'),
@@ -123,7 +127,9 @@ async def get_reddit_posts(subreddit: str, limit: int = 200) -> List[Dict]:
     subreddit = await reddit.subreddit(subreddit)
     posts = []
 
-    async for submission in subreddit.new(limit=limit):
+    async for submission in subreddit.new(limit=None if created_after is not None else limit):
+        if created_after is not None and submission.created_utc < created_after:
+            break
         post = {
             'title': submission.title,
             'description': submission.selftext,
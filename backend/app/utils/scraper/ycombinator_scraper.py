@@ -1,11 +1,10 @@
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any
 import logging
-from playwright.async_api import async_playwright
 import asyncio
-from asyncio import Semaphore
 from datetime import datetime
 import re
+from app.utils.scraper.browser_pool import browser_pool
 
 def get_batch_timestamp(batch_tag: str) -> str:
     """Convert YC batch code to ISO8601 timestamp
@@ -135,15 +134,10 @@ async def scrape_yc_companies(num_companies: int = 100, num_scrolls: int = 5, ur
     """Scrape YC companies and their details"""
     try:
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-
-            # Create a semaphore to limit concurrent page operations
-            semaphore = Semaphore(5)  # Limit to 5 concurrent requests
-
+        # Pages come from the shared browser pool, which also caps how many
+        # are open against ycombinator.com at once
+        async with browser_pool.page(url) as main_page:
             # Fetch main companies page
-            main_page = await context.new_page()
             await main_page.goto(url)
 
             # Scroll to load more companies
@@ -152,51 +146,48 @@ async def scrape_yc_companies(num_companies: int = 100, num_scrolls: int = 5, ur
                 await main_page.wait_for_timeout(2000)
 
             html = await main_page.content()
-            soup = BeautifulSoup(html, 'html.parser')
-            companies = []
-
-            # Find all company sections
-            company_links = soup.find_all('a', {'class': '_company_i9oky_355'})[:num_companies]
-
-            async def process_company(company_link):
-                try:
-                    # Extract basic company info from the list
-                    company_name = company_link.find('span', {'class': '_coName_i9oky_470'}).get_text(strip=True)
-                    description = company_link.find('span', {'class': '_coDescription_i9oky_495'}).get_text(strip=True)
-                    link = 'https://www.ycombinator.com' + company_link['href']
-
-                    # Fetch additional details with semaphore
-                    async with semaphore:
-                        company_page = await context.new_page()
-                        details = await fetch_company_details(company_page, link)
-                        await company_page.close()
-
-                    company = {
-                        "title": company_name,
-                        "description": details['description'] or description,  # Use full description if available
-                        "link": details['website_url'] or link,  # Use the actual website URL if available
-                        "source": "y_combinator",
-                        "source_link": link,
-                        "image_url": details['image_url'],
-                        "author_name": details['author_name'],
-                        "author_profile_url": details['author_profile_url'],
-                        "categories": details['categories'],
-                        "created_at": get_batch_timestamp(details['batch']),
-                    }
-                    return company
-                except Exception as e:
-                    logging.error(f"Error processing company: {e}")
-                    return None
-
-            # Process all companies in parallel
-            tasks = [process_company(link) for link in company_links]
-            results = await asyncio.gather(*tasks)
-
-            # Filter out None results from errors
-            companies = [c for c in results if c is not None]
-
-            await browser.close()
-            return companies
+
+        soup = BeautifulSoup(html, 'html.parser')
+        companies = []
+
+        # Find all company sections
+        company_links = soup.find_all('a', {'class': '_company_i9oky_355'})[:num_companies]
+
+        async def process_company(company_link):
+            try:
+                # Extract basic company info from the list
+                company_name = company_link.find('span', {'class': '_coName_i9oky_470'}).get_text(strip=True)
+                description = company_link.find('span', {'class': '_coDescription_i9oky_495'}).get_text(strip=True)
+                link = 'https://www.ycombinator.com' + company_link['href']
+
+                async with browser_pool.page(link) as company_page:
+                    details = await fetch_company_details(company_page, link)
+
+                company = {
+                    "title": company_name,
+                    "description": details['description'] or description,  # Use full description if available
+                    "link": details['website_url'] or link,  # Use the actual website URL if available
+                    "source": "y_combinator",
+                    "source_link": link,
+                    "image_url": details['image_url'],
+                    "author_name": details['author_name'],
+                    "author_profile_url": details['author_profile_url'],
+                    "categories": details['categories'],
+                    "created_at": get_batch_timestamp(details['batch']),
+                }
+                return company
+            except Exception as e:
+                logging.error(f"Error processing company: {e}")
+                return None
+
+        # Process all companies in parallel
+        tasks = [process_company(link) for link in company_links]
+        results = await asyncio.gather(*tasks)
+
+        # Filter out None results from errors
+        companies = [c for c in results if c is not None]
+
+        return companies
 
     except Exception as e:
         logging.error(f"Error scraping YC companies page: {e}")
@@ -205,4 +196,10 @@ async def scrape_yc_companies(num_companies: int = 100, num_scrolls: int = 5, ur
 # Helper function for non-async contexts
 def get_yc_companies_sync(num_companies: int = 100) -> List[Dict[str, Any]]:
     """Synchronous wrapper for scrape_yc_companies"""
-    return asyncio.run(scrape_yc_companies(num_companies))
+    async def run():
+        try:
+            return await scrape_yc_companies(num_companies)
+        finally:
+            # The pooled browser belongs to this short-lived event loop
+            await browser_pool.close()
+    return asyncio.run(run())
@@ -1,14 +1,19 @@
 #========================================
 # Imports and Initialization
 #========================================
+import asyncio
 import os
 from ..ai import gemini
 from lib.logger import setup_logger
 from pydantic import BaseModel
 from typing import List, Dict
+from app.utils.metrics import timed
 
 logger = setup_logger("ai")
 
+# Past this, search goes ahead with the raw query instead of waiting on the model
+ENRICH_TIMEOUT_SECONDS = float(os.getenv("ENRICH_TIMEOUT_SECONDS", "4"))
+
 #========================================
 # Data Models
 #========================================
@@ -27,7 +32,7 @@ class AnalysisResponse(BaseModel):
 #========================================
 # Query Analysis Functions
 #========================================
-def analyze_query(query: str) -> Dict[str, str]:
+async def analyze_query(query: str, timeout: float = ENRICH_TIMEOUT_SECONDS) -> Dict[str, str]:
     """Analyze a product/project idea query using Gemini AI.
 
     Uses Gemini to extract key information about the problem statement,
@@ -35,9 +40,11 @@ def analyze_query(query: str) -> Dict[str, str]:
 
     Args:
         query: The product/project idea query text
+        timeout: Seconds to wait for the model before giving up
 
     Returns:
-        Dictionary containing problem statement, target users and key terms
+        Dictionary containing problem statement, target users and key terms,
+        or an 'error' entry with empty terms if analysis failed or timed out
 
     Raises:
         Exception: If there is an error analyzing the query
@@ -53,11 +60,12 @@ def analyze_query(query: str) -> Dict[str, str]:
     try:
         logger.debug(f"Analyzing query: {query}")
 
-        # Initialize Gemini client
-
-
         # Get the parsed response
-        json_content = gemini.get_chat_response(system_prompt, user_prompt, AnalysisResponse)
+        with timed("enrich"):
+            json_content = await asyncio.wait_for(
+                gemini.get_chat_response_async(system_prompt, user_prompt, AnalysisResponse),
+                timeout
+            )
 
         # Ensure terms is a list
         if isinstance(json_content.get('terms'), str):
@@ -68,6 +76,15 @@ def analyze_query(query: str) -> Dict[str, str]:
         logger.debug(f"AI analysis results: {json_content}")
         return json_content
 
+    except asyncio.TimeoutError:
+        error_msg = f"Query analysis timed out after {timeout}s"
+        logger.warning(error_msg)
+        return {
+            "error": error_msg,
+            "original_query": query,
+            "terms": []
+        }
+
     except Exception as e:
         error_msg = f"Failed to analyze query: {str(e)}"
         logger.error(error_msg, exc_info=True)
@@ -0,0 +1,222 @@
+#========================================
+# Imports and Initialization
+#========================================
+import heapq
+import math
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils.vector_index import ITEM_COLUMNS, SOURCE_TABLES, VectorIndex, parse_timestamp
+
+load_dotenv()
+
+logger = setup_logger("lexical")
+
+LOCAL_LEXICAL_INDEX = os.getenv("LOCAL_LEXICAL_INDEX", "0") == "1"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 2  # title tokens are counted this many times
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with', 'your', 'you',
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[+#][a-z0-9+#]*)?")
+
+#========================================
+# Tokenization
+#========================================
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into index terms, dropping stopwords."""
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+def item_tokens(item: Dict[str, Any]) -> List[str]:
+    """Tokens for an item's title (boosted), description and categories."""
+    title = tokenize(item.get('title', ''))
+    return (
+        title * TITLE_BOOST
+        + tokenize(item.get('description', ''))
+        + tokenize(' '.join(item.get('categories') or []))
+    )
+
+#========================================
+# BM25 index for one source
+#========================================
+class LexicalIndex:
+    """In-memory BM25 inverted index over the items of one source.
+
+    Documents are keyed by item id and can be added or replaced in place as
+    ingestion publishes new rows.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.docs: Dict[Any, Dict[str, Any]] = {}
+        self.lengths: Dict[Any, int] = {}
+        self.created_at: Dict[Any, float] = {}
+        self.postings: Dict[str, Dict[Any, int]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, items: Iterable[Dict[str, Any]]) -> None:
+        """Insert items, replacing any already indexed under the same id."""
+        for item in items:
+            doc_id = item['id']
+            if doc_id in self.docs:
+                self.remove(doc_id)
+            tokens = item_tokens(item)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self.postings.setdefault(token, {})[doc_id] = tf
+            self.docs[doc_id] = item
+            self.lengths[doc_id] = len(tokens)
+            self.created_at[doc_id] = parse_timestamp(item.get('created_at'))
+            self.total_length += len(tokens)
+
+    def remove(self, doc_id: Any) -> None:
+        item = self.docs.pop(doc_id, None)
+        if item is None:
+            return
+        for token in set(item_tokens(item)):
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[token]
+        self.total_length -= self.lengths.pop(doc_id)
+        self.created_at.pop(doc_id, None)
+
+    def search(self, terms: List[str], k: int, recency: Optional[int] = None, category_list: Optional[List[str]] = None, match_all: bool = False) -> List[Dict[str, Any]]:
+        """Rank items by BM25 against the given terms.
+
+        Args:
+            terms: Keywords or phrases; each is tokenized like the documents
+            k: Maximum number of results
+            recency: Only keep items created within this many days
+            category_list: Only keep items tagged with at least one of these categories
+            match_all: Require every term to be present in an item
+
+        Returns:
+            List of item dicts with 'source' and 'lexical_score' fields added, best first
+        """
+        term_tokens = [tokens for tokens in (tokenize(term) for term in terms) if tokens]
+        if not term_tokens or not self.docs:
+            return []
+        query_tokens = {token for tokens in term_tokens for token in tokens}
+
+        if match_all:
+            candidates = None
+            for tokens in term_tokens:
+                for token in tokens:
+                    ids = set(self.postings.get(token, ()))
+                    candidates = ids if candidates is None else candidates & ids
+            candidates = candidates or set()
+        else:
+            candidates = set()
+            for token in query_tokens:
+                candidates.update(self.postings.get(token, ()))
+
+        cutoff = time.time() - recency * 86400 if recency else None
+        categories = set(category_list) if category_list else None
+
+        n = len(self.docs)
+        avg_length = self.total_length / n if n else 0.0
+        idf = {}
+        for token in query_tokens:
+            df = len(self.postings.get(token, ()))
+            idf[token] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+        scored = []
+        for doc_id in candidates:
+            if cutoff is not None and self.created_at[doc_id] < cutoff:
+                continue
+            if categories is not None and not categories.intersection(self.docs[doc_id].get('categories') or []):
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc_id] / (avg_length or 1.0))
+            score = 0.0
+            for token in query_tokens:
+                tf = self.postings.get(token, {}).get(doc_id)
+                if tf:
+                    score += idf[token] * tf * (BM25_K1 + 1) / (tf + norm)
+            scored.append((score, doc_id))
+
+        return [
+            {**self.docs[doc_id], 'source': self.source, 'lexical_score': score}
+            for score, doc_id in heapq.nlargest(k, scored, key=lambda pair: pair[0])
+        ]
+
+#========================================
+# Multi-source index
+#========================================
+class LexicalSearchIndex:
+    """BM25 indexes for every item source, keyed by source name."""
+
+    def __init__(self, sources: Optional[Dict[str, LexicalIndex]] = None):
+        self.sources: Dict[str, LexicalIndex] = sources or {}
+
+    def has_source(self, source: str) -> bool:
+        return source in self.sources
+
+    def add(self, source: str, items: Iterable[Dict[str, Any]]) -> None:
+        self.sources.setdefault(source, LexicalIndex(source)).add(items)
+
+    def search(self, source: str, terms: List[str], k: int, recency: Optional[int], category_list: Optional[List[str]], match_all: bool = False) -> List[Dict[str, Any]]:
+        return self.sources[source].search(terms, k, recency, category_list, match_all)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            source: {'docs': len(index), 'terms': len(index.postings)}
+            for source, index in self.sources.items()
+        }
+
+
+def build_from_vector_index(index: VectorIndex) -> LexicalSearchIndex:
+    """Index the item metadata the vector index already holds."""
+    lexical = LexicalSearchIndex()
+    for source, source_index in index.sources.items():
+        items = list(source_index.items)
+        if source_index.deleted is not None:
+            items = [item for row, item in enumerate(items) if not source_index.deleted[row]]
+        if source_index.delta is not None:
+            items += source_index.delta.items
+        lexical.add(source, items)
+    return lexical
+
+
+async def build_from_supabase(client: Any, page_size: int = 1000) -> LexicalSearchIndex:
+    """Load item text from every source table (no embeddings) into a new index."""
+    lexical = LexicalSearchIndex()
+    columns = ', '.join(ITEM_COLUMNS)
+    for source, table in SOURCE_TABLES.items():
+        start = 0
+        while True:
+            response = await client.table(table).select(columns).order('id').range(start, start + page_size - 1).execute()
+            rows = response.data or []
+            lexical.add(source, rows)
+            if len(rows) < page_size:
+                break
+            start += page_size
+        logger.info(f"Indexed {len(lexical.sources.get(source, ()))} {table} rows for keyword search")
+    return lexical
+
+#========================================
+# Process-wide index
+#========================================
+lexical_index: Optional[LexicalSearchIndex] = None
+
+def get_lexical_index() -> Optional[LexicalSearchIndex]:
+    """Return the loaded keyword index, or None if keyword search should hit Supabase."""
+    return lexical_index
+
+def set_lexical_index(index: Optional[LexicalSearchIndex]) -> None:
+    global lexical_index
+    lexical_index = index
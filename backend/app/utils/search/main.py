@@ -1,13 +1,94 @@
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import asyncio
 import logging
-from utils import embedding as emb, arxiv
+import os
+import heapq
+from app.utils import embedding as emb, arxiv
 from utils.supabase import items
+from app.utils.cache import TTLCache
+from app.utils.embedding_cache import normalize_text
+from app.utils.search.lexical import tokenize
+from app.utils import dedup, metrics
 
 logger = logging.getLogger(__name__)
 
 SIMILARITY_THRESHOLD = 0.3
 
-async def get_search_results(
+# "vector" ranks by embedding similarity only; "hybrid" also runs BM25 keyword
+# search and fuses both rankings with reciprocal-rank fusion
+SEARCH_MODES = ("vector", "hybrid")
+RRF_K = 60
+EXACT_MATCH_MAX_TOKENS = 3
+# Keyword-only hits have no similarity to threshold; they must rank in the
+# keyword top 10 instead
+LEXICAL_MIN_RRF_SCORE = 1.0 / (RRF_K + 10)
+
+# Per-stage deadlines; a stage that misses its deadline is left out of the
+# results rather than holding up the whole search
+SEARCH_EMBED_TIMEOUT_SECONDS = float(os.getenv("SEARCH_EMBED_TIMEOUT_SECONDS", "5"))
+SEARCH_DB_TIMEOUT_SECONDS = float(os.getenv("SEARCH_DB_TIMEOUT_SECONDS", "5"))
+SEARCH_ARXIV_TIMEOUT_SECONDS = float(os.getenv("SEARCH_ARXIV_TIMEOUT_SECONDS", "10"))
+
+# Popular idea phrasings repeat constantly, so keep their embeddings around
+QUERY_EMBEDDING_CACHE_SIZE = 2048
+QUERY_EMBEDDING_TTL_SECONDS = 6 * 60 * 60
+query_embedding_cache = TTLCache(QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_TTL_SECONDS)
+metrics.register_cache("query_embedding", query_embedding_cache.get_stats)
+
+async def get_query_embedding(text: str):
+    """Embed a search query, reusing recent embeddings of the same text.
+
+    Concurrent requests for the same query share a single upstream call.
+    """
+    key = normalize_text(text)
+    return await query_embedding_cache.get_or_create(key, lambda: emb.create_embedding(key))
+
+def get_query_cache_stats() -> Dict[str, float]:
+    """Return hit/miss statistics for the query embedding cache."""
+    return query_embedding_cache.get_stats()
+
+def result_key(item: Dict[str, Any]) -> tuple:
+    """Identify the same item across result lists.
+
+    Keyed on the link rather than the id, which some RPCs don't return.
+    """
+    return (item.get('source'), item.get('link') or item.get('title') or item.get('id'))
+
+def fuse_results(ranked_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Merge ranked result lists with reciprocal-rank fusion.
+
+    Each item scores sum(1 / (RRF_K + rank)) over the lists it appears in and
+    gets an 'rrf_score' field. When an item appears in several lists, the copy
+    from the earliest list is kept, so pass vector results first to preserve
+    their similarity scores. Items only found by keyword search have no
+    'similarity'.
+    """
+    fused: Dict[tuple, Dict[str, Any]] = {}
+    for ranked in ranked_lists:
+        for rank, item in enumerate(ranked, start=1):
+            key = result_key(item)
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**item, 'rrf_score': 0.0}
+            elif 'lexical_score' in item:
+                entry.setdefault('lexical_score', item['lexical_score'])
+            entry['rrf_score'] += 1.0 / (RRF_K + rank)
+    return sorted(fused.values(), key=lambda item: item['rrf_score'], reverse=True)
+
+def is_exact_match(query: str, lexical_items: List[Dict[str, Any]]) -> bool:
+    """Whether a short query names the top keyword hit outright (e.g. a product name)."""
+    query_tokens = tokenize(query)
+    if not lexical_items or not query_tokens or len(query_tokens) > EXACT_MATCH_MAX_TOKENS:
+        return False
+    return set(query_tokens) <= set(tokenize(lexical_items[0].get('title', '')))
+
+def group_by_source(found: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for item in found:
+        grouped.setdefault(item.get('source', 'unknown'), []).append(item)
+    return grouped
+
+async def iter_search_results(
     sources: List[str],
     query: str,
     enriched_query: str,
@@ -16,31 +97,67 @@ async def get_search_results(
     reddit_categories: List[str] = None,
     product_hunt_categories: List[str] = None,
     ycombinator_categories: List[str] = None,
-    arxiv_categories: List[str] = None
-) -> List[Dict[str, Any]]:
+    arxiv_categories: List[str] = None,
+    search_mode: str = "vector",
+    terms: List[str] = None
+) -> AsyncIterator[Tuple[str, Any]]:
     """
-    Retrieve search results from specified sources using embedding-based search.
+    Retrieve search results from specified sources, yielding each source's hits as they arrive.
+
+    Database sources and arXiv are queried concurrently. Each time one of them
+    answers, a ("partial", {"source": ..., "items": [...]}) pair is yielded
+    with that source's ranked hits. The last pair is ("results", all results),
+    fused with keyword results in hybrid mode.
 
     Args:
-        sources: List of source names to search
-        query: Original search query
-        enriched_query: Query enriched with AI analysis
-        num_results: Number of results to return
-        recency: How recent the results should be
-        reddit_categories: List of Reddit categories to filter by
-        product_hunt_categories: List of Product Hunt categories to filter by
-        ycombinator_categories: List of Y Combinator categories to filter by
-        arxiv_categories: List of arXiv categories to filter by
+        Same as get_search_results
 
-    Returns:
-        List of search results from all sources
+    Each stage has a deadline (SEARCH_*_TIMEOUT_SECONDS). A stage that misses
+    it is dropped with a ("note", message) pair and the search finishes with
+    whatever the other stages found.
+
+    Yields:
+        ("partial", {"source", "items"}) and ("note", str) pairs, then a single ("results", list) pair
     """
+    if search_mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {search_mode}")
+
     search_results = []
-    query_embedding = await emb.create_embedding(enriched_query)
+    lexical_items = []
+
+    if search_mode == "hybrid" and set(sources) - {"arxiv"}:
+        try:
+            lexical_items = await asyncio.wait_for(items.keyword_search(
+                sources,
+                [query] + list(terms or []),
+                num_results,
+                recency,
+                reddit_categories,
+                product_hunt_categories,
+                ycombinator_categories,
+                match_all=False
+            ), SEARCH_DB_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Keyword search timed out after {SEARCH_DB_TIMEOUT_SECONDS}s")
+            yield "note", "Keyword search took too long, showing semantic matches only"
+        logger.debug(f"Retrieved {len(lexical_items)} items from keyword search")
+        if "arxiv" not in sources and is_exact_match(query, lexical_items):
+            logger.debug("Exact keyword match, skipping embedding search")
+            yield "results", fuse_results([lexical_items])
+            return
 
+    try:
+        query_embedding = await asyncio.wait_for(get_query_embedding(enriched_query), SEARCH_EMBED_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"Query embedding timed out after {SEARCH_EMBED_TIMEOUT_SECONDS}s")
+        yield "note", "Semantic search timed out, showing keyword matches only" if lexical_items else "Semantic search timed out"
+        yield "results", lexical_items
+        return
+
+    tasks = {}
     # Search non-arXiv sources
     if set(sources) - {"arxiv"}:
-        db_items = await items.embedding_search(
+        tasks[asyncio.create_task(asyncio.wait_for(items.embedding_search(
             sources,
             query_embedding,
             num_results,
@@ -48,39 +165,126 @@ async def get_search_results(
             reddit_categories,
             product_hunt_categories,
             ycombinator_categories
-        )
-        search_results.extend(db_items)
-        logger.debug(f"Retrieved {len(db_items)} items from Supabase sources")
-
+        ), SEARCH_DB_TIMEOUT_SECONDS))] = "the item database"
     # Search arXiv if requested
     if "arxiv" in sources:
-        arxiv_items = await arxiv.get_arxiv_items(
+        tasks[asyncio.create_task(asyncio.wait_for(arxiv.get_arxiv_items(
             query,
             query_embedding,
             arxiv_categories,
             num_results,
-            recency
-        )
-        search_results.extend(arxiv_items)
-        logger.debug(f"Retrieved {len(arxiv_items)} items from arXiv")
+            recency,
+            terms=terms
+        ), SEARCH_ARXIV_TIMEOUT_SECONDS))] = "arXiv"
+
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    found = task.result()
+                except asyncio.TimeoutError:
+                    # Answer with what the other stages found instead of waiting on this one
+                    logger.warning(f"Search of {tasks[task]} hit its deadline")
+                    yield "note", f"Search of {tasks[task]} took too long, showing results without it"
+                    continue
+                search_results.extend(found)
+                for source, source_items in group_by_source(found).items():
+                    logger.debug(f"Retrieved {len(source_items)} items from {source}")
+                    yield "partial", {"source": source, "items": source_items}
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    if lexical_items:
+        vector_ranked = sorted(search_results, key=lambda item: item['similarity'], reverse=True)
+        search_results = fuse_results([vector_ranked, lexical_items])
+
+    yield "results", search_results
+
+async def get_search_results(
+    sources: List[str],
+    query: str,
+    enriched_query: str,
+    num_results: int,
+    recency: int,
+    reddit_categories: List[str] = None,
+    product_hunt_categories: List[str] = None,
+    ycombinator_categories: List[str] = None,
+    arxiv_categories: List[str] = None,
+    search_mode: str = "vector",
+    terms: List[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve search results from specified sources using embedding-based search.
+
+    In hybrid mode, BM25 keyword results for the query and its extracted terms
+    are fused with the embedding results. A short query that exactly names the
+    top keyword hit is answered from keyword search alone, skipping the
+    embedding call.
 
+    Args:
+        sources: List of source names to search
+        query: Original search query
+        enriched_query: Query enriched with AI analysis
+        num_results: Number of results to return
+        recency: How recent the results should be
+        reddit_categories: List of Reddit categories to filter by
+        product_hunt_categories: List of Product Hunt categories to filter by
+        ycombinator_categories: List of Y Combinator categories to filter by
+        arxiv_categories: List of arXiv categories to filter by
+        search_mode: One of SEARCH_MODES
+        terms: Key terms extracted from the query during enrichment
+
+    Returns:
+        List of search results from all sources
+    """
+    search_results = []
+    async for type, payload in iter_search_results(
+        sources, query, enriched_query, num_results, recency,
+        reddit_categories, product_hunt_categories, ycombinator_categories, arxiv_categories,
+        search_mode=search_mode, terms=terms
+    ):
+        if type == "results":
+            search_results = payload
     return search_results
 
-def filter_results(search_results: List[Dict[str, Any]], num_results: int) -> List[Dict[str, Any]]:
+def passes_threshold(item: Dict[str, Any]) -> bool:
+    if 'similarity' in item:
+        return item['similarity'] >= SIMILARITY_THRESHOLD
+    return item.get('rrf_score', 0.0) >= LEXICAL_MIN_RRF_SCORE
+
+def filter_results(search_results: List[Dict[str, Any]], num_results: int, collapse_duplicates: bool = False) -> List[Dict[str, Any]]:
     """
     Filter and clean search results based on similarity threshold.
 
+    Keyword-only hits carry no similarity and are kept when their fused rank
+    clears LEXICAL_MIN_RRF_SCORE instead.
+
     Args:
         search_results: List of raw search results
         num_results: Maximum number of results to return
+        collapse_duplicates: Fold near-duplicates (the same launch from several sources)
+            into the best ranked copy, listed under its 'duplicates' key
 
     Returns:
         List of filtered and cleaned search results
     """
-    # Filter by similarity threshold and sort
-    filtered_results = [item for item in search_results if item['similarity'] >= SIMILARITY_THRESHOLD]
-    filtered_results.sort(key=lambda x: x['similarity'], reverse=True)
-    filtered_results = filtered_results[:num_results]
+    # Filter by similarity threshold and sort, by fused rank when hybrid search produced one
+    # (partial selection, no need to sort everything that passed)
+    with metrics.timed("filter"):
+        filtered_results = [item for item in search_results if passes_threshold(item)]
+        if any('rrf_score' in item for item in filtered_results):
+            rank = lambda x: (x.get('rrf_score', 0.0), x.get('similarity', 0.0))
+        else:
+            rank = lambda x: x['similarity']
+        if collapse_duplicates:
+            # Collapsing can drop items, so rank everything before cutting to num_results
+            filtered_results = dedup.collapse_duplicates(sorted(filtered_results, key=rank, reverse=True))[:num_results]
+        else:
+            filtered_results = heapq.nlargest(num_results, filtered_results, key=rank)
 
     # Clean results to ensure serializable values
     cleaned_results = []
@@ -0,0 +1,198 @@
+#========================================
+# Imports and Initialization
+#========================================
+import asyncio
+import fcntl
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils.embedding_cache import normalize_text
+from app.utils import metrics
+
+load_dotenv()
+
+logger = setup_logger("result_cache")
+
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(15 * 60)))
+# How long past the TTL an entry may still be served while it is refreshed
+RESULT_CACHE_STALE_SECONDS = float(os.getenv("RESULT_CACHE_STALE_SECONDS", str(6 * 60 * 60)))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SOURCE_VERSIONS_PATH = os.getenv("SOURCE_VERSIONS_PATH", ".cache/source_versions.json")
+
+#========================================
+# Source versions, bumped by ingestion
+#========================================
+# Ingestion may run in another process, so per-source versions live in a
+# small shared file. A cached result remembers the versions it was computed
+# against and is dropped once any of its sources has moved on.
+
+_versions_cache: Tuple[float, Dict[str, int]] = (-1.0, {})
+
+def read_source_versions(path: str = SOURCE_VERSIONS_PATH) -> Dict[str, int]:
+    """Current version of every source; re-read only when the file changes."""
+    global _versions_cache
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        return {}
+    if mtime != _versions_cache[0]:
+        try:
+            with open(path) as f:
+                _versions_cache = (mtime, json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read source versions: {e}")
+    return _versions_cache[1]
+
+def mark_sources_updated(sources: List[str], path: str = SOURCE_VERSIONS_PATH) -> None:
+    """Record that new items were ingested for sources, invalidating cached results."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a+') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            content = f.read()
+            versions = json.loads(content) if content.strip() else {}
+            for source in sources:
+                versions[source] = versions.get(source, 0) + 1
+            f.seek(0)
+            f.truncate()
+            json.dump(versions, f)
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+    search_result_cache.invalidate_sources(sources)
+
+#========================================
+# Result cache
+#========================================
+def make_key(query: str, sources: List[str], recency: int, num_results: int, category_lists: Dict[str, List[str]], search_mode: str = "vector", collapse_duplicates: bool = False) -> Hashable:
+    """Normalize search parameters into a cache key."""
+    return (
+        normalize_text(query).lower(),
+        tuple(sorted(set(sources))),
+        recency,
+        num_results,
+        tuple(sorted((name, tuple(sorted(values or []))) for name, values in category_lists.items())),
+        search_mode,
+        collapse_duplicates,
+    )
+
+
+class ResultCache:
+    """Search results cached with a TTL, stale-while-revalidate and a byte budget.
+
+    Fresh entries are served as is. Entries past the TTL but within the stale
+    window are still served, and the caller schedules a background refresh.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """Return (value, is_stale), or (None, False) on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry['stored_at']
+            versions = read_source_versions()
+            outdated = any(versions.get(source, 0) != version for source, version in entry['versions'].items())
+            if outdated or age > self.ttl + self.stale_ttl:
+                self._drop(key)
+                entry = None
+        if entry is None:
+            self.misses += 1
+            return None, False
+
+        self._entries.move_to_end(key)
+        if time.monotonic() - entry['stored_at'] > self.ttl:
+            self.stale_hits += 1
+            return entry['value'], True
+        self.hits += 1
+        return entry['value'], False
+
+    def set(self, key: Hashable, value: Any, sources: List[str], versions: Optional[Dict[str, int]] = None) -> None:
+        """Store value for key.
+
+        Pass the source versions read before value was computed, so an ingest
+        landing mid-computation leaves the entry already outdated.
+        """
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        self._drop(key)
+        if versions is None:
+            versions = read_source_versions()
+        self._entries[key] = {
+            'value': value,
+            'stored_at': time.monotonic(),
+            'size': size,
+            'versions': {source: versions.get(source, 0) for source in sources},
+        }
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry['size']
+
+    def invalidate_sources(self, sources: List[str]) -> None:
+        """Drop every entry that includes results from any of sources."""
+        doomed = [key for key, entry in self._entries.items() if set(entry['versions']) & set(sources)]
+        for key in doomed:
+            self._drop(key)
+
+    def refresh(self, key: Hashable, compute: Callable[[], Awaitable[Any]], sources: List[str]) -> None:
+        """Recompute an entry in the background, at most once at a time per key.
+
+        compute returns None for a result that should not be cached (e.g. a
+        degraded one); the stale entry is then left to expire.
+        """
+        if key in self._refreshing:
+            return
+
+        async def run():
+            try:
+                versions = dict(read_source_versions())
+                value = await compute()
+                if value is not None:
+                    self.set(key, value, sources, versions)
+                    self.refreshes += 1
+            except Exception as e:
+                logger.error(f"Background refresh failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(run())
+
+    def get_stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            'refreshes': self.refreshes,
+            'entries': len(self._entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+        }
+
+
+search_result_cache = ResultCache(RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_STALE_SECONDS, RESULT_CACHE_MAX_BYTES)
+metrics.register_cache("search_results", search_result_cache.get_stats)
@@ -0,0 +1,290 @@
+#========================================
+# Imports and Initialization
+#========================================
+import json
+import mmap
+import os
+import shutil
+import time
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, List, Optional, Union
+import numpy as np
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils.vector_index import SourceIndex, VectorIndex, assign_ivf
+
+load_dotenv()
+
+logger = setup_logger("snapshot")
+
+EMBEDDING_SNAPSHOT_DIR = os.getenv("EMBEDDING_SNAPSHOT_DIR")
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+CURRENT_LINK = "current"
+SNAPSHOT_KEEP_VERSIONS = 2  # older versions are removed once a new one is live
+SNAPSHOT_COPY_ROWS = 65536  # rows copied per block when appending to a source
+SNAPSHOT_COPY_BYTES = 16 * 1024 * 1024  # item bytes copied per block
+
+# Snapshot layout: every write goes to a fresh version directory and the
+# "current" symlink is swapped to it in one rename, so readers resolve one
+# version and never mix files from two. Each version holds, per source:
+#   <source>.vectors.npy        float32 (rows, dim), unit-normalized, C-contiguous
+#   <source>.items.jsonl        item metadata, one JSON object per row, same order as the rows
+#   <source>.items.offsets.npy  int64 (rows + 1,) byte offset of each row in items.jsonl
+#   <source>.ivf.npz            optional IVF centroids + bucketed row order
+#   manifest.json               written last; a version without it is incomplete
+# Items are memory-mapped like the vectors and decoded a row at a time, so
+# workers share them too. Directories written before versioning (files
+# directly in the directory), or with a single <source>.items.json list, are
+# still readable.
+
+#========================================
+# Item metadata
+#========================================
+class ItemStore(Sequence):
+    """Read-only item metadata in a JSON-lines file, decoded by row through a memory map."""
+
+    def __init__(self, path: str, offsets: np.ndarray):
+        self.path = path
+        self.offsets = offsets
+        with open(path, "rb") as f:
+            # mmap can't map an empty file
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: Union[int, slice]) -> Any:
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        row = int(row)
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return json.loads(self._data[int(self.offsets[row]):int(self.offsets[row + 1])])
+
+def load_items(directory: str, source: str) -> Union[ItemStore, List[Dict[str, Any]]]:
+    """A source's item metadata, memory-mapped unless the snapshot predates items.jsonl."""
+    items_path = os.path.join(directory, f"{source}.items.jsonl")
+    if not os.path.exists(items_path):
+        with open(os.path.join(directory, f"{source}.items.json")) as f:
+            return json.load(f)
+    return ItemStore(items_path, np.load(os.path.join(directory, f"{source}.items.offsets.npy"), mmap_mode="r"))
+
+#========================================
+# Writing
+#========================================
+def _atomic_write(path: str, write) -> None:
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _write_items(version_dir: str, source: str, items: Sequence, appended: Iterable[Dict[str, Any]] = ()) -> None:
+    """Write items, then appended, as the source's items.jsonl and offsets."""
+    appended = list(appended)
+    offsets = np.zeros(len(items) + len(appended) + 1, dtype=np.int64)
+
+    def write(f) -> None:
+        if isinstance(items, ItemStore):
+            # Already encoded, so copy the bytes across instead of decoding every row
+            remaining = int(items.offsets[-1])
+            with open(items.path, "rb") as src:
+                while remaining:
+                    block = src.read(min(SNAPSHOT_COPY_BYTES, remaining))
+                    if not block:
+                        raise ValueError(f"{items.path} is shorter than its offsets")
+                    f.write(block)
+                    remaining -= len(block)
+            offsets[:len(items) + 1] = items.offsets
+            start, rows = len(items), appended
+        else:
+            start, rows = 0, [*items, *appended]
+        for row, item in enumerate(rows, start):
+            f.write(json.dumps(item, default=str).encode("utf-8") + b"\n")
+            offsets[row + 1] = f.tell()
+
+    _atomic_write(os.path.join(version_dir, f"{source}.items.jsonl"), write)
+    _atomic_write(os.path.join(version_dir, f"{source}.items.offsets.npy"), lambda f: np.save(f, offsets))
+
+def _swap_current(directory: str, version: str) -> None:
+    tmp_link = os.path.join(directory, f"{CURRENT_LINK}.tmp-{os.getpid()}")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(version, tmp_link)
+    os.replace(tmp_link, os.path.join(directory, CURRENT_LINK))
+
+def _prune_versions(directory: str, keep: int) -> None:
+    # Mapped files of a removed version stay valid until their readers let go
+    versions = sorted(name for name in os.listdir(directory) if name.startswith("v-"))
+    for name in versions[:-keep]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+def _new_version(directory: str) -> tuple[str, str]:
+    os.makedirs(directory, exist_ok=True)
+    version = f"v-{time.time_ns()}-{os.getpid()}"
+    version_dir = os.path.join(directory, version)
+    os.makedirs(version_dir)
+    return version, version_dir
+
+def _publish(directory: str, version: str, manifest: Dict[str, Any]) -> None:
+    _atomic_write(
+        os.path.join(directory, version, MANIFEST_FILE),
+        lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8"))
+    )
+    _swap_current(directory, version)
+    _prune_versions(directory, SNAPSHOT_KEEP_VERSIONS)
+
+def write_snapshot(index: VectorIndex, directory: str, index_log_offset: int = 0) -> Dict[str, Any]:
+    """Write every source of index as a new version under directory and return the manifest.
+
+    The version only becomes current once all of its files and its manifest
+    are on disk, by atomically repointing the "current" symlink, so a reader
+    loads either the old snapshot or the new one. index_log_offset records
+    how much of the index log the snapshot already covers.
+    """
+    version, version_dir = _new_version(directory)
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "index_log_offset": index_log_offset,
+        "sources": {},
+    }
+
+    for source, source_index in index.sources.items():
+        if source_index.delta is not None or source_index.deleted is not None:
+            source_index = source_index.compact()
+        vectors = np.ascontiguousarray(source_index.vectors, dtype=np.float32)
+        _atomic_write(os.path.join(version_dir, f"{source}.vectors.npy"), lambda f: np.save(f, vectors))
+        _write_items(version_dir, source, source_index.items)
+
+        has_ivf = source_index.centroids is not None
+        if has_ivf:
+            order = np.concatenate(source_index.lists) if source_index.lists else np.zeros(0, dtype=np.int64)
+            bounds = np.cumsum([0] + [len(rows) for rows in source_index.lists])
+            _atomic_write(
+                os.path.join(version_dir, f"{source}.ivf.npz"),
+                lambda f: np.savez(f, centroids=source_index.centroids, order=order, bounds=bounds)
+            )
+
+        manifest["sources"][source] = {
+            "rows": int(vectors.shape[0]),
+            "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "ivf": has_ivf,
+        }
+
+    _publish(directory, version, manifest)
+    return manifest
+
+def append_to_snapshot(directory: str, source: str, items: List[Dict[str, Any]], vectors: np.ndarray) -> Dict[str, Any]:
+    """Write a new version of the snapshot with rows appended to one source.
+
+    Unlike write_snapshot, the existing rows are streamed across in blocks
+    and the IVF centroids are kept, with new rows joining their nearest
+    bucket. An append costs a sequential copy instead of a compaction and
+    retrain of the whole source; write the snapshot from scratch to retrain.
+
+    Raises:
+        KeyError: If the snapshot has no such source
+    """
+    current_dir = resolve_snapshot(directory)
+    manifest = read_manifest(current_dir)
+    info = manifest["sources"][source]
+    version, version_dir = _new_version(directory)
+
+    # Other sources are unchanged, so the new version shares their files
+    for name in os.listdir(current_dir):
+        path = os.path.join(current_dir, name)
+        if os.path.isfile(path) and not os.path.islink(path) and name != MANIFEST_FILE and not name.startswith(f"{source}."):
+            os.link(path, os.path.join(version_dir, name))
+
+    old_vectors = np.load(os.path.join(current_dir, f"{source}.vectors.npy"), mmap_mode="r")
+    new_vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    base = len(old_vectors)
+    vectors_path = os.path.join(version_dir, f"{source}.vectors.npy")
+    out = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(base + len(new_vectors), new_vectors.shape[1]))
+    for start in range(0, base, SNAPSHOT_COPY_ROWS):
+        stop = min(start + SNAPSHOT_COPY_ROWS, base)
+        out[start:stop] = old_vectors[start:stop]
+    out[base:] = new_vectors
+    out.flush()
+    del out
+    with open(vectors_path, "rb") as f:
+        os.fsync(f.fileno())
+
+    _write_items(version_dir, source, load_items(current_dir, source), items)
+
+    if info.get("ivf"):
+        with np.load(os.path.join(current_dir, f"{source}.ivf.npz")) as data:
+            centroids, order, bounds = data["centroids"], data["order"], data["bounds"]
+        added = assign_ivf(new_vectors, centroids)
+        lists = [np.concatenate([order[bounds[c]:bounds[c + 1]], added[c] + base]) for c in range(len(centroids))]
+        order = np.concatenate(lists) if lists else np.zeros(0, dtype=np.int64)
+        bounds = np.cumsum([0] + [len(rows) for rows in lists])
+        _atomic_write(
+            os.path.join(version_dir, f"{source}.ivf.npz"),
+            lambda f: np.savez(f, centroids=centroids, order=order, bounds=bounds)
+        )
+
+    manifest = {**manifest, "created_at": time.time(), "sources": {**manifest["sources"]}}
+    manifest["sources"][source] = {**info, "rows": base + len(new_vectors), "dim": int(new_vectors.shape[1])}
+    _publish(directory, version, manifest)
+    return manifest
+
+#========================================
+# Loading
+#========================================
+def resolve_snapshot(directory: str) -> str:
+    """The version directory a reader should load from right now.
+
+    Resolve once and read every file from the result; the current link may
+    move to a newer version in the meantime.
+    """
+    current = os.path.join(directory, CURRENT_LINK)
+    if os.path.lexists(current):
+        return os.path.realpath(current)
+    return directory
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    with open(os.path.join(resolve_snapshot(directory), MANIFEST_FILE)) as f:
+        return json.load(f)
+
+def load_snapshot(directory: str, sources: Optional[List[str]] = None) -> VectorIndex:
+    """Memory-map a snapshot into a VectorIndex.
+
+    Vector matrices and item metadata are opened read-only with mmap, so
+    every worker process on the host shares a single page-cache copy instead
+    of holding its own.
+
+    Raises:
+        FileNotFoundError: If the directory has no complete snapshot
+        ValueError: If the snapshot version is not supported
+    """
+    directory = resolve_snapshot(directory)
+    manifest = read_manifest(directory)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+
+    source_indexes = {}
+    for source, info in manifest["sources"].items():
+        if sources is not None and source not in sources:
+            continue
+        vectors = np.load(os.path.join(directory, f"{source}.vectors.npy"), mmap_mode="r")
+        items = load_items(directory, source)
+
+        ivf = None
+        if info.get("ivf"):
+            with np.load(os.path.join(directory, f"{source}.ivf.npz")) as data:
+                order, bounds = data["order"], data["bounds"]
+                ivf = (data["centroids"], [order[bounds[c]:bounds[c + 1]] for c in range(len(bounds) - 1)])
+
+        source_indexes[source] = SourceIndex(source, vectors, items, ivf=ivf)
+        logger.info(f"Mapped {info['rows']} {source} vectors from snapshot")
+
+    return VectorIndex(source_indexes)
+
+def snapshot_exists(directory: Optional[str]) -> bool:
+    return bool(directory) and os.path.exists(os.path.join(resolve_snapshot(directory), MANIFEST_FILE))
@@ -1,4 +1,8 @@
-
+import asyncio
+import json
+from typing import AsyncIterator
+from fastapi import Request
+from app.lib.logger import logger
 
 # =======================================================================#
 # Helper functions
@@ -9,6 +13,10 @@ def ysm(type: str, message: str | dict) -> str:
         if type == "results":
             # For results, use a specific format with items array
             message_data = {"type": type, "items": message}
+        elif type == "partial_results":
+            # One source's hits, sent as soon as that source answers:
+            # message is {"source": ..., "items": [...]}
+            message_data = {"type": type, "source": message["source"], "items": message["items"]}
         else:
             # For status and error messages, use message field
             message_str = str(message) if isinstance(message, (str, int, float)) else json.dumps(message)
@@ -21,3 +29,38 @@ def ysm(type: str, message: str | dict) -> str:
         logger.error(f"Error in ysm: {str(e)}")
         # Return a safe fallback message
         return f"data: {json.dumps({'type': 'error', 'message': 'Error formatting message'})}\n\n"
+
+
+async def stream_until_disconnect(request: Request, events: AsyncIterator[str], poll_seconds: float = 0.5) -> AsyncIterator[str]:
+    """Forward SSE events until the client goes away.
+
+    While waiting on the next event, the connection is checked every
+    poll_seconds. On disconnect the pending step is cancelled and the
+    producer is closed, so its cleanup cancels any upstream calls still in
+    flight instead of running them to completion for nobody.
+    """
+    iterator = events.__aiter__()
+    next_event = None
+    try:
+        while True:
+            next_event = asyncio.ensure_future(iterator.__anext__())
+            while True:
+                done, _ = await asyncio.wait({next_event}, timeout=poll_seconds)
+                if done:
+                    break
+                if await request.is_disconnected():
+                    logger.info("Client disconnected, cancelling stream")
+                    return
+            try:
+                event = next_event.result()
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        if next_event is not None and not next_event.done():
+            next_event.cancel()
+            try:
+                await next_event
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        await iterator.aclose()
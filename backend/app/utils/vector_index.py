@@ -0,0 +1,341 @@
+#========================================
+# Imports and Initialization
+#========================================
+import copy
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+
+load_dotenv()
+
+logger = setup_logger("vector_index")
+
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "0") == "1"
+
+# Below this many rows a flat scan is already fast enough and always exact
+IVF_MIN_ROWS = int(os.getenv("VECTOR_INDEX_IVF_MIN_ROWS", "20000"))
+IVF_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+IVF_TRAIN_ITERATIONS = 10
+IVF_TRAIN_SAMPLE = 50000
+
+SOURCE_TABLES = {
+    'y_combinator': 'yc_items',
+    'hacker_news': 'hn_items',
+    'reddit': 're_items',
+    'product_hunt': 'ph_items',
+}
+
+ITEM_COLUMNS = [
+    'id', 'title', 'description', 'link', 'source_link', 'image_url',
+    'created_at', 'author_name', 'author_profile_url', 'categories',
+]
+
+#========================================
+# Helpers
+#========================================
+def parse_timestamp(value: Any) -> float:
+    """Convert an ISO8601 created_at value to epoch seconds (-inf if missing)."""
+    if not value:
+        return float('-inf')
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return float('-inf')
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def parse_embedding(value: Any) -> List[float]:
+    """PostgREST returns pgvector columns as strings like '[0.1,0.2,...]'."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length so a dot product is a cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+def train_ivf(vectors: np.ndarray, nlist: int, seed: int = 0) -> tuple[np.ndarray, List[np.ndarray]]:
+    """Cluster unit vectors with spherical k-means and bucket every row.
+
+    Returns:
+        Tuple of (centroids, inverted lists of row indices per centroid)
+    """
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > IVF_TRAIN_SAMPLE:
+        sample = vectors[rng.choice(len(vectors), IVF_TRAIN_SAMPLE, replace=False)]
+
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(IVF_TRAIN_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = sample[assignment == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = normalize_rows(centroids)
+
+    return centroids, assign_ivf(vectors, centroids)
+
+def assign_ivf(vectors: np.ndarray, centroids: np.ndarray) -> List[np.ndarray]:
+    """Bucket every row under its nearest centroid.
+
+    Returns:
+        Inverted lists of row indices per centroid
+    """
+    nlist = len(centroids)
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), 8192):
+        block = vectors[start:start + 8192]
+        assignment[start:start + 8192] = np.argmax(block @ centroids.T, axis=1)
+
+    order = np.argsort(assignment, kind='stable')
+    bounds = np.searchsorted(assignment[order], np.arange(nlist + 1))
+    return [order[bounds[c]:bounds[c + 1]] for c in range(nlist)]
+
+#========================================
+# Per-source index
+#========================================
+class SourceIndex:
+    """Vectors and metadata for one source table, searchable by cosine similarity.
+
+    Small sources are scanned exhaustively. Larger ones get an IVF-flat index:
+    rows are bucketed by nearest k-means centroid and a query only scans the
+    IVF_NPROBE closest buckets.
+
+    Instances are never mutated once published. with_updates returns a new
+    index that shares the main arrays, hides superseded rows behind a deleted
+    mask and keeps new rows in a small flat delta segment until compact()
+    folds everything back into one segment.
+    """
+
+    def __init__(self, source: str, vectors: np.ndarray, items: Sequence[Dict[str, Any]], ivf: Optional[tuple[np.ndarray, List[np.ndarray]]] = None, train: bool = True):
+        if len(vectors) != len(items):
+            raise ValueError("Number of items must match number of vectors")
+        self.source = source
+        self.items = items
+        self.vectors = vectors if vectors.dtype == np.float32 else vectors.astype(np.float32)
+        # One pass, since items may be decoded from a memory-mapped file row by row
+        self.created_at = np.empty(len(items), dtype=np.float64)
+        self.id_rows: Dict[Any, int] = {}
+        self.category_rows: Dict[str, np.ndarray] = {}
+        rows_by_category: Dict[str, List[int]] = {}
+        for row, item in enumerate(items):
+            self.created_at[row] = parse_timestamp(item.get('created_at'))
+            if 'id' in item:
+                self.id_rows[item['id']] = row
+            for category in item.get('categories') or []:
+                rows_by_category.setdefault(category, []).append(row)
+        for category, rows in rows_by_category.items():
+            self.category_rows[category] = np.array(rows, dtype=np.int64)
+
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        if ivf is not None:
+            self.centroids, self.lists = ivf
+        elif train and len(items) >= IVF_MIN_ROWS:
+            nlist = int(np.sqrt(len(items)))
+            self.centroids, self.lists = train_ivf(self.vectors, nlist)
+
+        self.deleted: Optional[np.ndarray] = None
+        self.delta: Optional["SourceIndex"] = None
+
+    def __len__(self) -> int:
+        deleted = int(self.deleted.sum()) if self.deleted is not None else 0
+        return len(self.items) - deleted + self.delta_size
+
+    @property
+    def delta_size(self) -> int:
+        return len(self.delta.items) if self.delta is not None else 0
+
+    def with_updates(self, items: List[Dict[str, Any]], vectors: np.ndarray) -> "SourceIndex":
+        """Return a copy of this index with items inserted or replaced by id."""
+        ids = {item['id'] for item in items}
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+        deleted = self.deleted.copy() if self.deleted is not None else np.zeros(len(self.items), dtype=bool)
+        for item_id in ids:
+            row = self.id_rows.get(item_id)
+            if row is not None:
+                deleted[row] = True
+
+        delta_items, delta_vectors = list(items), [vectors]
+        if self.delta is not None:
+            keep = [row for row, item in enumerate(self.delta.items) if item['id'] not in ids]
+            delta_items = [self.delta.items[row] for row in keep] + delta_items
+            delta_vectors.insert(0, self.delta.vectors[keep])
+
+        updated = copy.copy(self)
+        updated.deleted = deleted
+        updated.delta = SourceIndex(self.source, np.vstack(delta_vectors), delta_items, train=False)
+        return updated
+
+    def compact(self) -> "SourceIndex":
+        """Fold the delta segment and deletions into a freshly built index."""
+        live = np.flatnonzero(~self.deleted) if self.deleted is not None else np.arange(len(self.items))
+        items = [self.items[row] for row in live]
+        parts = [self.vectors[live]] if len(live) else []
+        if self.delta is not None:
+            items += self.delta.items
+            parts.append(self.delta.vectors)
+        vectors = np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+        return SourceIndex(self.source, vectors, items)
+
+    def _filter_mask(self, recency: Optional[int], category_list: Optional[List[str]]) -> Optional[np.ndarray]:
+        mask = None
+        if recency:
+            cutoff = time.time() - recency * 86400
+            mask = self.created_at >= cutoff
+        if category_list:
+            category_mask = np.zeros(len(self.items), dtype=bool)
+            for category in category_list:
+                rows = self.category_rows.get(category)
+                if rows is not None:
+                    category_mask[rows] = True
+            mask = category_mask if mask is None else mask & category_mask
+        return mask
+
+    def _candidates(self, query: np.ndarray, mask: Optional[np.ndarray], k: int) -> np.ndarray:
+        if self.centroids is None:
+            rows = np.arange(len(self.items))
+        else:
+            nprobe = min(IVF_NPROBE, len(self.lists))
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([self.lists[c] for c in probe])
+        if mask is not None:
+            rows = rows[mask[rows]]
+            # Selective filters can empty the probed buckets; scan everything instead
+            if len(rows) < k and self.centroids is not None:
+                rows = np.flatnonzero(mask)
+        return rows
+
+    def search(self, query: np.ndarray, k: int, recency: Optional[int] = None, category_list: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Return up to k items most similar to query, best first.
+
+        Args:
+            query: Unit-normalized query vector
+            k: Maximum number of results
+            recency: Only keep items created within this many days
+            category_list: Only keep items tagged with at least one of these categories
+
+        Returns:
+            List of item dicts with 'source' and 'similarity' fields added
+        """
+        if k <= 0:
+            return []
+        mask = self._filter_mask(recency, category_list)
+        if self.deleted is not None:
+            mask = ~self.deleted if mask is None else mask & ~self.deleted
+        results = self._search_rows(query, k, mask)
+        if self.delta is not None:
+            results = sorted(
+                results + self.delta.search(query, k, recency, category_list),
+                key=lambda item: item['similarity'],
+                reverse=True
+            )[:k]
+        return results
+
+    def _search_rows(self, query: np.ndarray, k: int, mask: Optional[np.ndarray]) -> List[Dict[str, Any]]:
+        if not len(self.items):
+            return []
+        rows = self._candidates(query, mask, k)
+        if not len(rows):
+            return []
+
+        scores = self.vectors[rows] @ query
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {**self.items[rows[i]], 'source': self.source, 'similarity': float(scores[i])}
+            for i in top
+        ]
+
+#========================================
+# Multi-source index
+#========================================
+class VectorIndex:
+    """In-process mirror of the item tables' embeddings, keyed by source."""
+
+    def __init__(self, sources: Optional[Dict[str, SourceIndex]] = None):
+        self.sources: Dict[str, SourceIndex] = sources or {}
+
+    def has_source(self, source: str) -> bool:
+        return source in self.sources
+
+    def search(self, source: str, embedding: np.ndarray, num_results: int, recency: Optional[int], category_list: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """Search one source the same way the get_items_by_source RPC does."""
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        return self.sources[source].search(query, num_results, recency, category_list)
+
+    def with_updates(self, source: str, items: List[Dict[str, Any]], vectors: np.ndarray) -> "VectorIndex":
+        """Return a new VectorIndex with items applied to one source."""
+        sources = dict(self.sources)
+        if source in sources:
+            sources[source] = sources[source].with_updates(items, vectors)
+        else:
+            sources[source] = SourceIndex(source, normalize_rows(np.asarray(vectors, dtype=np.float32)), list(items))
+        return VectorIndex(sources)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            source: {'rows': len(index), 'delta_rows': index.delta_size, 'ivf_lists': len(index.lists)}
+            for source, index in self.sources.items()
+        }
+
+
+async def fetch_table(client: Any, table: str, page_size: int = 1000) -> tuple[np.ndarray, List[Dict[str, Any]]]:
+    """Page through an item table and return (unit vectors, metadata rows)."""
+    columns = ', '.join(ITEM_COLUMNS + ['embedding'])
+    items, vectors = [], []
+    start = 0
+    while True:
+        response = await client.table(table).select(columns).order('id').range(start, start + page_size - 1).execute()
+        rows = response.data or []
+        for row in rows:
+            embedding = row.pop('embedding', None)
+            if embedding is None:
+                continue
+            vectors.append(parse_embedding(embedding))
+            items.append(row)
+        if len(rows) < page_size:
+            break
+        start += page_size
+    matrix = normalize_rows(np.array(vectors, dtype=np.float32)) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return matrix, items
+
+
+async def build_from_supabase(client: Any) -> VectorIndex:
+    """Load every source table into a fresh VectorIndex."""
+    sources = {}
+    for source, table in SOURCE_TABLES.items():
+        started = time.perf_counter()
+        vectors, items = await fetch_table(client, table)
+        sources[source] = SourceIndex(source, vectors, items)
+        logger.info(f"Indexed {len(items)} rows from {table} in {time.perf_counter() - started:.1f}s")
+    return VectorIndex(sources)
+
+#========================================
+# Process-wide index
+#========================================
+vector_index: Optional[VectorIndex] = None
+
+def get_vector_index() -> Optional[VectorIndex]:
+    """Return the loaded index, or None if searches should use the Supabase RPC."""
+    return vector_index
+
+def set_vector_index(index: Optional[VectorIndex]) -> None:
+    """Swap in a new index. Readers holding the old one keep using it safely."""
+    global vector_index
+    vector_index = index
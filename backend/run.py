@@ -9,12 +9,10 @@ import os
 import asyncio
 import sentry_sdk
 from contextlib import asynccontextmanager
-import schedule
-from scripts.daily_update import update_task
 from app.lib.constants import FRONTEND_URL
 from app.lib.logger import logger
 from app.utils.init import lifespan
-from app.api.v1.endpoints import chat, ideas, search, feedback, health
+from app.api.v1.endpoints import chat, ideas, search, feedback, health, metrics, ingest
 from app.database.items import get_num_items
 
 # =======================================================================#
@@ -46,6 +44,8 @@ app.include_router(ideas.router, prefix="/api/v1/ideas", tags=["ideas"])
 app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
 app.include_router(feedback.router, prefix="/api/v1/feedback", tags=["feedback"])
 app.include_router(health.router, prefix="/api/v1/health", tags=["health"])
+app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["metrics"])
+app.include_router(ingest.router, prefix="/api/v1/ingest", tags=["ingest"])
 
 # =======================================================================#
 # RUN THE APPLICATION
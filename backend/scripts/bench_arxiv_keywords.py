@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+import argparse
+import json
+import subprocess
+import time
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+# Sample idea queries with the terms enrichment typically extracts for them
+SAMPLE_QUERIES = [
+    ("AI music composition tool for indie game developers", ["music composition", "game audio", "procedural generation"]),
+    ("Marketplace connecting local farmers with restaurants", ["farm to table", "supply chain", "marketplace"]),
+    ("Browser extension that summarizes research papers", ["summarization", "research papers", "browser extension"]),
+    ("Open-source vector database for edge devices", ["vector database", "edge computing", "embedded systems"]),
+    ("Mobile app to track carbon footprint of purchases", ["carbon footprint", "sustainability", "personal finance"]),
+]
+
+# Loads the model in a fresh interpreter so import and load cost are measured cold
+LOAD_SNIPPET = """
+import json, resource, time
+started = time.perf_counter()
+import spacy
+imported = time.perf_counter()
+nlp = spacy.load("en_core_web_sm", exclude={exclude})
+loaded = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - started,
+    "load_s": loaded - imported,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "pipeline": nlp.pipe_names,
+}}))
+"""
+
+def measure_load(exclude: list[str]) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD_SNIPPET.format(exclude=repr(exclude))],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure_per_query(extract, repeats: int) -> float:
+    # One warm-up pass so lazy loading isn't counted as per-query cost
+    for query, terms in SAMPLE_QUERIES:
+        extract(query, terms)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for query, terms in SAMPLE_QUERIES:
+            extract(query, terms)
+    return (time.perf_counter() - started) / (repeats * len(SAMPLE_QUERIES))
+
+def main(repeats: int):
+    import spacy
+    from app.utils import arxiv
+
+    full = measure_load([])
+    trimmed = measure_load(arxiv.SPACY_EXCLUDE)
+    print(f"full pipeline    {full['pipeline']}: import {full['import_s']:.2f}s, load {full['load_s']:.2f}s, max RSS {full['max_rss_mb']:.0f} MB")
+    print(f"tagger only      {trimmed['pipeline']}: import {trimmed['import_s']:.2f}s, load {trimmed['load_s']:.2f}s, max RSS {trimmed['max_rss_mb']:.0f} MB")
+
+    full_nlp = spacy.load("en_core_web_sm")
+    extractors = {
+        "full pipeline": lambda query, terms: [t.text.lower() for t in full_nlp(query) if t.pos_ in ["NOUN", "PROPN"]],
+        "tagger only": lambda query, terms: arxiv.extract_nouns(query),
+        "enrichment terms": lambda query, terms: [term.lower() for term in terms],
+    }
+    for name, extract in extractors.items():
+        print(f"{name:<17}per query {measure_per_query(extract, repeats) * 1000:.3f} ms")
+
+    for query, terms in SAMPLE_QUERIES:
+        print(f"- {query}\n    nouns: {arxiv.extract_nouns(query)}\n    terms: {terms}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare spaCy pipelines and enrichment terms for arXiv keyword extraction")
+    parser.add_argument("--repeats", type=int, default=200, help="Passes over the sample queries per extractor")
+    args = parser.parse_args()
+    main(args.repeats)
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+# Now import after adding to path
+from dotenv import load_dotenv
+from app.lib.logger import setup_logger
+from app.utils import arxiv_mirror
+
+load_dotenv()
+
+# Initialize logger
+logger = setup_logger("build_arxiv_mirror")
+
+async def main(dump_path: str, out_dir: str, since: datetime | None):
+    started = time.perf_counter()
+    manifest = await arxiv_mirror.build_mirror(dump_path, out_dir, since)
+    logger.info(f"Wrote arXiv mirror to {out_dir} in {time.perf_counter() - started:.1f}s: {manifest['sources']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local arXiv mirror from a metadata dump (JSON lines, e.g. arxiv-metadata-oai-snapshot.json)")
+    parser.add_argument("--dump", required=True, help="Metadata dump file, optionally gzipped")
+    parser.add_argument("--out", default=os.getenv("ARXIV_MIRROR_DIR", "snapshots/arxiv"), help="Mirror snapshot directory")
+    parser.add_argument("--since", help="Only include papers submitted on or after this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+    since = datetime.strptime(args.since, "%Y-%m-%d").replace(tzinfo=timezone.utc) if args.since else None
+    asyncio.run(main(args.dump, args.out, since))
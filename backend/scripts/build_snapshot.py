@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import time
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+# Now import after adding to path
+from dotenv import load_dotenv
+from supabase import acreate_client
+from app.lib.logger import setup_logger
+from app.utils import vector_index, snapshot, index_log
+
+load_dotenv()
+
+# Initialize logger
+logger = setup_logger("build_snapshot")
+
+async def main(out_dir: str, sources: list[str]):
+    client = await acreate_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+    # Anything appended to the index log after this point is replayed by the API
+    log_offset = index_log.log_size()
+    started = time.perf_counter()
+    source_indexes = {}
+    for source in sources:
+        table = vector_index.SOURCE_TABLES[source]
+        vectors, items = await vector_index.fetch_table(client, table)
+        source_indexes[source] = vector_index.SourceIndex(source, vectors, items)
+        logger.info(f"Fetched {len(items)} rows from {table}")
+
+    manifest = snapshot.write_snapshot(vector_index.VectorIndex(source_indexes), out_dir, log_offset)
+    logger.info(f"Wrote snapshot to {out_dir} in {time.perf_counter() - started:.1f}s: {manifest['sources']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a memory-mappable embedding snapshot from the item tables")
+    parser.add_argument("--out", default=os.getenv("EMBEDDING_SNAPSHOT_DIR", "snapshots/items"), help="Snapshot directory")
+    parser.add_argument("--sources", default=",".join(vector_index.SOURCE_TABLES), help="Comma-separated sources to include")
+    args = parser.parse_args()
+    asyncio.run(main(args.out, args.sources.split(",")))
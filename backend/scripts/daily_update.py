@@ -1,19 +1,19 @@
 import sys
 from pathlib import Path
-import json
-from datetime import datetime
-import schedule
-import time
-
-from utils.supabase import ideas
+import argparse
+from datetime import date, datetime, timedelta, timezone
 
 # Add the project root directory to Python path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 # Now import after adding to path
-from utils import embedding
 from utils.scraper import hackernews_scraper, reddit_scraper, product_hunt_scraper, ycombinator_scraper
+from app.utils import arxiv_mirror
+from app.utils.ingest import pipeline, staging, worker
+from app.utils.ingest import state as ingest_state
+from app.utils.ingest.pipeline import SourceJob
+from app.utils.scraper.browser_pool import browser_pool
 import asyncio
 from lib.logger import setup_logger
 
@@ -21,77 +21,119 @@ from lib.logger import setup_logger
 # Initialize logger
 logger = setup_logger("daily_update")
 
-def filter_today(year, month, day, items):
-    today_str = f"{year}-{month:02d}-{day:02d}"
-    return [item for item in items if item['created_at'].startswith(today_str)]
+def days_after(watermark: float, today: date) -> list[date]:
+    """Every calendar day (UTC) after the one containing watermark, up to today; at least today."""
+    start = min(datetime.fromtimestamp(watermark, timezone.utc).date() + timedelta(days=1), today)
+    return [start + timedelta(days=offset) for offset in range((today - start).days + 1)]
 
-async def update_task():
-    logger.info("Starting daily update task...")
-    try:
-        current_date = datetime.now()
-        year = current_date.year
-        month = current_date.month
-        day = current_date.day
+def daily_jobs(today: date) -> list[SourceJob]:
+    """Scrape jobs for everything posted since each source's last successful run.
 
-        # Get new YC events from current day
-        limit = 100
-        yc_items = await ycombinator_scraper.scrape_yc_companies(limit, num_scrolls=5, url="https://www.ycombinator.com/companies?batch=X25")
-        logger.info(f"Number of Y Combinator items: {len(yc_items)}")
-        embeddings = await embedding.get_item_embeddings(yc_items)
-        await ideas.add_items(yc_items, embeddings, "yc_items")
-        logger.info(f"Added {len(yc_items)} Y Combinator items")
+    HN and Reddit page back until they reach the start of the window, so a
+    missed night is caught up in full. The pipeline still drops items that
+    are already stored.
+    """
 
-        # Get HN items from current day
+    async def scrape_yc(since: float):
         limit = 100
-        hn_items = filter_today(year, month, day, hackernews_scraper.get_hacker_news_posts(limit=limit))
-        logger.info(f"Number of Hacker News items: {len(hn_items)}")
-        embeddings = await embedding.get_item_embeddings(hn_items)
-        await ideas.add_items(hn_items, embeddings, "hn_items")
-        logger.info(f"Added {len(hn_items)} Hacker News items")
-
-        # Get reddit events from current day
-        subreddits = ["indiehackers", "sideproject", "microsaas"]
-        limit = 200
-        re_items = []
-        for subreddit in subreddits:
-            re_items.extend(await reddit_scraper.get_reddit_posts(subreddit=subreddit, limit=limit))
-
-        re_items = filter_today(year, month, day, re_items)
-        logger.info(f"Number of Reddit items: {len(re_items)}")
-        embeddings = await embedding.get_item_embeddings(re_items)
-        await ideas.add_items(re_items, embeddings, "re_items")
-        logger.info(f"Added {len(re_items)} Reddit items")
-
-
-        # Get product hunt events from current day
+        return await ycombinator_scraper.scrape_yc_companies(limit, num_scrolls=5, url="https://www.ycombinator.com/companies?batch=X25")
+
+    async def scrape_hn(since: float):
+        # The HN scraper is blocking, keep it off the event loop
+        return await asyncio.to_thread(hackernews_scraper.get_all_hacker_news_posts, int(since))
+
+    def scrape_subreddit(subreddit: str):
+        async def scrape(since: float):
+            return await reddit_scraper.get_reddit_posts(subreddit=subreddit, created_after=since)
+        return scrape
+
+    async def scrape_ph(since: float):
+        # One leaderboard page per day, dated at midnight, so the watermark's
+        # day is already stored; catch up on any days a failed run missed
+        watermark = since + ingest_state.INGEST_WATERMARK_OVERLAP_SECONDS
+        products = []
+        for day in days_after(watermark, today):
+            day_products = await product_hunt_scraper.scrape_product_hunt_daily(day.year, day.month, day.day, num_scrolls=5)
+            if not day_products:
+                # The scraper logs a failed page and returns nothing. Stop at
+                # that day, so the watermark can't move past it and the next
+                # run starts from it again
+                if not products:
+                    raise RuntimeError(f"No Product Hunt products found for {day.isoformat()}")
+                logger.error(f"No Product Hunt products found for {day.isoformat()}; catching up from there next run")
+                break
+            products.extend(day_products)
+        return products
+
+    subreddits = ["indiehackers", "sideproject", "microsaas"]
+    return [
+        # YC items carry their batch date, not a post time
+        SourceJob("Y Combinator", "yc_items", scrape_yc, windowed=False),
+        SourceJob("Hacker News", "hn_items", scrape_hn),
+        *(SourceJob(f"r/{subreddit}", "re_items", scrape_subreddit(subreddit)) for subreddit in subreddits),
+        SourceJob("Product Hunt", "ph_items", scrape_ph),
+    ]
+
+async def update_task() -> dict:
+    """Run one daily ingestion and return its summary.
+
+    Raises:
+        Exception: If the pipeline itself fails; per-source scrape errors are
+            reported in the summary instead
+    """
+    logger.info("Starting daily update task...")
+
+    # Every source scrapes at once and streams into shared embed and
+    # upsert stages, so the run takes about as long as the slowest source
+    async def update_arxiv_mirror():
+        # Add newly submitted papers to the local arXiv mirror
         try:
-            daily_items = await product_hunt_scraper.scrape_product_hunt_daily(year, month, day, num_scrolls=5)
-            if daily_items:
-                embeddings = await embedding.get_item_embeddings(daily_items)
-                await ideas.add_items(daily_items, embeddings, "ph_items")
-                logger.info(f"Added {len(daily_items)} items for {year}-{month:02d}-{day:02d}")
-            else:
-                logger.warning(f"No items found for {year}-{month:02d}-{day:02d}")
+            added = await arxiv_mirror.update_mirror()
+            logger.info(f"Added {added} arXiv papers to the mirror")
+            return added
         except Exception as e:
-            logger.error(f"Error processing {year}-{month:02d}-{day:02d}: {e}")
+            logger.error(f"Error updating arXiv mirror: {e}")
+            return None
 
-        logger.info("Daily update task completed successfully")
-    except Exception as e:
-        logger.error(f"Error in daily update task: {e}")
-
-def run_scheduler():
-    # Schedule the task to run daily at 23:50
-    schedule.every().day.at("23:50").do(lambda: asyncio.run(update_task()))
-    logger.info("Scheduler started. Will run daily at 23:50.")
-
-
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+    try:
+        stats, arxiv_added = await asyncio.gather(
+            pipeline.run_pipeline(daily_jobs(date.today())),
+            update_arxiv_mirror()
+        )
+    finally:
+        # YC and Product Hunt share one pooled browser for the run
+        await browser_pool.close()
+
+    for name, source in stats['sources'].items():
+        if source['error']:
+            logger.error(f"{name}: scrape failed: {source['error']}")
+        else:
+            logger.info(
+                f"{name}: {source['scraped']} scraped, {source['skipped']} unchanged, {source['duplicates']} duplicates, "
+                f"{source['resumed']} resumed, {source['inserted']} inserted, {source['updated']} updated, "
+                f"{source['failed']} failed, {source['dead_lettered']} dead-lettered"
+            )
+    logger.info(f"Left in staging: {stats['staging']}")
+
+    logger.info("Daily update task completed successfully")
+    return {**stats, 'arxiv_added': arxiv_added}
 
 if __name__ == "__main__":
+    # The ingestion worker: started by the API (INGEST_WORKER_MODE=subprocess)
+    # or deployed on its own. Runs are serialized across workers by a lock.
+    parser = argparse.ArgumentParser(description="Scheduled ingestion worker")
+    parser.add_argument("--once", action="store_true", help="Run one ingestion now instead of on the schedule")
+    parser.add_argument("--force", action="store_true", help="With --once, run even if today's ingestion already succeeded")
+    parser.add_argument("--requeue-dead-letters", action="store_true", help="Give dead-lettered items another try on the next run, then exit")
+    args = parser.parse_args()
     try:
-        run_scheduler()
+        if args.requeue_dead_letters:
+            logger.info(f"Requeued {staging.staging_queue.requeue_dead_letters()} dead-lettered items")
+            sys.exit(0)
+        if args.once:
+            asyncio.run(worker.run_once(update_task, date.today().isoformat(), force=args.force))
+        else:
+            worker.run_worker(update_task)
     except KeyboardInterrupt:
         logger.info("Scheduler stopped by user")
     except Exception as e:
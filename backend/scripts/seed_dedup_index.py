@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import time
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+# Now import after adding to path
+from dotenv import load_dotenv
+from supabase import acreate_client
+from app.lib.logger import setup_logger
+from app.utils import dedup
+
+load_dotenv()
+
+# Initialize logger
+logger = setup_logger("seed_dedup_index")
+
+# Tables the daily ingestion writes, so their stored items are what new copies are matched against
+DEDUP_TABLES = ["ph_items", "hn_items", "re_items", "yc_items"]
+
+async def seed_table(client, table: str, page_size: int) -> int:
+    """Index every stored item of table; returns how many rows were read."""
+    rows_read = 0
+    start = 0
+    while True:
+        response = await client.table(table).select('id, title, description, link').order('id').range(start, start + page_size - 1).execute()
+        rows = response.data or []
+        # Signatures are keyed by the item, so re-running the seed just rewrites them
+        await asyncio.to_thread(dedup.duplicate_index.add, table, rows)
+        rows_read += len(rows)
+        if len(rows) < page_size:
+            return rows_read
+        start += page_size
+
+async def main(tables: list[str], page_size: int):
+    client = await acreate_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    for table in tables:
+        started = time.perf_counter()
+        count = await seed_table(client, table, page_size)
+        logger.info(f"Indexed {count} rows from {table} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    # One-off: items stored before near-duplicate detection existed are
+    # otherwise never matched, so their copies on other sources get stored again
+    parser = argparse.ArgumentParser(description="Seed the near-duplicate index from the stored item tables")
+    parser.add_argument("--tables", default=",".join(DEDUP_TABLES), help="Comma-separated item tables to index")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows fetched per request")
+    args = parser.parse_args()
+    asyncio.run(main(args.tables.split(","), args.page_size))
@@ -0,0 +1,66 @@
+-- Ranked items from several item tables in one call.
+--
+-- source_params: [{"source": "reddit", "categories": ["r/sideproject"], "num_results": 10}, ...]
+-- Returns one row per item: its source, the row as JSON (without the embedding)
+-- and its cosine similarity to embedding_param. Category and recency filters
+-- match get_items_by_source: an empty category list means no filter, and
+-- recency is a window in days.
+create or replace function get_items_multi_source(
+    embedding_param vector(1536),
+    source_params jsonb,
+    recency int
+)
+returns table (source text, item jsonb, similarity float8)
+language sql stable
+as $$
+    with params as (
+        select
+            p->>'source' as source,
+            array(select jsonb_array_elements_text(coalesce(p->'categories', '[]'::jsonb))) as categories,
+            (p->>'num_results')::int as num_results
+        from jsonb_array_elements(source_params) as p
+    ),
+    cutoff as (
+        select case when recency is null or recency <= 0 then '-infinity'::timestamptz
+                    else now() - make_interval(days => recency) end as ts
+    )
+    (
+        select 'y_combinator', to_jsonb(t) - 'embedding', 1 - (t.embedding <=> embedding_param)
+        from yc_items t, params p, cutoff c
+        where p.source = 'y_combinator'
+          and t.created_at >= c.ts
+          and (cardinality(p.categories) = 0 or t.categories && p.categories)
+        order by t.embedding <=> embedding_param
+        limit (select num_results from params where source = 'y_combinator')
+    )
+    union all
+    (
+        select 'hacker_news', to_jsonb(t) - 'embedding', 1 - (t.embedding <=> embedding_param)
+        from hn_items t, params p, cutoff c
+        where p.source = 'hacker_news'
+          and t.created_at >= c.ts
+          and (cardinality(p.categories) = 0 or t.categories && p.categories)
+        order by t.embedding <=> embedding_param
+        limit (select num_results from params where source = 'hacker_news')
+    )
+    union all
+    (
+        select 'reddit', to_jsonb(t) - 'embedding', 1 - (t.embedding <=> embedding_param)
+        from re_items t, params p, cutoff c
+        where p.source = 'reddit'
+          and t.created_at >= c.ts
+          and (cardinality(p.categories) = 0 or t.categories && p.categories)
+        order by t.embedding <=> embedding_param
+        limit (select num_results from params where source = 'reddit')
+    )
+    union all
+    (
+        select 'product_hunt', to_jsonb(t) - 'embedding', 1 - (t.embedding <=> embedding_param)
+        from ph_items t, params p, cutoff c
+        where p.source = 'product_hunt'
+          and t.created_at >= c.ts
+          and (cardinality(p.categories) = 0 or t.categories && p.categories)
+        order by t.embedding <=> embedding_param
+        limit (select num_results from params where source = 'product_hunt')
+    );
+$$;
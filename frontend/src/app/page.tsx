@@ -12,6 +12,21 @@ import { Item, SearchFilters, SearchFiltersMain } from "@/interfaces";
 import { Message } from "@/components/ui/form-message";
 import { FeedbackButton } from "@/components/feedback/FeedbackButton";
 
+// Add a source's partial hits to the items shown so far, keeping one copy per link.
+// With replace, the source's earlier hits were scored against another query
+// vector, so they are dropped rather than compared by similarity.
+function mergePartialItems(prev: Item[] | null, incoming: Item[], source: string, replace: boolean): Item[] {
+  const kept = replace ? (prev || []).filter((item) => item.source !== source) : prev || [];
+  const merged = new Map(kept.map((item) => [item.link, item]));
+  for (const item of incoming) {
+    const existing = merged.get(item.link);
+    if (!existing || (item.similarity || 0) > (existing.similarity || 0)) {
+      merged.set(item.link, item);
+    }
+  }
+  return Array.from(merged.values());
+}
+
 export default function Login(props: { searchParams: Message }) {
   const [items, setItems] = useState<Item[] | null>(null);
   const [isLoading, setIsLoading] = useState(false);
@@ -38,6 +53,7 @@ export default function Login(props: { searchParams: Message }) {
         reddit_categories: filters.redditCategories?.join(",") || "",
         product_hunt_categories: filters.productHuntCategories?.join(",") || "",
         y_combinator_categories: filters.yCombinatorCategories?.join(",") || "",
+        stream: "true",
       };
 
       const response = await fetch(
@@ -52,6 +68,8 @@ export default function Login(props: { searchParams: Message }) {
       if (!reader) throw new Error("No reader available");
 
       let buffer = "";
+      // Which query each source's partial hits shown so far were scored against
+      const scoredAgainst = new Map<string, string>();
 
       while (true) {
         const { done, value } = await reader.read();
@@ -76,6 +94,13 @@ export default function Login(props: { searchParams: Message }) {
 
               if (data.type === "status") {
                 setStatusMessages((prev) => [...prev, data.message]);
+              } else if (data.type === "partial_results") {
+                // Early hits from one source; the final results event replaces them
+                const previous = scoredAgainst.get(data.source);
+                const replace = previous !== undefined && previous !== data.scored_against;
+                scoredAgainst.set(data.source, data.scored_against);
+                setItems((prev) => mergePartialItems(prev, data.items, data.source, replace));
+                setIsLoading(false);
               } else if (data.type === "results") {
                 setItems(data.items);
                 console.log(data.items);